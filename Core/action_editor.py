@@ -3,7 +3,15 @@
 import bpy
 
 from .node_tree import AnimNodeTree
-from .helper_methoden import _on_action_input_changed, _poll_armature_obj, _enum_slot_bones, _on_slot_armature_changed
+from .helper_methoden import (
+    _on_action_input_changed,
+    _poll_armature_obj,
+    _enum_slot_bones,
+    _on_slot_armature_changed,
+    _search_slot_bones,
+    _get_slot_bone_search,
+    _set_slot_bone_search,
+)
 
 def register(): 
     for c in _CLASSES: bpy.utils.register_class(c)
@@ -63,6 +71,14 @@ class AnimGraphActionInputValue(bpy.types.PropertyGroup):
         items=_enum_slot_bones,
         update=_on_action_input_changed,
     )
+    # Suchfeld für große Rigs; liest/schreibt bone_name
+    bone_search: bpy.props.StringProperty(
+        name="Bone",
+        description="Search bone",
+        get=_get_slot_bone_search,
+        set=_set_slot_bone_search,
+        search=_search_slot_bones,
+    )
 
 
 _CLASSES = [
@@ -0,0 +1,290 @@
+# animation_graph/Core/dependency_index.py
+
+import bpy
+from bpy.app.handlers import persistent, load_post, undo_post, redo_post
+
+
+# Reverse index AnimNodeTree -> Actions, damit ein Tree-Edit nicht alle bpy.data.actions scannen muss.
+# tree pointer -> {action pointer: lookup key}
+_TREE_ACTIONS = {}
+
+# Anzahl Actions beim letzten Rebuild; duplizierte/neu angelegte Actions laufen an
+# keinem Update-Callback vorbei, ein geänderter Count erzwingt daher einen Rebuild.
+_ACTION_COUNT = -1
+_ACTION_INDEX_VALID = False
+
+# Group-Hierarchie: parent tree pointer -> {subtree pointer: {group node names}}
+_TREE_GROUPS = {}
+# abgeleitet: subtree pointer -> {parent tree pointer: {group node names}}
+_GROUP_USERS = {}
+# tree pointer -> lookup key (zum Auflösen von Parents/Subtrees)
+_TREE_KEYS = {}
+
+_TREE_COUNT = -1
+_GROUP_INDEX_VALID = False
+
+
+def register():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded not in h: h.append(_on_data_reloaded)
+
+def unregister():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded in h: h.remove(_on_data_reloaded)
+    invalidate()
+
+
+@persistent
+def _on_data_reloaded(*_args):
+    # Nach Load/Undo sind Pointer nicht mehr verlässlich.
+    invalidate()
+
+def invalidate():
+    global _ACTION_INDEX_VALID, _GROUP_INDEX_VALID
+    _ACTION_INDEX_VALID = False
+    _GROUP_INDEX_VALID = False
+    _TREE_ACTIONS.clear()
+    _TREE_GROUPS.clear()
+    _GROUP_USERS.clear()
+    _TREE_KEYS.clear()
+
+
+# --------------------------------------------------------------------
+# ID lookup helpers
+# --------------------------------------------------------------------
+
+def lookup_key(id_data):
+    """Key for bpy.data.<collection>.get(...), inklusive Library-Pfad bei verlinkten IDs."""
+    lib = getattr(id_data, "library", None)
+    if lib is None:
+        return id_data.name
+    return (id_data.name, lib.filepath)
+
+def _resolve(collection, key, ptr):
+    try:
+        id_data = collection.get(key)
+    except Exception:
+        return None
+    if id_data is None:
+        return None
+    try:
+        if id_data.as_pointer() != ptr:
+            return None
+    except Exception:
+        return None
+    return id_data
+
+def resolve_tree(key, ptr):
+    return _resolve(bpy.data.node_groups, key, ptr)
+
+
+# --------------------------------------------------------------------
+# tree -> actions
+# --------------------------------------------------------------------
+
+def _rebuild_action_index():
+    global _ACTION_COUNT, _ACTION_INDEX_VALID
+    _TREE_ACTIONS.clear()
+
+    for action in bpy.data.actions:
+        tree = getattr(action, "animgraph_tree", None)
+        if tree is None:
+            continue
+        try:
+            _TREE_ACTIONS.setdefault(tree.as_pointer(), {})[action.as_pointer()] = lookup_key(action)
+        except Exception:
+            pass
+
+    _ACTION_COUNT = len(bpy.data.actions)
+    _ACTION_INDEX_VALID = True
+
+def _ensure_action_index():
+    if not _ACTION_INDEX_VALID or _ACTION_COUNT != len(bpy.data.actions):
+        _rebuild_action_index()
+
+def bind_action(action, tree):
+    """Action-Binding hat sich geändert (Action.animgraph_tree update callback)."""
+    if action is None or not _ACTION_INDEX_VALID:
+        return
+
+    try:
+        action_ptr = action.as_pointer()
+    except Exception:
+        return
+
+    for entries in _TREE_ACTIONS.values():
+        entries.pop(action_ptr, None)
+
+    if tree is not None:
+        try:
+            _TREE_ACTIONS.setdefault(tree.as_pointer(), {})[action_ptr] = lookup_key(action)
+        except Exception:
+            invalidate()
+
+def _resolve_actions(tree, tree_ptr):
+    out = []
+    for action_ptr, key in _TREE_ACTIONS.get(tree_ptr, {}).items():
+        action = _resolve(bpy.data.actions, key, action_ptr)
+        if action is None or getattr(action, "animgraph_tree", None) != tree:
+            return None
+        out.append(action)
+    return out
+
+def actions_for_tree(tree):
+    """Alle Actions, deren animgraph_tree == tree ist."""
+    if tree is None:
+        return []
+
+    try:
+        tree_ptr = tree.as_pointer()
+    except Exception:
+        return []
+
+    _ensure_action_index()
+    actions = _resolve_actions(tree, tree_ptr)
+    if actions is not None:
+        return actions
+
+    # Rename/Delete seit dem letzten Rebuild -> einmal neu aufbauen.
+    _rebuild_action_index()
+    return _resolve_actions(tree, tree_ptr) or []
+
+
+# --------------------------------------------------------------------
+# subtree -> group instances / tree -> parent trees
+# --------------------------------------------------------------------
+
+def _is_animtree(tree):
+    return tree is not None and getattr(tree, "bl_idname", "") == "AnimNodeTree"
+
+def _scan_tree_groups(tree):
+    groups = {}
+    for node in getattr(tree, "nodes", []):
+        if getattr(node, "bl_idname", "") != "AnimNodeGroup":
+            continue
+        sub = getattr(node, "node_tree", None)
+        if not _is_animtree(sub):
+            continue
+        sub_ptr = sub.as_pointer()
+        _TREE_KEYS[sub_ptr] = lookup_key(sub)
+        groups.setdefault(sub_ptr, set()).add(node.name)
+    return groups
+
+def _set_tree_groups(parent_ptr, groups):
+    old = _TREE_GROUPS.get(parent_ptr, {})
+    for sub_ptr in old:
+        if sub_ptr in groups:
+            continue
+        users = _GROUP_USERS.get(sub_ptr)
+        if users is not None:
+            users.pop(parent_ptr, None)
+            if not users:
+                _GROUP_USERS.pop(sub_ptr, None)
+
+    if groups:
+        _TREE_GROUPS[parent_ptr] = groups
+    else:
+        _TREE_GROUPS.pop(parent_ptr, None)
+
+    for sub_ptr, names in groups.items():
+        _GROUP_USERS.setdefault(sub_ptr, {})[parent_ptr] = names
+
+def _rebuild_group_index():
+    global _TREE_COUNT, _GROUP_INDEX_VALID
+    _TREE_GROUPS.clear()
+    _GROUP_USERS.clear()
+    _TREE_KEYS.clear()
+
+    for tree in bpy.data.node_groups:
+        if not _is_animtree(tree):
+            continue
+        try:
+            parent_ptr = tree.as_pointer()
+            _TREE_KEYS[parent_ptr] = lookup_key(tree)
+            _set_tree_groups(parent_ptr, _scan_tree_groups(tree))
+        except Exception:
+            pass
+
+    _TREE_COUNT = len(bpy.data.node_groups)
+    _GROUP_INDEX_VALID = True
+
+def _ensure_group_index():
+    if not _GROUP_INDEX_VALID or _TREE_COUNT != len(bpy.data.node_groups):
+        _rebuild_group_index()
+
+def refresh_tree_groups(tree):
+    """
+    Group-Kanten eines einzelnen Trees neu einlesen (aus AnimNodeTree.update).
+    Kostet O(nodes) dieses Trees, nicht O(alle Trees).
+    """
+    if not _GROUP_INDEX_VALID or not _is_animtree(tree):
+        return
+    try:
+        parent_ptr = tree.as_pointer()
+        _TREE_KEYS[parent_ptr] = lookup_key(tree)
+        _set_tree_groups(parent_ptr, _scan_tree_groups(tree))
+    except Exception:
+        invalidate()
+
+def _resolve_group_users(subtree, sub_ptr):
+    out = []
+    for parent_ptr, names in _GROUP_USERS.get(sub_ptr, {}).items():
+        parent = resolve_tree(_TREE_KEYS.get(parent_ptr), parent_ptr)
+        if parent is None:
+            return None
+
+        nodes = []
+        for name in names:
+            node = parent.nodes.get(name)
+            if node is None or getattr(node, "node_tree", None) != subtree:
+                return None
+            nodes.append(node)
+        out.append((parent, nodes))
+    return out
+
+def group_users(subtree):
+    """[(parent_tree, [AnimNodeGroup, ...]), ...] aller Instanzen, die subtree benutzen."""
+    if not _is_animtree(subtree):
+        return []
+
+    sub_ptr = subtree.as_pointer()
+    _ensure_group_index()
+    users = _resolve_group_users(subtree, sub_ptr)
+    if users is not None:
+        return users
+
+    _rebuild_group_index()
+    return _resolve_group_users(subtree, sub_ptr) or []
+
+def _walk_ancestors(start_ptr):
+    seen = {start_ptr}
+    queue = [start_ptr]
+    out = []
+
+    while queue:
+        sub_ptr = queue.pop()
+        for parent_ptr in _GROUP_USERS.get(sub_ptr, {}):
+            if parent_ptr in seen:
+                continue
+            seen.add(parent_ptr)
+
+            parent = resolve_tree(_TREE_KEYS.get(parent_ptr), parent_ptr)
+            if parent is None:
+                return None
+            out.append(parent)
+            queue.append(parent_ptr)
+    return out
+
+def ancestor_trees(tree):
+    """Alle Trees, die tree direkt oder über verschachtelte Groups verwenden (ohne tree selbst)."""
+    if not _is_animtree(tree):
+        return []
+
+    start_ptr = tree.as_pointer()
+    _ensure_group_index()
+    out = _walk_ancestors(start_ptr)
+    if out is not None:
+        return out
+
+    _rebuild_group_index()
+    return _walk_ancestors(start_ptr) or []
@@ -0,0 +1,368 @@
+# animation_graph/Core/disk_cache.py
+
+import json
+import os
+import tempfile
+import uuid
+from hashlib import blake2b
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent, load_post, save_post
+
+from . import dependency_index, playback_cache, tree_hash
+from .helper_methoden import action_input_revision, build_action_input_value_map, _iter_action_fcurves
+
+
+# Zweite Stufe des Playback-Caches: Endposen pro Frame als .npy-Dateien, per
+# np.load(mmap_mode="r") gelesen. Ein Cache-Eintrag ist ein Verzeichnis
+#   <disk_dir>/<key>/meta.json + pose_<gen>_<i>.npy, modes_<gen>_<i>.npy, frames_<gen>.npy
+# key hängt nur von Inhalten ab (Tree-Hash, Action-Name und -Keys, Action-Inputs, Frame-Range),
+# nicht von Pointern, damit andere Sessions/Farm-Nodes denselben Eintrag finden.
+
+_FORMAT_VERSION = 1
+_META = "meta.json"
+
+# (scene ptr, Action-Input-Revision, Trees, Frame-Range, Verzeichnis) -> (Verzeichnis, key) | None
+_KEYS = {}
+
+# entry dir -> _DiskEntry | None (nicht vorhanden/ungültig)
+_LOADED = {}
+
+# entry dir -> _Recording (im Speicher gesammelte, noch nicht geschriebene Frames)
+_RECORDINGS = {}
+
+# Fehler des letzten Schreibversuchs (für das Cache-Panel), None nach Erfolg
+_WRITE_ERROR = None
+
+
+def register():
+    if _on_load_post not in load_post: load_post.append(_on_load_post)
+    if _on_save_post not in save_post: save_post.append(_on_save_post)
+
+def unregister():
+    if _on_save_post in save_post: save_post.remove(_on_save_post)
+    if _on_load_post in load_post: load_post.remove(_on_load_post)
+    _KEYS.clear()
+    _LOADED.clear()
+    _RECORDINGS.clear()
+
+
+@persistent
+def _on_load_post(*_args):
+    global _WRITE_ERROR
+    _KEYS.clear()
+    _LOADED.clear()
+    _RECORDINGS.clear()
+    _WRITE_ERROR = None
+
+@persistent
+def _on_save_post(*_args):
+    # Relative Cache-Pfade sind erst mit gespeicherter .blend auflösbar.
+    _KEYS.clear()
+    flush_all()
+
+
+def enabled(scene):
+    s = playback_cache.settings(scene)
+    return bool(s is not None and s.use_cache and s.use_disk_cache)
+
+def cache_root(scene):
+    s = playback_cache.settings(scene)
+    raw = str(getattr(s, "disk_dir", "") or "")
+    if not raw:
+        return None
+    if raw.startswith("//") and not bpy.data.filepath:
+        return None
+    return os.path.normpath(bpy.path.abspath(raw))
+
+def invalidate():
+    """
+    Pose/Rig/Keys außerhalb des Graphen geändert: gesammelte Frames verwerfen und Keys
+    (Action-Inhalt) sowie gemappte Einträge neu bestimmen.
+    """
+    _RECORDINGS.clear()
+    _KEYS.clear()
+    _LOADED.clear()
+
+
+# --------------------------------------------------------------------
+# keys
+# --------------------------------------------------------------------
+
+def _input_token(action, tree):
+    values = build_action_input_value_map(action, tree)
+    return ";".join(f"{name}={tree_hash.value_token(values[name])}" for name in sorted(values))
+
+def _action_token(action):
+    # Keyframes (Position und Handles) aller FCurves: Key-Edits ergeben einen neuen Eintrag
+    h = blake2b(digest_size=16)
+    for fcurve in _iter_action_fcurves(action):
+        points = fcurve.keyframe_points
+        n = len(points)
+        h.update(repr((fcurve.data_path, int(fcurve.array_index), n)).encode("utf-8", "surrogatepass"))
+        for attr in ("co", "handle_left", "handle_right"):
+            arr = np.empty(n * 2, dtype=np.float32)
+            points.foreach_get(attr, arr)
+            h.update(arr.tobytes())
+    return h.hexdigest()
+
+def entry_dir(scene, trees):
+    """Verzeichnis des Disk-Eintrags für die aktiven (tree, action)-Paare, None wenn nicht nutzbar."""
+    root = cache_root(scene)
+    if root is None or not trees:
+        return None
+
+    frame_range = (int(scene.frame_start), int(scene.frame_end))
+    hashes = tuple((tree_hash.content_hash(tree), action.as_pointer()) for tree, action in trees)
+    memo = (scene.as_pointer(), action_input_revision(), hashes, frame_range, root)
+    if memo in _KEYS:
+        return _KEYS[memo]
+
+    try:
+        rows = sorted(
+            (
+                tree_hash.content_hash(tree),
+                repr(dependency_index.lookup_key(action)),
+                _action_token(action),
+                _input_token(action, tree),
+            )
+            for tree, action in trees
+        )
+    except Exception:
+        _KEYS[memo] = None
+        return None
+
+    h = blake2b(digest_size=16)
+    h.update(repr((_FORMAT_VERSION, frame_range, rows)).encode("utf-8", "surrogatepass"))
+    path = _KEYS[memo] = os.path.join(root, h.hexdigest())
+    return path
+
+
+# --------------------------------------------------------------------
+# read
+# --------------------------------------------------------------------
+
+class _DiskEntry:
+    """Gemappter Eintrag: pro Armature (Objektname, Bone-Namen, pose (F, B, 10), modes (F, B))."""
+
+    __slots__ = ("meta", "frame_start", "frames", "armatures", "rotation_modes")
+
+    def __init__(self, path, meta):
+        self.meta = meta
+        self.frame_start = int(meta["frame_start"])
+        self.rotation_modes = tuple(meta["rotation_modes"])
+        self.frames = np.load(os.path.join(path, meta["frames"]), mmap_mode="r")
+        self.armatures = [
+            (
+                arm["object"],
+                tuple(arm["bones"]),
+                np.load(os.path.join(path, arm["pose"]), mmap_mode="r"),
+                np.load(os.path.join(path, arm["modes"]), mmap_mode="r"),
+            )
+            for arm in meta["armatures"]
+        ]
+
+    def has_frame(self, frame):
+        i = frame - self.frame_start
+        return 0 <= i < len(self.frames) and bool(self.frames[i])
+
+    def cached_frame(self, scene, frame):
+        i = frame - self.frame_start
+        armatures = []
+        for ob_name, bones, pose, modes in self.armatures:
+            arm_ob = scene.objects.get(ob_name)
+            if arm_ob is None or arm_ob.type != "ARMATURE":
+                continue
+            idx = np.nonzero(modes[i] >= 0)[0]
+            if not len(idx):
+                continue
+            armatures.append((
+                arm_ob,
+                tuple(bones[k] for k in idx),
+                tuple(self.rotation_modes[m] for m in modes[i][idx]),
+                np.array(pose[i][idx], dtype=np.float64),
+            ))
+        return playback_cache.CachedFrame(armatures)
+
+
+def _load(path):
+    if path in _LOADED:
+        return _LOADED[path]
+    entry = None
+    try:
+        with open(os.path.join(path, _META), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") == _FORMAT_VERSION:
+            entry = _DiskEntry(path, meta)
+    except (OSError, ValueError, KeyError):
+        entry = None
+    _LOADED[path] = entry
+    return entry
+
+def lookup(scene, trees):
+    """Pose des aktuellen Frames aus dem Disk-Cache als CachedFrame, sonst None."""
+    path = entry_dir(scene, trees)
+    if path is None:
+        return None
+    entry = _load(path)
+    frame = int(scene.frame_current)
+    if entry is None or not entry.has_frame(frame):
+        return None
+    try:
+        return entry.cached_frame(scene, frame)
+    except Exception:
+        return None
+
+
+# --------------------------------------------------------------------
+# write
+# --------------------------------------------------------------------
+
+class _Recording:
+    __slots__ = ("frame_start", "frame_end", "frames")
+
+    def __init__(self, frame_start, frame_end):
+        self.frame_start = frame_start
+        self.frame_end = frame_end
+        # frame -> [(Objektname, Bone-Namen, Rotation-Modes, (N, 10)-Array)]
+        self.frames = {}
+
+    def complete(self, existing):
+        for frame in range(self.frame_start, self.frame_end + 1):
+            if frame not in self.frames and (existing is None or not existing.has_frame(frame)):
+                return False
+        return True
+
+
+def record(scene, trees, cached):
+    """Frisch ausgewerteten Frame vormerken; ist die Frame-Range komplett, wird geschrieben."""
+    path = entry_dir(scene, trees)
+    frame = int(scene.frame_current)
+    if path is None or cached is None or not (scene.frame_start <= frame <= scene.frame_end):
+        return
+
+    rec = _RECORDINGS.get(path)
+    if rec is None:
+        rec = _RECORDINGS[path] = _Recording(int(scene.frame_start), int(scene.frame_end))
+    rec.frames[frame] = [
+        (arm_ob.name, names, modes, arr) for arm_ob, names, modes, arr in cached.armatures
+    ]
+
+    if rec.complete(_load(path)):
+        flush(path)
+
+def last_write_error():
+    return _WRITE_ERROR
+
+def flush_all():
+    """Alle gesammelten Einträge schreiben; liefert den Fehler des letzten fehlgeschlagenen oder None."""
+    error = None
+    for path in list(_RECORDINGS):
+        error = flush(path) or error
+    return error
+
+def flush(path):
+    """
+    Gesammelte Frames (zusammen mit bereits vorhandenen) atomar nach path schreiben.
+    Liefert bei einem Fehler dessen Text (auch über last_write_error()), sonst None.
+    """
+    global _WRITE_ERROR
+    rec = _RECORDINGS.pop(path, None)
+    if rec is None or not rec.frames:
+        return None
+    try:
+        _write(path, rec, _load(path))
+        _WRITE_ERROR = None
+    except OSError as ex:
+        _WRITE_ERROR = f"{path}: {ex}"
+    _LOADED.pop(path, None)
+    return _WRITE_ERROR
+
+def _save_array(path, name, arr):
+    fd, tmp = tempfile.mkstemp(dir=path, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, os.path.join(path, name))
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+def _write(path, rec, existing):
+    os.makedirs(path, exist_ok=True)
+    n_frames = rec.frame_end - rec.frame_start + 1
+
+    # Armature -> Bone-Namen (Vereinigung über alle Frames, vorhandene zuerst)
+    layout = {}
+    if existing is not None and existing.frame_start == rec.frame_start:
+        for ob_name, bones, _pose, _modes in existing.armatures:
+            layout.setdefault(ob_name, {}).update((b, None) for b in bones)
+    else:
+        existing = None
+    for rows in rec.frames.values():
+        for ob_name, names, _modes, _arr in rows:
+            layout.setdefault(ob_name, {}).update((b, None) for b in names)
+
+    rotation_modes = list(existing.rotation_modes) if existing is not None else []
+    mode_ids = {m: i for i, m in enumerate(rotation_modes)}
+
+    frames = np.zeros(n_frames, dtype=np.bool_)
+    arrays = {}
+    for ob_name, bones in layout.items():
+        pose = np.zeros((n_frames, len(bones), 10), dtype=np.float64)
+        modes = np.full((n_frames, len(bones)), -1, dtype=np.int8)
+        arrays[ob_name] = (list(bones), {b: k for k, b in enumerate(bones)}, pose, modes)
+
+    if existing is not None:
+        frames[:] = existing.frames[:n_frames]
+        for ob_name, bones, old_pose, old_modes in existing.armatures:
+            _names, index, pose, modes = arrays[ob_name]
+            cols = [index[b] for b in bones]
+            pose[:, cols] = old_pose[:n_frames]
+            modes[:, cols] = old_modes[:n_frames]
+
+    for frame, rows in rec.frames.items():
+        i = frame - rec.frame_start
+        frames[i] = True
+        for ob_name, names, row_modes, arr in rows:
+            _names, index, pose, modes = arrays[ob_name]
+            modes[i, :] = -1
+            for k, (name, mode) in enumerate(zip(names, row_modes)):
+                m = mode_ids.get(mode)
+                if m is None:
+                    m = mode_ids[mode] = len(rotation_modes)
+                    rotation_modes.append(mode)
+                col = index[name]
+                pose[i, col] = arr[k]
+                modes[i, col] = m
+
+    # Neue Generation schreiben, dann meta.json atomar umstellen; alte Dateien danach löschen.
+    gen = uuid.uuid4().hex[:12]
+    meta = {
+        "version": _FORMAT_VERSION,
+        "frame_start": rec.frame_start,
+        "frame_end": rec.frame_end,
+        "rotation_modes": rotation_modes,
+        "frames": f"frames_{gen}.npy",
+        "armatures": [],
+    }
+    _save_array(path, meta["frames"], frames)
+    for i, (ob_name, (names, _index, pose, modes)) in enumerate(arrays.items()):
+        arm = {"object": ob_name, "bones": names, "pose": f"pose_{gen}_{i}.npy", "modes": f"modes_{gen}_{i}.npy"}
+        _save_array(path, arm["pose"], pose)
+        _save_array(path, arm["modes"], modes)
+        meta["armatures"].append(arm)
+
+    fd, tmp = tempfile.mkstemp(dir=path, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, os.path.join(path, _META))
+
+    # Alte Generationen: auf POSIX bleiben offene Mappings gültig, unter Windows ggf. gesperrt.
+    keep = {meta["frames"]} | {a["pose"] for a in meta["armatures"]} | {a["modes"] for a in meta["armatures"]}
+    for name in os.listdir(path):
+        if name.endswith(".npy") and name not in keep:
+            try: os.remove(os.path.join(path, name))
+            except OSError: pass
@@ -0,0 +1,782 @@
+# animation_graph/Core/eval_plan.py
+
+from types import SimpleNamespace
+
+from bpy.app.handlers import persistent, load_post, undo_post, redo_post
+from mathutils import Vector, Matrix, Euler
+
+from . import sockets, helper_methoden
+
+
+# tree pointer -> TreePlan
+_PLANS = {}
+
+# > 0, solange der Graph ausgewertet wird. Nodes schreiben dabei socket.default_value,
+# was Tree-Updates auslöst; diese Updates sind keine Edits und invalidieren nichts.
+_EVAL_DEPTH = 0
+
+
+def register():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded not in h: h.append(_on_data_reloaded)
+
+def unregister():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded in h: h.remove(_on_data_reloaded)
+    _PLANS.clear()
+
+
+@persistent
+def _on_data_reloaded(*_args):
+    # Pläne halten RNA-Referenzen; nach Load/Undo sind diese ungültig.
+    _PLANS.clear()
+
+
+def begin_evaluation():
+    global _EVAL_DEPTH
+    _EVAL_DEPTH += 1
+
+def end_evaluation():
+    global _EVAL_DEPTH
+    _EVAL_DEPTH = max(0, _EVAL_DEPTH - 1)
+
+def is_evaluating():
+    return _EVAL_DEPTH > 0
+
+
+# --------------------------------------------------------------------
+# value coercion
+# --------------------------------------------------------------------
+# Generische Pfade (entsprechen den alten try/except-Ketten) werden nur noch benutzt,
+# wenn der Wert nicht den Typ hat, den die Link-Typen erwarten lassen.
+
+def coerce_int(v, fallback=0):
+    try:
+        return int(v)
+    except Exception:
+        try:
+            return int(float(v))
+        except Exception:
+            return int(fallback)
+
+def coerce_float(v, fallback=0.0):
+    try:
+        return float(v)
+    except Exception:
+        return float(fallback)
+
+def coerce_vector(v, fallback=(0.0, 0.0, 0.0)):
+    try:
+        return Vector(v)
+    except Exception:
+        return Vector(fallback)
+
+def coerce_matrix(v, fallback=None):
+    if v is None:
+        return fallback
+    try:
+        return Matrix(v)
+    except Exception:
+        return fallback
+
+def _int_from_int(v, fallback):
+    if v.__class__ is int:
+        return v
+    return coerce_int(v, fallback)
+
+def _int_from_float(v, fallback):
+    if v.__class__ is float:
+        return int(v)
+    return coerce_int(v, fallback)
+
+def _float_from_float(v, fallback):
+    if v.__class__ is float:
+        return v
+    return coerce_float(v, fallback)
+
+def _float_from_int(v, fallback):
+    if v.__class__ is int:
+        return float(v)
+    return coerce_float(v, fallback)
+
+def _vector_from_vector(v, fallback):
+    if v.__class__ is Vector:
+        return v
+    return coerce_vector(v, fallback)
+
+def _vector_from_euler(v, fallback):
+    if v.__class__ is Euler:
+        return Vector(v)
+    return coerce_vector(v, fallback)
+
+def _matrix_from_matrix(v, fallback):
+    if v.__class__ is Matrix:
+        return v
+    return coerce_matrix(v, fallback)
+
+def _passthrough(v, fallback):
+    return fallback if v is None else v
+
+
+_NO_VALUE = object()
+
+_VECTOR_KINDS = {"VECTOR", "VECTORXYZ", "ROTATION", "TRANSLATION", "VECTORTRANSLATION"}
+
+def value_kind(socket_type):
+    """Socket-Typ -> Kategorie des Laufzeitwerts (INT/FLOAT/VECTOR/MATRIX/...)."""
+    raw = sockets._D(socket_type) if socket_type else None
+    if raw in _VECTOR_KINDS:
+        return "VECTOR"
+    return raw
+
+def _converter_for_kinds(from_raw, to_raw):
+    to_kind = "VECTOR" if to_raw in _VECTOR_KINDS else to_raw
+
+    if to_kind == "INT":
+        return _int_from_float if from_raw == "FLOAT" else _int_from_int
+    if to_kind == "FLOAT":
+        return _float_from_int if from_raw == "INT" else _float_from_float
+    if to_kind == "VECTOR":
+        return _vector_from_euler if from_raw == "ROTATION" else _vector_from_vector
+    if to_kind == "MATRIX":
+        return _matrix_from_matrix
+    return _passthrough
+
+# (from kind, to kind) -> converter, für alle in sockets.validLinks erlaubten Paare
+_CONVERTERS = {
+    (from_raw, to_raw): _converter_for_kinds(from_raw, to_raw)
+    for from_raw, targets in sockets.validLinks.items()
+    for to_raw in targets | {from_raw}
+}
+
+def converter_for(from_type, to_type):
+    from_raw = sockets._D(from_type) if from_type else None
+    to_raw = sockets._D(to_type) if to_type else None
+    conv = _CONVERTERS.get((from_raw, to_raw))
+    if conv is None:
+        conv = _converter_for_kinds(from_raw, to_raw)
+    return conv
+
+
+# --------------------------------------------------------------------
+# plan
+# --------------------------------------------------------------------
+
+class InputSlot:
+    """Zur Plan-Zeit aufgelöster Input: Link-Quelle (oder unverlinkt) plus Konverter."""
+
+    __slots__ = ("socket", "kind", "from_node", "from_socket", "from_key", "convert", "cut", "folded", "literal",
+                 "bind_index")
+
+    def __init__(self, socket, kind, from_node, from_socket, convert):
+        self.socket = socket
+        self.kind = kind
+        self.from_node = from_node
+        self.from_socket = from_socket
+        self.from_key = (from_node.as_pointer(), from_socket.name) if from_node is not None else None
+        self.convert = convert
+        # Link schließt einen Zyklus: Quelle nicht auswerten, default_value lesen
+        self.cut = False
+        # Quelle ist ein konstanter Teilgraph: Wert zur Plan-Zeit berechnet
+        self.folded = False
+        self.literal = None
+        # Quelle ist ein Group-Input-Socket: Index des Inputs an der Group-Instanz
+        self.bind_index = None
+        if from_node is not None and getattr(from_node, "type", "") == "GROUP_INPUT":
+            ptr = from_socket.as_pointer()
+            for idx, out in enumerate(from_node.outputs):
+                if out.as_pointer() == ptr:
+                    self.bind_index = idx
+                    break
+
+
+class BoneRef:
+    """
+    Zur Plan-Zeit aufgelöster Bone-Input: Armature + Bone-Name der Link-Quelle, oder der
+    Index des Group-Inputs (pro Instanz aufgelöst). handle wird beim ersten Read gesetzt.
+    """
+
+    __slots__ = ("arm_ob", "bone_name", "bind_index", "handle")
+
+    def __init__(self, arm_ob, bone_name, bind_index=None):
+        self.arm_ob = arm_ob
+        self.bone_name = bone_name
+        self.bind_index = bind_index
+        self.handle = None
+
+
+class TreePlan:
+    __slots__ = ("tree_ptr", "fingerprint", "slots", "cut_edges", "cycle_nodes", "recursive_groups",
+                 "folded_nodes", "dead_nodes", "pure_groups", "repeat_zones", "bone_refs", "fused_chains",
+                 "fused_nodes")
+
+    def __init__(self, tree_ptr, fingerprint):
+        self.tree_ptr = tree_ptr
+        self.fingerprint = fingerprint
+        # (node pointer, input name) -> InputSlot
+        self.slots = {}
+        # (from node pointer, to node pointer) der Links, die Zyklen schließen
+        self.cut_edges = set()
+        # Namen der Nodes auf Zyklen
+        self.cycle_nodes = set()
+        # Pointer der Group-Nodes, deren Subtree (verschachtelt) wieder diesen Tree enthält
+        self.recursive_groups = set()
+        # Anzahl konstant gefalteter / nicht zu Terminal-Nodes führender Nodes
+        self.folded_nodes = 0
+        self.dead_nodes = 0
+        # Pointer der Group-Nodes ohne Seiteneffekte (nur per Pull auswerten, nicht ticken)
+        self.pure_groups = set()
+        # Pointer des Repeat-Output-Nodes -> RepeatZone
+        self.repeat_zones = {}
+        # (node pointer, input name) -> BoneRef der NodeSocketBone-Inputs
+        self.bone_refs = {}
+        # Pointer des Root-Nodes -> FusedChain; Anzahl der darin aufgegangenen Nodes
+        self.fused_chains = {}
+        self.fused_nodes = 0
+
+    def ticks_group(self, node_ptr):
+        return node_ptr not in self.pure_groups
+
+    def slot(self, node_ptr, name):
+        return self.slots.get((node_ptr, name))
+
+    def is_cut(self, from_ptr, to_ptr):
+        return (from_ptr, to_ptr) in self.cut_edges
+
+
+def _structure_fingerprint(tree):
+    return (len(tree.nodes), len(tree.links))
+
+def _compile_input(sock):
+    to_type = getattr(sock, "bl_idname", "")
+    kind = value_kind(to_type)
+
+    if getattr(sock, "is_linked", False) and sock.links:
+        from_sock = sock.links[0].from_socket
+        from_node = from_sock.node
+        return InputSlot(sock, kind, from_node, from_sock, converter_for(from_sock.bl_idname, to_type))
+
+    return InputSlot(sock, kind, None, None, converter_for(to_type, to_type))
+
+def _compile_bone_ref(sock, slot):
+    if slot.bind_index is not None:
+        return BoneRef(None, "", slot.bind_index)
+    if getattr(slot.from_node, "bl_idname", "") == "AnimNodeGroup":
+        # Bone-Outputs von Groups werden pro Frame geschrieben
+        return None
+    src = slot.from_socket if slot.from_node is not None else sock
+    return BoneRef(getattr(src, "armature_obj", None), getattr(src, "bone_name", "") or "")
+
+def compile_plan(tree):
+    plan = TreePlan(tree.as_pointer(), _structure_fingerprint(tree))
+
+    for node in tree.nodes:
+        node_ptr = node.as_pointer()
+        for sock in node.inputs:
+            # wie inputs.get(name): bei doppelten Namen gewinnt der erste Socket
+            key = (node_ptr, sock.name)
+            if key in plan.slots:
+                continue
+            try:
+                slot = plan.slots[key] = _compile_input(sock)
+                ref = _compile_bone_ref(sock, slot) if sock.bl_idname == "NodeSocketBone" else None
+                if ref is not None:
+                    # Bone-Auswahl ändern löst ein Tree-Update aus (sockets._tag_bone_socket_tree)
+                    plan.bone_refs[key] = ref
+            except Exception:
+                pass
+
+    _detect_cycles(tree, plan)
+    _detect_recursive_groups(tree, plan)
+    _classify_groups(tree, plan)
+    _compile_repeat_zones(tree, plan)
+    return plan
+
+# --------------------------------------------------------------------
+# cycles
+# --------------------------------------------------------------------
+# Zyklen werden einmal beim Kompilieren gefunden statt pro Socket-Read per Guard-Set.
+# Der Link, über den die Pull-Auswertung den Zyklus wieder betreten würde, wird
+# gekappt (liest default_value, wie früher der Laufzeit-Guard).
+
+_TERMINAL_NODES = (
+    "DefineBoneTransformNode", "DefineBoneSetTransformNode", "DefineBoneSetNoiseNode", "DefineBoneSetSpringNode",
+    "DefineBonePropertyNode", "AnimNodeGroup",
+)
+
+# Node-ID-Property mit der Farbe vor dem Hervorheben
+_CYCLE_COLOR_PROP = "animgraph_cycle_color"
+_CYCLE_COLOR = (0.85, 0.15, 0.15)
+
+def _upstream(node):
+    for sock in node.inputs:
+        if sock.is_linked and sock.links:
+            yield sock.links[0].from_node
+
+def _detect_cycles(tree, plan):
+    nodes = list(tree.nodes)
+    # Start bei den getickten Nodes: gekappt wird, wo auch die Auswertung zuerst zurückkäme
+    nodes.sort(key=lambda n: getattr(n, "bl_idname", "") not in _TERMINAL_NODES)
+
+    state = {}   # node pointer -> 1 (auf dem Stack) | 2 (fertig)
+    for root in nodes:
+        root_ptr = root.as_pointer()
+        if root_ptr in state:
+            continue
+
+        path = [root]
+        state[root_ptr] = 1
+        stack = [(root, _upstream(root))]
+        while stack:
+            node, it = stack[-1]
+            up = next(it, None)
+            if up is None:
+                stack.pop()
+                path.pop()
+                state[node.as_pointer()] = 2
+                continue
+
+            up_ptr = up.as_pointer()
+            mark = state.get(up_ptr)
+            if mark == 1:
+                plan.cut_edges.add((up_ptr, node.as_pointer()))
+                i = next(k for k, n in enumerate(path) if n.as_pointer() == up_ptr)
+                plan.cycle_nodes.update(n.name for n in path[i:])
+            elif mark is None:
+                state[up_ptr] = 1
+                path.append(up)
+                stack.append((up, _upstream(up)))
+
+    for (node_ptr, _name), slot in plan.slots.items():
+        if slot.from_node is not None and (slot.from_key[0], node_ptr) in plan.cut_edges:
+            slot.cut = True
+
+def _contains_tree(tree, target_ptr, seen):
+    for node in tree.nodes:
+        sub = getattr(node, "node_tree", None) if getattr(node, "bl_idname", "") == "AnimNodeGroup" else None
+        if sub is None:
+            continue
+        sub_ptr = sub.as_pointer()
+        if sub_ptr == target_ptr:
+            return True
+        if sub_ptr in seen:
+            continue
+        seen.add(sub_ptr)
+        if _contains_tree(sub, target_ptr, seen):
+            return True
+    return False
+
+def _detect_recursive_groups(tree, plan):
+    tree_ptr = tree.as_pointer()
+    for node in tree.nodes:
+        if getattr(node, "bl_idname", "") != "AnimNodeGroup":
+            continue
+        sub = getattr(node, "node_tree", None)
+        if sub is None:
+            continue
+        if sub.as_pointer() == tree_ptr or _contains_tree(sub, tree_ptr, {sub.as_pointer()}):
+            plan.recursive_groups.add(node.as_pointer())
+            plan.cycle_nodes.add(node.name)
+
+# --------------------------------------------------------------------
+# side effects
+# --------------------------------------------------------------------
+
+_SIDE_EFFECT_NODES = (
+    "DefineBoneTransformNode", "DefineBoneSetTransformNode", "DefineBoneSetNoiseNode", "DefineBoneSetSpringNode",
+    "DefineBonePropertyNode",
+)
+
+def subtree_contains(tree, bl_idnames, seen=None):
+    """True, wenn tree oder ein verschachtelter Group-Tree einen Node dieser Typen enthält."""
+    seen = set() if seen is None else seen
+    tree_ptr = tree.as_pointer()
+    if tree_ptr in seen:
+        return False
+    seen.add(tree_ptr)
+
+    for node in tree.nodes:
+        bl_idname = getattr(node, "bl_idname", "")
+        if bl_idname in bl_idnames:
+            return True
+        if bl_idname == "AnimNodeGroup":
+            sub = getattr(node, "node_tree", None)
+            if sub is not None and subtree_contains(sub, bl_idnames, seen):
+                return True
+    return False
+
+def subtree_has_side_effects(tree):
+    """True, wenn tree (inkl. verschachtelter Groups) Transform-/Property-Nodes enthält."""
+    return subtree_contains(tree, _SIDE_EFFECT_NODES)
+
+def _classify_groups(tree, plan):
+    for node in tree.nodes:
+        if getattr(node, "bl_idname", "") != "AnimNodeGroup":
+            continue
+        sub = getattr(node, "node_tree", None)
+        if sub is None:
+            continue
+        # Bone-Outputs liest socket_bone_ref ohne Pull vom Socket: solche Groups weiter ticken
+        bone_out = any(
+            out.is_linked and getattr(out, "bl_idname", "") == "NodeSocketBone" for out in node.outputs
+        )
+        if not bone_out and not subtree_has_side_effects(sub):
+            plan.pure_groups.add(node.as_pointer())
+
+# --------------------------------------------------------------------
+# repeat zones
+# --------------------------------------------------------------------
+# Ein Repeat-Output wertet pro Iteration nur den Loop-Body neu aus: Nodes zwischen
+# Repeat-Input und dem Value-Input des Outputs. Alles andere davor ist schleifeninvariant.
+
+class RepeatZone:
+    __slots__ = ("input_node", "body", "hoisted", "kernel")
+
+    def __init__(self, input_node, body, hoisted):
+        self.input_node = input_node
+        # Pointer der Nodes, die vom Repeat-Input abhängen (ohne Input/Output selbst)
+        self.body = body
+        # Schleifeninvariante Nodes, die direkt in den Body (oder den Value-Input) einspeisen
+        self.hoisted = hoisted
+        # Kompilierter Loop-Kernel (Nodes/iteration_kernel); False = noch nicht versucht
+        self.kernel = False
+
+def _linked_upstream(node, plan):
+    node_ptr = node.as_pointer()
+    for up in _upstream(node):
+        if (up.as_pointer(), node_ptr) not in plan.cut_edges:
+            yield up
+
+def _compile_repeat_zone(output, plan):
+    repeat_in = output.inputs.get("Repeat In")
+    if repeat_in is None or not repeat_in.is_linked or not repeat_in.links:
+        return None
+    input_node = repeat_in.links[0].from_node
+    if getattr(input_node, "bl_idname", "") != "AnimNodeRepeatInput":
+        return None
+    input_ptr = input_node.as_pointer()
+
+    value = output.inputs.get("Value")
+    if value is None or not value.is_linked or not value.links:
+        return RepeatZone(input_node, (), ())
+    if (value.links[0].from_node.as_pointer(), output.as_pointer()) in plan.cut_edges:
+        return RepeatZone(input_node, (), ())
+
+    # Alle Nodes vor dem Value-Input, mit Downstream-Kanten innerhalb dieser Menge
+    root = value.links[0].from_node
+    nodes = {}
+    downstream = {}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node_ptr = node.as_pointer()
+        if node_ptr in nodes:
+            continue
+        nodes[node_ptr] = node
+        if node_ptr == input_ptr:
+            continue
+        for up in _linked_upstream(node, plan):
+            downstream.setdefault(up.as_pointer(), []).append(node_ptr)
+            stack.append(up)
+
+    body = set()
+    stack = list(downstream.get(input_ptr, ()))
+    while stack:
+        node_ptr = stack.pop()
+        if node_ptr in body:
+            continue
+        body.add(node_ptr)
+        stack.extend(downstream.get(node_ptr, ()))
+
+    hoisted = {}
+    consumers = [nodes[ptr] for ptr in body]
+    if root.as_pointer() not in body and root.as_pointer() != input_ptr:
+        hoisted[root.as_pointer()] = root
+    for node in consumers:
+        for up in _linked_upstream(node, plan):
+            up_ptr = up.as_pointer()
+            if up_ptr not in body and up_ptr != input_ptr:
+                hoisted[up_ptr] = up
+    return RepeatZone(input_node, tuple(body), tuple(hoisted.values()))
+
+def _compile_repeat_zones(tree, plan):
+    for node in tree.nodes:
+        if getattr(node, "bl_idname", "") != "AnimNodeRepeatOutput":
+            continue
+        try:
+            zone = _compile_repeat_zone(node, plan)
+        except Exception:
+            zone = None
+        if zone is not None:
+            plan.repeat_zones[node.as_pointer()] = zone
+
+def highlight_cycles(tree):
+    """
+    Nodes auf Zyklen rot färben; vorherige Farbe steht als ID-Property am Node.
+    Schreibt RNA: nur aus Edits (AnimNodeTree.update), nicht aus der Auswertung.
+    """
+    plan = TreePlan(tree.as_pointer(), None)
+    try:
+        _detect_cycles(tree, plan)
+        _detect_recursive_groups(tree, plan)
+    except Exception:
+        return
+
+    for node in tree.nodes:
+        try:
+            saved = node.get(_CYCLE_COLOR_PROP)
+            if node.name in plan.cycle_nodes:
+                if saved is None:
+                    node[_CYCLE_COLOR_PROP] = [float(node.use_custom_color), *node.color]
+                    node.use_custom_color = True
+                    node.color = _CYCLE_COLOR
+            elif saved is not None:
+                del node[_CYCLE_COLOR_PROP]
+                node.use_custom_color = bool(saved[0])
+                node.color = tuple(saved[1:4])
+        except Exception:
+            pass
+
+
+def get_plan(tree):
+    tree_ptr = tree.as_pointer()
+    plan = _PLANS.get(tree_ptr)
+    if plan is not None and plan.fingerprint == _structure_fingerprint(tree):
+        return plan
+
+    plan = _PLANS[tree_ptr] = compile_plan(tree)
+    # Falten wertet Nodes aus, die ihrerseits get_plan aufrufen: Plan muss schon registriert sein.
+    _eliminate_dead_nodes(tree, plan)
+    _fold_constants(tree, plan)
+    _detect_fused_chains(tree, plan)
+    return plan
+
+def cached_plan(tree):
+    """Aktueller Plan des Trees, falls schon kompiliert (für UI: kompiliert nicht im Draw)."""
+    plan = _PLANS.get(tree.as_pointer())
+    if plan is not None and plan.fingerprint == _structure_fingerprint(tree):
+        return plan
+    return None
+
+def invalidate(tree=None):
+    if tree is None:
+        _PLANS.clear()
+        return
+    try:
+        _PLANS.pop(tree.as_pointer(), None)
+    except Exception:
+        _PLANS.clear()
+
+
+# --------------------------------------------------------------------
+# constant folding / dead nodes
+# --------------------------------------------------------------------
+# Konstanten und reine Math-/Adapter-Nodes, deren Inputs nur von solchen Nodes kommen
+# (oder unverlinkt sind), liefern jeden Frame dasselbe. Sie werden beim Kompilieren
+# einmal ausgewertet; Slots dahinter lesen den Wert direkt.
+
+_CONST_NODES = {"IntConst", "FloatConst", "VectorConst", "RotationConst", "TranslationConst", "MatrixConst"}
+_PURE_NODES = _CONST_NODES | {
+    "IntMath", "FloatMath", "VectorMath", "MatrixMath",
+    "CombineXYZ", "SeparateXYZ", "ComposeMatrix", "DecomposeMatrix",
+}
+
+def is_pure_node(node):
+    """Liefert node bei gleichen Inputs jeden Frame dasselbe (Konstanten, Math, Expression ohne frame)?"""
+    if getattr(node, "bl_idname", "") in _PURE_NODES:
+        return True
+    # Nodes mit inhaltsabhängiger Reinheit (Expression ohne frame)
+    is_pure = getattr(node, "is_pure", None)
+    return bool(is_pure()) if callable(is_pure) else False
+
+def _is_terminal(node):
+    return getattr(node, "bl_idname", "") in _TERMINAL_NODES or getattr(node, "type", "") == "GROUP_OUTPUT"
+
+def _eliminate_dead_nodes(tree, plan):
+    """Slots von Nodes verwerfen, die zu keinem Terminal-Node (Transform/Property/Group/Output) führen."""
+    live = set()
+    stack = [n for n in tree.nodes if _is_terminal(n)]
+    while stack:
+        node = stack.pop()
+        node_ptr = node.as_pointer()
+        if node_ptr in live:
+            continue
+        live.add(node_ptr)
+        stack.extend(_upstream(node))
+
+    dead = {key for key in plan.slots if key[0] not in live}
+    for key in dead:
+        del plan.slots[key]
+    plan.dead_nodes = sum(1 for n in tree.nodes if n.as_pointer() not in live)
+
+def _snapshot(v):
+    # Vom Socket lösen und unveränderlich machen (Tupel); die Konverter erzeugen pro Read
+    # neue Vector/Matrix-Objekte, Konsumenten dürfen diese weiter in-place ändern.
+    if isinstance(v, (bool, int, float, str)) or v is None:
+        return v
+    try:
+        return tuple(_snapshot(x) for x in v)
+    except TypeError:
+        return v
+
+def _animated_nodes(tree, nodes):
+    """Pointer der Nodes, deren Properties/Socket-Werte per FCurve (Action des Trees) oder Driver laufen."""
+    ad = getattr(tree, "animation_data", None)
+    if ad is None:
+        return set()
+    paths = [fc.data_path for fc in getattr(ad, "drivers", ())]
+    action = getattr(ad, "action", None)
+    if action is not None:
+        paths.extend(fc.data_path for fc in helper_methoden._iter_action_fcurves(action))
+    if not paths:
+        return set()
+
+    # nodes["Name"] -> Pointer; der Pfad-Präfix endet am ersten passenden '"]'
+    prefixes = {}
+    for node_ptr, node in nodes.items():
+        try:
+            prefixes[node.path_from_id()] = node_ptr
+        except Exception:
+            pass
+    animated = set()
+    for path in paths:
+        i = path.find('"]')
+        while i >= 0:
+            node_ptr = prefixes.get(path[:i + 2])
+            if node_ptr is not None:
+                animated.add(node_ptr)
+                break
+            i = path.find('"]', i + 2)
+    return animated
+
+def _fold_constants(tree, plan):
+    nodes = {n.as_pointer(): n for n in tree.nodes}
+    const = {}   # node pointer -> bool
+    # Keyframes/Driver ändern Werte ohne Tree-Update: solche Nodes nie falten
+    animated = _animated_nodes(tree, nodes)
+
+    def is_const(node_ptr):
+        known = const.get(node_ptr)
+        if known is not None:
+            return known
+        const[node_ptr] = False   # Zyklen: nicht konstant
+        node = nodes[node_ptr]
+        ok = is_pure_node(node) and node_ptr not in animated
+        if ok:
+            for sock in node.inputs:
+                if not (sock.is_linked and sock.links):
+                    continue
+                from_node = sock.links[0].from_node
+                if (from_node.as_pointer(), node_ptr) in plan.cut_edges or not is_const(from_node.as_pointer()):
+                    ok = False
+                    break
+        const[node_ptr] = ok
+        return ok
+
+    folded = {}
+    for slot in plan.slots.values():
+        if slot.from_node is None or slot.cut:
+            continue
+        from_ptr = slot.from_key[0]
+        if from_ptr in nodes and is_const(from_ptr):
+            folded.setdefault(from_ptr, []).append(slot)
+
+    if not folded:
+        plan.folded_nodes = 0
+        return
+
+    # Einmal auswerten; Math-Nodes schreiben ihre Outputs (default_value) dabei selbst.
+    fold_ctx = SimpleNamespace(eval_cache=set(), pose_cache={}, touched_armatures=set(), values={})
+    begin_evaluation()
+    try:
+        for from_ptr in folded:
+            node = nodes[from_ptr]
+            try:
+                if hasattr(node, "eval_upstream"):
+                    node.eval_upstream(tree, None, fold_ctx)
+            except Exception:
+                continue
+            for slot in folded[from_ptr]:
+                v = fold_ctx.values.get(slot.from_key, _NO_VALUE)
+                if v is _NO_VALUE:
+                    v = getattr(slot.from_socket, "default_value", None)
+                slot.literal = _snapshot(v)
+                slot.folded = True
+    finally:
+        end_evaluation()
+
+    # Alle konstanten Nodes, die hinter gefalteten Slots liegen, werden nicht mehr ausgewertet.
+    plan.folded_nodes = sum(1 for ok in const.values() if ok)
+
+# --------------------------------------------------------------------
+# math chain fusion
+# --------------------------------------------------------------------
+# Math-/Adapter-Nodes, deren Outputs nur in genau einen weiteren Math-/Adapter-Node
+# fließen, gehen in dessen Kette auf: der Root-Node rechnet die ganze Kette in einer
+# generierten Funktion (Nodes/mathematik/fusion.py), Zwischenwerte landen weder in
+# Sockets noch in ctx.values. Kompiliert wird beim ersten Auswerten (kernel False).
+
+_FUSIBLE_NODES = _PURE_NODES - _CONST_NODES
+
+class FusedChain:
+    __slots__ = ("root", "members", "kernel")
+
+    def __init__(self, root, members):
+        self.root = root
+        # Nodes der Kette in Auswertungsreihenfolge, Root zuletzt
+        self.members = members
+        self.kernel = False
+
+def _fusible(node, plan):
+    return getattr(node, "bl_idname", "") in _FUSIBLE_NODES and node.name not in plan.cycle_nodes
+
+def _single_consumer(node, links, plan):
+    """Einziger Math-Konsument von node, wenn alle Links dorthin gehen und dort live sind."""
+    consumer = links[0].to_node
+    consumer_ptr = consumer.as_pointer()
+    if not _fusible(consumer, plan):
+        return None
+    for l in links:
+        if l.is_muted or l.to_node.as_pointer() != consumer_ptr:
+            return None
+        slot = plan.slot(consumer_ptr, l.to_socket.name)
+        if slot is None or slot.cut or slot.folded or slot.socket.as_pointer() != l.to_socket.as_pointer():
+            return None
+    return consumer
+
+def _detect_fused_chains(tree, plan):
+    out_links = {}
+    for l in tree.links:
+        out_links.setdefault(l.from_node.as_pointer(), []).append(l)
+
+    nodes = {}
+    feeds = {}   # member pointer -> consumer pointer
+    for node in tree.nodes:
+        node_ptr = node.as_pointer()
+        nodes[node_ptr] = node
+        links = out_links.get(node_ptr)
+        if not links or not _fusible(node, plan):
+            continue
+        consumer = _single_consumer(node, links, plan)
+        if consumer is not None:
+            feeds[node_ptr] = consumer.as_pointer()
+
+    fed_by = {}
+    for member_ptr, consumer_ptr in feeds.items():
+        fed_by.setdefault(consumer_ptr, []).append(member_ptr)
+
+    def collect(node_ptr, out):
+        # Upstream zuerst: Reihenfolge = Auswertungsreihenfolge
+        for member_ptr in fed_by.get(node_ptr, ()):
+            collect(member_ptr, out)
+        out.append(nodes[node_ptr])
+
+    plan.fused_chains = {}
+    plan.fused_nodes = 0
+    for root_ptr in fed_by:
+        if root_ptr in feeds:
+            continue
+        members = []
+        collect(root_ptr, members)
+        plan.fused_chains[root_ptr] = FusedChain(nodes[root_ptr], members)
+        plan.fused_nodes += len(members) - 1
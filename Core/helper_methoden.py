@@ -5,7 +5,7 @@ from types import SimpleNamespace
 import re
 import bpy
 
-from . import sockets
+from . import sockets, dependency_index, eval_plan
 
 _TIMEKEY_CHANNEL_PATH = '["animgraph_time"]'
 _LEGACY_TIMEKEY_CHANNEL_PATHS = ('["timeKeys"]', '["time_keys"]')
@@ -19,6 +19,15 @@ _TIMEKEY_PROP_NAMES = (
     "timekeys",
 )
 
+# siehe action_input_revision()
+_ACTION_INPUT_REVISION = 0
+
+# Zeitlich begrenzte Nodes mit Start/Duration-Inputs und End-Output
+_SEGMENT_NODE_TYPES = {
+    "DefineBoneTransformNode", "DefineBoneSetTransformNode", "DefineBoneSetNoiseNode", "DefineBoneSetSpringNode",
+    "DefineBonePropertyNode",
+}
+
 def _pointer_uid(value):
     if value is None:
         return None
@@ -166,7 +175,14 @@ def _find_writable_fcurve_collection(action, context=None):
             return collection
     return None
 
+def action_input_revision():
+    """Zähler, der bei jeder Änderung eines Action-Inputs hochgezählt wird."""
+    return _ACTION_INPUT_REVISION
+
 def _on_action_input_changed(self, context):
+    global _ACTION_INPUT_REVISION
+    _ACTION_INPUT_REVISION += 1
+
     action = getattr(self, "id_data", None)
     tree = getattr(action, "animgraph_tree", None) if action else None
     if tree:
@@ -185,6 +201,7 @@ def _on_action_tree_changed(self, context):
             pass
         return
 
+    dependency_index.bind_action(self, tree)
     initialize_action_tree_binding(self, tree, context)
 
 def initialize_action_tree_binding(action, tree, context=None):
@@ -215,19 +232,24 @@ def _poll_armature_obj(self, obj):
 def _poll_animgraph_tree(self, tree):
     return tree is not None and getattr(tree, "bl_idname", "") == "AnimNodeTree"
 
+_SLOT_NO_ARMATURE_ITEMS = [("", "(select armature first)", "Pick an armature first.")]
+_SLOT_NO_BONES_ITEMS = [("", "(no bones)", "The selected armature has no bones.")]
+
 def _enum_slot_bones(self, context):
-    arm_obj = getattr(self, "bone_armature_obj", None)
+    return sockets.bone_enum_items(
+        getattr(self, "bone_armature_obj", None), _SLOT_NO_ARMATURE_ITEMS, _SLOT_NO_BONES_ITEMS
+    )
 
-    if not arm_obj or arm_obj.type != "ARMATURE" or not arm_obj.data:
-        return [("", "(select armature first)", "Pick an armature first.")]
+def _search_slot_bones(self, context, edit_text):
+    return sockets.search_bones(getattr(self, "bone_armature_obj", None), edit_text)
 
-    items = []
-    for bone in arm_obj.data.bones:
-        items.append((bone.name, bone.name, ""))
+def _get_slot_bone_search(self):
+    return self.bone_name or ""
 
-    if not items:
-        return [("", "(no bones)", "The selected armature has no bones.")]
-    return items
+def _set_slot_bone_search(self, value):
+    arm_obj = getattr(self, "bone_armature_obj", None)
+    if value and arm_obj and arm_obj.type == "ARMATURE" and arm_obj.data.bones.get(value) is not None:
+        self.bone_name = value
 
 def _on_slot_armature_changed(self, context):
     arm_obj = getattr(self, "bone_armature_obj", None)
@@ -1383,7 +1405,6 @@ def _timekey_eval_ctx(eval_state, current_tree, group_env):
             pose_cache={},
             touched_armatures=set(),
             values={},
-            eval_stack=set(),
         )
         eval_state.contexts[scope_key] = ctx
     return ctx
@@ -1503,7 +1524,7 @@ def _resolve_linked_socket_int(from_sock, node_cache, stack, group_env, group_st
         return _coerce_int_scalar(fallback, 0)
 
     node_type = getattr(node, "bl_idname", "")
-    if node_type in {"DefineBoneTransformNode", "DefineBonePropertyNode", "AnimNodeGroup"}:
+    if node_type in _SEGMENT_NODE_TYPES or node_type == "AnimNodeGroup":
         return _coerce_int_scalar(fallback, 0)
 
     eval_ctx = _timekey_eval_ctx(eval_state, current_tree, group_env)
@@ -1552,7 +1573,7 @@ def _resolve_int_input(sock, node_cache, stack, group_env=None, group_stack=None
 
         if (
             node
-            and getattr(node, "bl_idname", "") in {"DefineBoneTransformNode", "DefineBonePropertyNode"}
+            and getattr(node, "bl_idname", "") in _SEGMENT_NODE_TYPES
             and from_sock.name == "End"
         ):
             return _resolve_transform_end(
@@ -1613,6 +1634,22 @@ def _resolve_int_input(sock, node_cache, stack, group_env=None, group_stack=None
 
     return _coerce_int_scalar(getattr(sock, "default_value", 0), 0)
 
+def _segment_tail(node, node_cache, stack, group_env=None, group_stack=None, eval_state=None, current_tree=None):
+    """Bone-Set-Transform: letzter Bone startet (Anzahl - 1) * Offset Frames später."""
+    if getattr(node, "bl_idname", "") != "DefineBoneSetTransformNode":
+        return 0
+    offset = _resolve_int_input(
+        node.inputs.get("Offset"),
+        node_cache,
+        stack,
+        group_env=group_env,
+        group_stack=group_stack,
+        eval_state=eval_state,
+        current_tree=current_tree,
+    )
+    _arm, names = node.socket_bone_set("Bones")
+    return max(0, int(offset)) * max(0, len(names) - 1)
+
 def _resolve_transform_end(node, node_cache, stack, group_env=None, group_stack=None, eval_state=None, current_tree=None):
     cache_key = (_pointer_uid(node), _group_env_key(group_env))
     if cache_key in node_cache:
@@ -1640,7 +1677,15 @@ def _resolve_transform_end(node, node_cache, stack, group_env=None, group_stack=
             eval_state=eval_state,
             current_tree=current_tree,
         )
-        end_value = int(start + max(0, duration))
+        end_value = int(start + max(0, duration)) + _segment_tail(
+            node,
+            node_cache,
+            stack,
+            group_env=group_env,
+            group_stack=group_stack,
+            eval_state=eval_state,
+            current_tree=current_tree,
+        )
     finally:
         stack.discard(cache_key)
 
@@ -1661,7 +1706,7 @@ def _collect_tree_timekeys_recursive(tree, keys, node_cache, stack, tree_stack,
     try:
         for node in getattr(tree, "nodes", []):
             bl_idname = getattr(node, "bl_idname", "")
-            if bl_idname in {"DefineBoneTransformNode", "DefineBonePropertyNode"}:
+            if bl_idname in _SEGMENT_NODE_TYPES:
                 start = _resolve_int_input(
                     node.inputs.get("Start"),
                     node_cache,
@@ -1680,7 +1725,15 @@ def _collect_tree_timekeys_recursive(tree, keys, node_cache, stack, tree_stack,
                     eval_state=eval_state,
                     current_tree=tree,
                 )
-                end_value = int(start + max(0, duration))
+                end_value = int(start + max(0, duration)) + _segment_tail(
+                    node,
+                    node_cache,
+                    stack,
+                    group_env=group_env,
+                    group_stack=group_stack,
+                    eval_state=eval_state,
+                    current_tree=tree,
+                )
 
                 keys.add(int(start))
                 keys.add(int(end_value))
@@ -1718,19 +1771,125 @@ def collect_tree_timekeys(tree, scene=None):
     group_stack = set()
     eval_state = _new_timekey_eval_state(scene=scene)
 
-    _collect_tree_timekeys_recursive(
-        tree,
-        keys,
-        node_cache,
-        stack,
-        tree_stack,
-        group_env=None,
-        group_stack=group_stack,
-        eval_state=eval_state,
-    )
+    eval_plan.begin_evaluation()
+    try:
+        _collect_tree_timekeys_recursive(
+            tree,
+            keys,
+            node_cache,
+            stack,
+            tree_stack,
+            group_env=None,
+            group_stack=group_stack,
+            eval_state=eval_state,
+        )
+    finally:
+        eval_plan.end_evaluation()
 
     return sorted(keys)
 
+def collect_tree_segments(tree, scene=None):
+    """
+    [(node, start, end), ...] der Transform/Property-Nodes direkt in tree (ohne Group-Inhalte),
+    aufgelöst wie in collect_tree_timekeys. start/end sind None, wenn die Auflösung scheitert.
+    """
+    if tree is None:
+        return []
+
+    out = []
+    node_cache = {}
+    stack = set()
+    group_stack = set()
+    eval_state = _new_timekey_eval_state(scene=scene)
+
+    eval_plan.begin_evaluation()
+    try:
+        _collect_tree_segment_bounds(tree, out, node_cache, stack, group_stack, eval_state)
+    finally:
+        eval_plan.end_evaluation()
+    return out
+
+def _collect_tree_segment_bounds(tree, out, node_cache, stack, group_stack, eval_state):
+    for node in getattr(tree, "nodes", []):
+        if getattr(node, "bl_idname", "") not in _SEGMENT_NODE_TYPES:
+            continue
+        try:
+            start = _resolve_int_input(
+                node.inputs.get("Start"),
+                node_cache,
+                stack,
+                group_stack=group_stack,
+                eval_state=eval_state,
+                current_tree=tree,
+            )
+            duration = _resolve_int_input(
+                node.inputs.get("Duration"),
+                node_cache,
+                stack,
+                group_stack=group_stack,
+                eval_state=eval_state,
+                current_tree=tree,
+            )
+            tail = _segment_tail(
+                node,
+                node_cache,
+                stack,
+                group_stack=group_stack,
+                eval_state=eval_state,
+                current_tree=tree,
+            )
+        except Exception:
+            out.append((node, None, None))
+            continue
+        out.append((node, int(start), int(start + max(0, duration)) + tail))
+
+def collect_group_bounds(tree, scene=None):
+    """
+    [(group node, start, end), ...] der Group-Nodes direkt in tree: Hülle aller (auch verschachtelten)
+    Transform/Property-Segmente im Subtree. start/end sind None, wenn nicht auflösbar.
+    """
+    if tree is None:
+        return []
+
+    out = []
+    node_cache = {}
+    stack = set()
+    group_stack = set()
+    eval_state = _new_timekey_eval_state(scene=scene)
+
+    eval_plan.begin_evaluation()
+    try:
+        for node in getattr(tree, "nodes", []):
+            if getattr(node, "bl_idname", "") != "AnimNodeGroup":
+                continue
+            subtree = getattr(node, "node_tree", None)
+            if not subtree or getattr(subtree, "bl_idname", "") != "AnimNodeTree":
+                out.append((node, None, None))
+                continue
+
+            keys = set()
+            sub_env = {"group_node": node, "parent_env": None, "tree": tree}
+            try:
+                _collect_tree_timekeys_recursive(
+                    subtree,
+                    keys,
+                    node_cache,
+                    stack,
+                    {_pointer_uid(tree) or id(tree)},
+                    group_env=sub_env,
+                    group_stack=group_stack,
+                    eval_state=eval_state,
+                )
+            except Exception:
+                keys = set()
+            if keys:
+                out.append((node, min(keys), max(keys)))
+            else:
+                out.append((node, None, None))
+    finally:
+        eval_plan.end_evaluation()
+    return out
+
 def _write_action_timekey_channel(action, frames, context=None):
     if action is None:
         return
@@ -1833,9 +1992,7 @@ def sync_actions_for_tree(tree, context=None):
     if tree is None:
         return
 
-    for action in bpy.data.actions:
-        if getattr(action, "animgraph_tree", None) != tree:
-            continue
+    for action in dependency_index.actions_for_tree(tree):
         sync_action_inputs(action, tree)
         sync_action_timekeys_from_tree(action, tree, context=context)
 
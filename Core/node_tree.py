@@ -1,8 +1,9 @@
 # animation_graph/Core/node_tree.py
 
 import bpy
+from bpy.app.handlers import persistent, load_post
 
-from . import sockets
+from . import sockets, dependency_index, eval_plan, tree_hash, sync_scheduler
 from .helper_methoden import (
     _on_action_tree_changed,
     _poll_animgraph_tree,
@@ -12,12 +13,12 @@ from .helper_methoden import (
     interface_socket_type,
     iter_interface_sockets,
     socket_kind,
-    sync_actions_for_tree,
 )
 
 
 def register(): 
     for c in _CLASSES: bpy.utils.register_class(c)
+    if _on_load_post not in load_post: load_post.append(_on_load_post)
     bpy.types.Action.animgraph_tree = bpy.props.PointerProperty(
         name="Animation Graph",
         description="AnimGraph node tree used when this Action is active",
@@ -26,10 +27,106 @@ def register():
         update=_on_action_tree_changed,
     )
 def unregister(): 
+    if _on_load_post in load_post: load_post.remove(_on_load_post)
+    _LINK_STATES.clear()
+    sockets.clear_bone_set_cache()
+    sockets.clear_bone_items()
     if hasattr(bpy.types.Action, "animgraph_tree"):
         del bpy.types.Action.animgraph_tree
     for c in reversed(_CLASSES): bpy.utils.unregister_class(c)
 
+@persistent
+def _on_load_post(*_args):
+    _LINK_STATES.clear()
+    sockets.clear_bone_set_cache()
+    sockets.clear_bone_items()
+
+
+# --------------------------------------------------------------------
+# inkrementelle Link-Validierung
+# --------------------------------------------------------------------
+
+# tree pointer -> _LinkState
+_LINK_STATES = {}
+
+# So viele Links werden vom Ende her geprüft, bevor auf einen vollständigen Abgleich gewechselt wird.
+_TAIL_SCAN_LIMIT = 64
+
+class _LinkState:
+    __slots__ = ("fingerprint", "known")
+
+    def __init__(self):
+        self.fingerprint = None
+        # link pointer -> (from_socket pointer, to_socket pointer) bereits validierter Links
+        self.known = {}
+
+def _link_signature(l):
+    return (l.from_socket.as_pointer(), l.to_socket.as_pointer())
+
+def _links_fingerprint(links):
+    count = len(links)
+    if count == 0:
+        return (0, None, None)
+    tail = links[count - 1]
+    return (count, tail.as_pointer(), _link_signature(tail))
+
+def _is_known(known, l):
+    return known.get(l.as_pointer()) == _link_signature(l)
+
+def _adjacent_links(fresh):
+    # Node auf einen Link ziehen hängt den bestehenden Link in-place um; der umgehängte Link
+    # endet an einem Input des Nodes, von dem der neue Link ausgeht.
+    out = []
+    seen = set()
+    for l in fresh:
+        for node in (l.from_node, l.to_node):
+            ptr = node.as_pointer()
+            if ptr in seen:
+                continue
+            seen.add(ptr)
+            for sock in node.inputs:
+                if sock.is_linked:
+                    out.extend(sock.links)
+    return out
+
+def _links_to_validate(tree, state):
+    links = tree.links
+    count = len(links)
+    known = state.known
+
+    if not known:
+        return list(links)
+
+    # Blender hängt neue Links hinten an: vom Ende her bis zum ersten bekannten Link laufen.
+    fresh = []
+    stop = max(0, count - _TAIL_SCAN_LIMIT)
+    idx = count - 1
+    while idx >= stop:
+        l = links[idx]
+        if _is_known(known, l):
+            break
+        fresh.append(l)
+        idx -= 1
+    else:
+        if stop > 0:
+            # Viele neue Links (Import, Paste): vollständiger Abgleich
+            return [l for l in links if not _is_known(known, l)]
+
+    if not fresh:
+        return fresh
+
+    pending = {l.as_pointer(): l for l in fresh}
+    for l in _adjacent_links(fresh):
+        pending.setdefault(l.as_pointer(), l)
+    return list(pending.values())
+
+def _prune_known(state, links):
+    if len(state.known) <= 2 * len(links) + _TAIL_SCAN_LIMIT:
+        return
+    alive = {l.as_pointer() for l in links}
+    state.known = {ptr: sig for ptr, sig in state.known.items() if ptr in alive}
+
+
 class AnimNodeTree(bpy.types.NodeTree):
     """AnimGraph node tree."""
 
@@ -39,12 +136,28 @@ class AnimNodeTree(bpy.types.NodeTree):
     bl_description = "Wird verwendet um eine Amatur Pose abhängig vom Zeitpunkt zu definieren"
     bl_use_group_interface = True
 
+    @property
+    def content_hash(self):
+        """Hex-Digest über Nodes, Werte, Links, Interface und verschachtelte Groups."""
+        return tree_hash.content_hash(self)
+
     def update(self):
+        # Output-Writes der Auswertung (socket.default_value) landen ebenfalls hier; kein Edit.
+        if eval_plan.is_evaluating(): return
+
         # RigInput Node-Ausgänge aktualisieren (optional)
         for n in getattr(self, "nodes", []): self.update_node(n)
-        for l in getattr(self, "links", []): self.update_link(l)
-        try: sync_actions_for_tree(self)
-        except Exception: pass
+        self._validate_new_links()
+        eval_plan.invalidate(self)
+        dependency_index.refresh_tree_groups(self)
+        eval_plan.highlight_cycles(self)
+        # Rekursive Group-Verschachtelung wird in den Plänen der Parent-Trees erkannt.
+        for parent in dependency_index.ancestor_trees(self):
+            eval_plan.invalidate(parent)
+            eval_plan.highlight_cycles(parent)
+        tree_hash.tree_changed(self)
+        # Action-Sync gebündelt über Timer statt synchron bei jedem Edit
+        sync_scheduler.schedule_tree_sync(self)
 
     def update_node(self,n: bpy.types.Node): pass
 
@@ -56,6 +169,41 @@ class AnimNodeTree(bpy.types.NodeTree):
         if not is_valid:
             try: self.links.remove(l)
             except RuntimeError: pass
+        return is_valid
+
+    def _validate_new_links(self):
+        """
+        Nur Links prüfen, die seit dem letzten Update dazugekommen sind.
+        Unveränderter Fingerprint (Anzahl + letzter Link) -> gar nichts zu tun.
+        """
+        tree_ptr = self.as_pointer()
+        state = _LINK_STATES.get(tree_ptr)
+        if state is None:
+            state = _LINK_STATES[tree_ptr] = _LinkState()
+
+        links = self.links
+        try:
+            fingerprint = _links_fingerprint(links)
+            if fingerprint == state.fingerprint:
+                return
+
+            # Signaturen vorher sichern: entfernte Links dürfen danach nicht mehr angefasst werden.
+            pending = [(l, l.as_pointer(), _link_signature(l)) for l in _links_to_validate(self, state)]
+        except Exception:
+            state.known.clear()
+            pending = [(l, None, None) for l in links]
+
+        for l, ptr, sig in pending:
+            if self.update_link(l) and ptr is not None:
+                state.known[ptr] = sig
+            elif ptr is not None:
+                state.known.pop(ptr, None)
+
+        try:
+            _prune_known(state, links)
+            state.fingerprint = _links_fingerprint(links)
+        except Exception:
+            state.fingerprint = None
 
     def interface_update(self, context):
         # 1) IO-Nodes im *gleichen* Tree (das ist der Tree dessen Interface gerade geändert wurde)
@@ -66,31 +214,26 @@ class AnimNodeTree(bpy.types.NodeTree):
             elif n.bl_idname == "NodeGroupOutput":
                 try: n.sync_from_tree_interface()
                 except Exception: pass
+        eval_plan.invalidate(self)
+        tree_hash.tree_changed(self)
 
         # 2) Alle Group-Instanzen in *anderen* Trees, die diese node_tree benutzen
-        #    (sonst aktualisiert sich deine Group-Node im Parent-Tree nie)
-        for parent in bpy.data.node_groups:
-            if getattr(parent, "bl_idname", None) != "AnimNodeTree":
-                continue
-
-            touched = False
-            for node in parent.nodes:
-                if node.bl_idname == "AnimNodeGroup" and node.node_tree == self:
-                    try:
-                        node.sync_sockets_from_subtree()
-                        touched = True
-                    except Exception: pass
-
-            if touched:
-                try: parent.update_tag()   # UI/Depsgraph refresh
+        #    (über den Reverse-Index, statt alle node_groups zu scannen)
+        for parent, group_nodes in dependency_index.group_users(self):
+            for node in group_nodes:
+                try: node.sync_sockets_from_subtree()
                 except Exception: pass
+            try: parent.update_tag()   # UI/Depsgraph refresh
+            except Exception: pass
 
-        # 3) Action-Panel Inputs für alle Actions aktualisieren, die diesen Tree verwenden
-        try: sync_actions_for_tree(self)
-        except Exception: pass
+        # 3) Action-Panel Inputs/Timekeys für alle Actions aktualisieren, die diesen Tree
+        #    (auch verschachtelt) verwenden
+        sync_scheduler.schedule_tree_sync(self)
 
 
 _CLASSES = [
     AnimNodeTree,
-    sockets.NodeSocketBone
+    sockets.NodeSocketBone,
+    sockets.NodeSocketBoneSet,
+    sockets.ANIMGRAPH_OT_bone_set_from_selection,
 ]
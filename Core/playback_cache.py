@@ -0,0 +1,249 @@
+# animation_graph/Core/playback_cache.py
+
+from collections import OrderedDict
+
+import bpy
+from bpy.app.handlers import persistent, load_post, undo_post, redo_post
+from bpy.props import BoolProperty, IntProperty, StringProperty
+
+from . import pose_buffer, tree_hash
+from .helper_methoden import action_input_revision
+
+
+# frame key -> CachedFrame; LRU-Reihenfolge (zuletzt benutzt am Ende)
+_FRAMES = OrderedDict()
+_BYTES = 0
+
+# Sim-Daten zustandsbehafteter Nodes, die Cache-Treffer und Sprünge überdauern müssen
+# (Feder-Checkpoints, Ziele pro Frame): owner key -> dict; mit den Frames verworfen.
+_CHECKPOINTS = {}
+
+# Fehler des letzten Prefetch-Schritts (für das Cache-Panel), None nach Erfolg
+_PREFETCH_ERROR = None
+
+# grobe Python-Kosten pro Eintrag/Bone (Tupel, Strings) zusätzlich zu den Arrays
+_ENTRY_OVERHEAD = 256
+_BONE_OVERHEAD = 96
+
+
+def _on_settings_changed(self, context):
+    if not self.use_cache:
+        clear()
+        return
+    _evict(budget_bytes(self))
+
+
+class AnimGraphPlaybackSettings(bpy.types.PropertyGroup):
+    use_cache: BoolProperty(
+        name="Playback Cache",
+        description="Reuse evaluated poses when frames are visited again (e.g. looped playback)",
+        default=False,
+        update=_on_settings_changed,
+    )
+    budget_mb: IntProperty(
+        name="Memory Budget (MB)",
+        description="Least recently used frames are dropped above this size",
+        default=256,
+        min=1,
+        soft_max=4096,
+        update=_on_settings_changed,
+    )
+    use_prefetch: BoolProperty(
+        name="Prefetch",
+        description="Evaluate upcoming frames while Blender is idle during playback",
+        default=False,
+    )
+    prefetch_frames: IntProperty(
+        name="Prefetch Frames",
+        description="How many frames ahead of the playhead are evaluated",
+        default=24,
+        min=1,
+        soft_max=250,
+    )
+    use_disk_cache: BoolProperty(
+        name="Disk Cache",
+        description="Also store evaluated poses as memory-mapped files, shared across sessions and machines",
+        default=False,
+    )
+    disk_dir: StringProperty(
+        name="Cache Directory",
+        description="Directory for disk cache files (relative paths are relative to the .blend file)",
+        default="//animgraph_cache/",
+        subtype="DIR_PATH",
+    )
+
+
+def register():
+    bpy.utils.register_class(AnimGraphPlaybackSettings)
+    bpy.types.Scene.animgraph_playback = bpy.props.PointerProperty(type=AnimGraphPlaybackSettings)
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded not in h: h.append(_on_data_reloaded)
+
+def unregister():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded in h: h.remove(_on_data_reloaded)
+    clear()
+    if hasattr(bpy.types.Scene, "animgraph_playback"):
+        del bpy.types.Scene.animgraph_playback
+    bpy.utils.unregister_class(AnimGraphPlaybackSettings)
+
+
+@persistent
+def _on_data_reloaded(*_args):
+    global _PREFETCH_ERROR
+    # Einträge halten Armature-Referenzen und Pointer-Keys.
+    clear()
+    _PREFETCH_ERROR = None
+
+
+# --------------------------------------------------------------------
+# settings
+# --------------------------------------------------------------------
+
+def settings(scene):
+    return getattr(scene, "animgraph_playback", None)
+
+def enabled(scene):
+    s = settings(scene)
+    return bool(s is not None and s.use_cache)
+
+def prefetch_enabled(scene):
+    s = settings(scene)
+    return bool(s is not None and s.use_cache and s.use_prefetch)
+
+def prefetch_error():
+    return _PREFETCH_ERROR
+
+def note_prefetch_error(error):
+    global _PREFETCH_ERROR
+    _PREFETCH_ERROR = error
+
+def budget_bytes(s):
+    return int(getattr(s, "budget_mb", 256)) * 1024 * 1024
+
+
+# --------------------------------------------------------------------
+# invalidation
+# --------------------------------------------------------------------
+
+def stats():
+    return len(_FRAMES), _BYTES
+
+def clear():
+    global _BYTES
+    _FRAMES.clear()
+    _CHECKPOINTS.clear()
+    _BYTES = 0
+
+def discard(keys):
+    _drop(keys)
+
+def _drop(keys):
+    global _BYTES
+    for key in keys:
+        entry = _FRAMES.pop(key, None)
+        if entry is not None:
+            _BYTES -= entry.nbytes
+
+
+# --------------------------------------------------------------------
+# frames
+# --------------------------------------------------------------------
+
+class CachedFrame:
+    """
+    Endpose eines Frames: pro Armature Bone-Namen, Rotation-Modes und (N, 10)-Array [loc, rot, scale].
+    state: Node-Zustand nach dem Frame (vom Aufrufer kopiert), None aus dem Disk-Cache.
+    """
+
+    __slots__ = ("armatures", "state", "nbytes")
+
+    def __init__(self, armatures, state=None):
+        self.armatures = armatures
+        self.state = state
+        self.nbytes = _ENTRY_OVERHEAD + _state_bytes(state) + sum(
+            arr.nbytes + _BONE_OVERHEAD * len(names) for _arm, names, _modes, arr in armatures
+        )
+
+
+def _state_bytes(value):
+    # grob: Arrays mit ihrer Größe, alles andere pauschal
+    if isinstance(value, dict):
+        return sum(_ENTRY_OVERHEAD + _state_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return sum(_state_bytes(v) for v in value)
+    return getattr(value, "nbytes", _BONE_OVERHEAD)
+
+
+def frame_key(scene, trees):
+    """trees: [(tree, action), ...] der aktiven Actions in der Szene."""
+    return (
+        scene.as_pointer(),
+        int(scene.frame_current),
+        action_input_revision(),
+        tuple(
+            (tree_hash.content_hash(tree), action.as_pointer())
+            for tree, action in trees
+        ),
+    )
+
+def insert(key, entry, scene):
+    """Fertigen Eintrag (z. B. aus dem Disk-Cache) ablegen."""
+    global _BYTES
+    _drop([key])
+    _FRAMES[key] = entry
+    _BYTES += entry.nbytes
+    _evict(budget_bytes(settings(scene)))
+
+def contains(key):
+    return key in _FRAMES
+
+def lookup(key):
+    entry = _FRAMES.get(key)
+    if entry is not None:
+        _FRAMES.move_to_end(key)
+    return entry
+
+def store_current_frame(key, scene, state=None):
+    """
+    Volle Pose der beschriebenen Armatures (pose_buffer) und den Node-Zustand nach dem Frame
+    unter key ablegen; liefert den Eintrag.
+    """
+    if not pose_buffer.frame_is_pose_only():
+        return None
+
+    entry = CachedFrame(pose_buffer.frame_pose(), state)
+    insert(key, entry, scene)
+    return entry
+
+def checkpoints(owner):
+    """Checkpoint-Speicher eines Nodes (vom Node befüllt, auch ohne aktiven Playback-Cache)."""
+    store = _CHECKPOINTS.get(owner)
+    if store is None:
+        store = _CHECKPOINTS[owner] = {}
+    return store
+
+def _evict(budget):
+    global _BYTES
+    while _BYTES > budget and _FRAMES:
+        _key, entry = _FRAMES.popitem(last=False)
+        _BYTES -= entry.nbytes
+
+def apply(entry):
+    """Gecachte Pose schreiben; liefert die Armatures, deren Pose sich dabei geändert hat."""
+    touched = []
+    for arm_ob, names, modes, arr in entry.armatures:
+        bones = arm_ob.pose.bones
+        pbones, rot_modes, locs, rots, scales = [], [], [], [], []
+        for name, mode, row in zip(names, modes, arr.tolist()):
+            pbone = bones.get(name)
+            if pbone is None:
+                continue
+            pbones.append(pbone)
+            rot_modes.append(mode)
+            locs.append(row[0:3])
+            rots.append(row[3:7] if mode == "QUATERNION" else row[3:6])
+            scales.append(row[7:10])
+        if pose_buffer.write_transforms(arm_ob, pbones, rot_modes, locs, rots, scales):
+            touched.append(arm_ob)
+    return touched
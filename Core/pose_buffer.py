@@ -0,0 +1,548 @@
+# animation_graph/Core/pose_buffer.py
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent, load_post, undo_post, redo_post
+
+from . import sockets
+from .helper_methoden import _collect_bone_fcurves
+
+
+# Zuletzt von der Auswertung geschriebene Pose-Kanäle:
+# armature pointer -> {bone name: [rotation_mode, loc x3, rot x4, scale x3]}
+_LAST = {}
+
+# armature pointer -> (action pointer, Bone-Namen mit FCurves | None = alle animiert)
+_ANIMATED = {}
+
+# Armatures, die wir selbst getaggt haben; deren nächstes Depsgraph-Update ist kein Fremd-Edit.
+_SELF_TAGGED = set()
+
+# Im laufenden Frame geschriebene Bones: armature pointer -> (armature, {bone name: None})
+_FRAME_WRITES = {}
+# Armatures, die die Auswertung seit dem letzten Invalidieren beschrieben hat: armature pointer -> armature
+_ARMATURES = {}
+# False, sobald im laufenden Frame etwas außerhalb der Pose-Kanäle geschrieben wurde (Bone-Properties)
+_FRAME_POSE_ONLY = True
+
+# Prefetch (Auswertung zukünftiger Frames): Originalwerte der dabei beschriebenen Bones,
+# armature pointer -> (armature, {bone name: (RNA-Werte, Puffer)}); None = kein Prefetch aktiv.
+_CAPTURE = None
+_CAPTURE_EXACT = True
+_CAPTURE_FRAME_STATE = None
+# Armatures, deren Depsgraph-Update vom Zurücksetzen nach einem Prefetch stammt
+_PREFETCH_TAGGED = set()
+
+_NO_BONES = frozenset()
+
+# armature pointer -> (Anzahl Pose-Bones, {bone name: Index in pose.bones}) für foreach_set
+_BONE_INDEX = {}
+
+# Ab so vielen geänderten Bones pro Kanal wird per foreach_set geschrieben
+_BULK_MIN = 8
+
+_CHANNEL_WIDTH = {"location": 3, "rotation_quaternion": 4, "rotation_euler": 3, "scale": 3}
+
+# (armature pointer, bone name) -> BoneHandle
+_HANDLES = {}
+# Zähler für BoneHandle: erhöht bei Änderungen an Armature-Daten (Bone umbenannt/hinzugefügt/
+# entfernt), an Collections (Objekt gelöscht) sowie bei Load/Undo; Handles lösen sich dann neu auf.
+_GENERATION = 0
+
+# Slots im Puffer
+_MODE, _LOC, _ROT, _SCALE = 0, 1, 4, 8
+
+
+def register():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded not in h: h.append(_on_data_reloaded)
+
+def unregister():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded in h: h.remove(_on_data_reloaded)
+    invalidate()
+
+
+@persistent
+def _on_data_reloaded(*_args):
+    invalidate()
+
+def invalidate(arm_ob=None):
+    global _GENERATION
+    _GENERATION += 1
+    if arm_ob is None:
+        _HANDLES.clear()
+        _LAST.clear()
+        _ARMATURES.clear()
+        _ANIMATED.clear()
+        _SELF_TAGGED.clear()
+        _PREFETCH_TAGGED.clear()
+        _BONE_INDEX.clear()
+        return
+    try:
+        arm_ptr = arm_ob.as_pointer()
+    except Exception:
+        return
+    _LAST.pop(arm_ptr, None)
+    _ARMATURES.pop(arm_ptr, None)
+    _ANIMATED.pop(arm_ptr, None)
+    _BONE_INDEX.pop(arm_ptr, None)
+
+
+# --------------------------------------------------------------------
+# FCurve-animierte Bones
+# --------------------------------------------------------------------
+# Die Action-Auswertung überschreibt diese Bones vor frame_change_post; der
+# Vergleich mit dem Vorframe-Puffer wäre dort falsch, sie werden immer geschrieben.
+
+def _animated_bones(arm_ob):
+    ad = getattr(arm_ob, "animation_data", None)
+    if ad is None:
+        return _NO_BONES
+
+    for track in getattr(ad, "nla_tracks", ()):
+        if not getattr(track, "mute", False) and len(track.strips):
+            return None
+
+    action = getattr(ad, "action", None)
+    if action is None:
+        return _NO_BONES
+
+    arm_ptr = arm_ob.as_pointer()
+    action_ptr = action.as_pointer()
+    cached = _ANIMATED.get(arm_ptr)
+    if cached is not None and cached[0] == action_ptr:
+        return cached[1]
+
+    try:
+        bones = frozenset(_collect_bone_fcurves(action).keys())
+    except Exception:
+        bones = None
+    _ANIMATED[arm_ptr] = (action_ptr, bones)
+    return bones
+
+def has_animated_bones(arm_ob):
+    """True, wenn FCurves/NLA Bones dieser Armature vor frame_change_post setzen."""
+    return _animated_bones(arm_ob) != _NO_BONES
+
+
+# --------------------------------------------------------------------
+# writes
+# --------------------------------------------------------------------
+
+def _same(buf, i, values, n):
+    for k in range(n):
+        if buf[i + k] != values[k]:
+            return False
+    return True
+
+def _store(buf, i, values, n):
+    for k in range(n):
+        buf[i + k] = values[k]
+
+def _set_channel(pbone, channel, value):
+    setattr(pbone, channel, value)
+
+def _write_channels(arm_ob, arm_ptr, pbone, loc, rot_mode, rot, scale, sink):
+    bone_name = pbone.name
+    bones = _animated_bones(arm_ob)
+    animated = bones is None or bone_name in bones
+
+    if _CAPTURE is not None:
+        _capture_original(arm_ob, arm_ptr, pbone, animated)
+
+    writes = _FRAME_WRITES.get(arm_ptr)
+    if writes is None:
+        writes = _FRAME_WRITES[arm_ptr] = (arm_ob, {})
+        _ARMATURES[arm_ptr] = arm_ob
+    writes[1][bone_name] = None
+
+    per_arm = _LAST.get(arm_ptr)
+    if per_arm is None:
+        per_arm = _LAST[arm_ptr] = {}
+
+    buf = per_arm.get(bone_name)
+    fresh = buf is None or animated
+    if buf is None:
+        buf = per_arm[bone_name] = [None] + [0.0] * 10
+
+    is_quat = (rot_mode == "QUATERNION")
+    n_rot = 4 if is_quat else 3
+    changed = False
+
+    if fresh or buf[_MODE] != rot_mode:
+        if pbone.rotation_mode != rot_mode:
+            pbone.rotation_mode = rot_mode
+        buf[_MODE] = rot_mode
+        fresh = True
+        changed = True
+
+    if fresh or not _same(buf, _LOC, loc, 3):
+        sink(pbone, "location", loc)
+        _store(buf, _LOC, loc, 3)
+        changed = True
+
+    if fresh or not _same(buf, _ROT, rot, n_rot):
+        sink(pbone, "rotation_quaternion" if is_quat else "rotation_euler", rot)
+        _store(buf, _ROT, rot, n_rot)
+        changed = True
+
+    if fresh or not _same(buf, _SCALE, scale, 3):
+        sink(pbone, "scale", scale)
+        _store(buf, _SCALE, scale, 3)
+        changed = True
+
+    return changed
+
+def write_transform(arm_ob, pbone, loc, rot_mode, rot, scale):
+    """
+    Location/Rotation/Scale eines Pose-Bones schreiben, aber nur Kanäle, die sich seit dem
+    letzten Schreiben geändert haben. rot ist ein Quaternion bei rot_mode == "QUATERNION",
+    sonst ein Euler. True, wenn etwas geschrieben wurde (-> Armature taggen).
+    """
+    return _write_channels(arm_ob, arm_ob.as_pointer(), pbone, loc, rot_mode, rot, scale, _set_channel)
+
+def write_transforms(arm_ob, pbones, rot_modes, locs, rots, scales):
+    """
+    write_transform für viele Bones einer Armature. Geänderte Kanäle werden gesammelt und
+    ab _BULK_MIN Bones per foreach_get/foreach_set in einem Aufruf pro Kanal geschrieben.
+    """
+    arm_ptr = arm_ob.as_pointer()
+    pending = {}
+
+    def sink(pbone, channel, value):
+        pending.setdefault(channel, []).append((pbone, value))
+
+    changed = False
+    for pbone, rot_mode, loc, rot, scale in zip(pbones, rot_modes, locs, rots, scales):
+        if _write_channels(arm_ob, arm_ptr, pbone, loc, rot_mode, rot, scale, sink):
+            changed = True
+
+    for channel, rows in pending.items():
+        _flush_channel(arm_ob, arm_ptr, channel, rows)
+    return changed
+
+def frame_value(arm_ob, pbone):
+    """
+    (rot_mode, loc, rot, scale) eines Bones, falls er in diesem Frame schon gesetzt wurde:
+    von einem Node (letzter Wert im Puffer) oder per FCurve/NLA (Pose-Kanäle). Sonst None.
+    """
+    arm_ptr = arm_ob.as_pointer()
+    name = pbone.name
+    writes = _FRAME_WRITES.get(arm_ptr)
+    if writes is not None and name in writes[1]:
+        buf = _LAST.get(arm_ptr, {}).get(name)
+        if buf is not None:
+            n_rot = 4 if buf[_MODE] == "QUATERNION" else 3
+            return (
+                buf[_MODE],
+                tuple(buf[_LOC:_LOC + 3]),
+                tuple(buf[_ROT:_ROT + n_rot]),
+                tuple(buf[_SCALE:_SCALE + 3]),
+            )
+
+    bones = _animated_bones(arm_ob)
+    if bones is None or name in bones:
+        return read_transform(pbone)
+    return None
+
+def read_transform(pbone):
+    """(rot_mode, loc, rot, scale) der aktuellen Pose-Kanäle."""
+    rot_mode = pbone.rotation_mode
+    rot = pbone.rotation_quaternion if rot_mode == "QUATERNION" else pbone.rotation_euler
+    return (rot_mode, tuple(pbone.location), tuple(rot), tuple(pbone.scale))
+
+def _bone_index(arm_ptr, pose_bones, rebuild=False):
+    cached = _BONE_INDEX.get(arm_ptr)
+    if rebuild or cached is None or cached[0] != len(pose_bones):
+        cached = _BONE_INDEX[arm_ptr] = (len(pose_bones), {b.name: i for i, b in enumerate(pose_bones)})
+    return cached[1]
+
+
+# --------------------------------------------------------------------
+# bone handles
+# --------------------------------------------------------------------
+# Statt pose.bones.get(name) pro Frame: einmal aufgelöster PoseBone plus Index in
+# pose.bones (für foreach_get/foreach_set), gültig bis zur nächsten Generation.
+
+class BoneHandle:
+    __slots__ = ("arm_ob", "bone_name", "index", "pbone", "generation")
+
+    def __init__(self, arm_ob, bone_name):
+        self.arm_ob = arm_ob
+        self.bone_name = bone_name
+        self.index = -1
+        self.pbone = None
+        self.generation = -1
+
+    def resolve(self):
+        """PoseBone des Handles oder None."""
+        if self.generation == _GENERATION:
+            return self.pbone
+
+        self.generation = _GENERATION
+        self.index = -1
+        self.pbone = None
+        arm_ob = self.arm_ob
+        try:
+            if not self.bone_name or getattr(arm_ob, "type", "") != "ARMATURE" or arm_ob.pose is None:
+                return None
+            pose_bones = arm_ob.pose.bones
+            pbone = pose_bones.get(self.bone_name)
+            if pbone is not None:
+                arm_ptr = arm_ob.as_pointer()
+                idx = _bone_index(arm_ptr, pose_bones).get(self.bone_name)
+                if idx is None:
+                    idx = _bone_index(arm_ptr, pose_bones, rebuild=True).get(self.bone_name, -1)
+                self.index = idx
+                self.pbone = pbone
+        except ReferenceError:
+            # Armature gelöscht
+            self.arm_ob = None
+        return self.pbone
+
+def bone_handle(arm_ob, bone_name):
+    """Geteilter Handle für (Armature, Bone-Name); None ohne Armature oder Bone."""
+    if arm_ob is None or not bone_name:
+        return None
+    try:
+        key = (arm_ob.as_pointer(), bone_name)
+    except ReferenceError:
+        return None
+    handle = _HANDLES.get(key)
+    if handle is None:
+        handle = _HANDLES[key] = BoneHandle(arm_ob, bone_name)
+    return handle
+
+def _flush_channel(arm_ob, arm_ptr, channel, rows):
+    if len(rows) < _BULK_MIN:
+        for pbone, value in rows:
+            setattr(pbone, channel, value)
+        return
+
+    pose_bones = arm_ob.pose.bones
+    try:
+        index = _bone_index(arm_ptr, pose_bones)
+        try:
+            idx = [index[pbone.name] for pbone, _value in rows]
+        except KeyError:
+            # Bone umbenannt
+            index = _bone_index(arm_ptr, pose_bones, rebuild=True)
+            idx = [index[pbone.name] for pbone, _value in rows]
+
+        width = _CHANNEL_WIDTH[channel]
+        flat = np.empty(len(pose_bones) * width, dtype=np.float32)
+        pose_bones.foreach_get(channel, flat)
+        flat.reshape(-1, width)[idx] = [tuple(value)[:width] for _pbone, value in rows]
+        pose_bones.foreach_set(channel, flat)
+    except Exception:
+        for pbone, value in rows:
+            setattr(pbone, channel, value)
+
+
+# --------------------------------------------------------------------
+# frame bookkeeping / depsgraph tags
+# --------------------------------------------------------------------
+
+def begin_frame():
+    global _FRAME_POSE_ONLY
+    if _CAPTURE is None:
+        _SELF_TAGGED.clear()
+    _FRAME_WRITES.clear()
+    _FRAME_POSE_ONLY = True
+
+def note_property_write():
+    """Bone-Property-Nodes: der Frame ist nicht allein durch Pose-Kanäle beschrieben."""
+    global _FRAME_POSE_ONLY
+    _FRAME_POSE_ONLY = False
+
+def frame_is_pose_only():
+    return _FRAME_POSE_ONLY
+
+def frame_writes():
+    """[(armature, bone names, rotation modes, [[loc x3, rot x4, scale x3], ...]), ...] des laufenden Frames."""
+    out = []
+    for arm_ptr, (arm_ob, names) in _FRAME_WRITES.items():
+        per_arm = _LAST.get(arm_ptr)
+        if per_arm is None:
+            continue
+        bone_names = []
+        modes = []
+        rows = []
+        for name in names:
+            buf = per_arm.get(name)
+            if buf is None:
+                continue
+            bone_names.append(name)
+            modes.append(buf[_MODE])
+            rows.append(buf[_LOC:])
+        out.append((arm_ob, tuple(bone_names), tuple(modes), rows))
+    return out
+
+def frame_pose():
+    """
+    [(armature, bone names, rotation modes, (N, 10)-Array [loc, rot, scale]), ...]: volle Pose
+    aller Armatures, die die Auswertung beschrieben hat, nicht nur der Bones dieses Frames.
+    Bones mit FCurves setzt Blender selbst; sie fehlen, wenn sie in diesem Frame nicht geschrieben wurden.
+    """
+    out = []
+    for arm_ptr, arm_ob in list(_ARMATURES.items()):
+        try:
+            pose_bones = arm_ob.pose.bones
+        except Exception:
+            _ARMATURES.pop(arm_ptr, None)
+            continue
+        n = len(pose_bones)
+        loc = np.empty(n * 3, dtype=np.float64)
+        quat = np.empty(n * 4, dtype=np.float64)
+        euler = np.empty(n * 3, dtype=np.float64)
+        scale = np.empty(n * 3, dtype=np.float64)
+        pose_bones.foreach_get("location", loc)
+        pose_bones.foreach_get("rotation_quaternion", quat)
+        pose_bones.foreach_get("rotation_euler", euler)
+        pose_bones.foreach_get("scale", scale)
+
+        written = _FRAME_WRITES.get(arm_ptr, (None, _NO_BONES))[1]
+        animated = _animated_bones(arm_ob)
+        names = []
+        modes = []
+        idx = []
+        for i, pbone in enumerate(pose_bones):
+            name = pbone.name
+            if name not in written and (animated is None or name in animated):
+                continue
+            names.append(name)
+            modes.append(pbone.rotation_mode)
+            idx.append(i)
+
+        arr = np.zeros((len(idx), 10), dtype=np.float64)
+        if idx:
+            arr[:, 0:3] = loc.reshape(n, 3)[idx]
+            arr[:, 7:10] = scale.reshape(n, 3)[idx]
+            is_quat = np.array([m == "QUATERNION" for m in modes])
+            arr[is_quat, 3:7] = quat.reshape(n, 4)[idx][is_quat]
+            arr[~is_quat, 3:6] = euler.reshape(n, 3)[idx][~is_quat]
+        out.append((arm_ob, tuple(names), tuple(modes), arr))
+    return out
+
+def tag_armature(arm_ob):
+    try:
+        arm_ob.update_tag(refresh={"DATA"})
+        _SELF_TAGGED.add(arm_ob.as_pointer())
+    except Exception:
+        pass
+
+def note_depsgraph_updates(depsgraph):
+    """
+    Fremde Änderungen (Pose-Edit, neue Keys, ...) verwerfen den Puffer der Armature.
+    True, wenn solche Änderungen dabei waren.
+    """
+    if depsgraph is None:
+        return False
+
+    global _GENERATION
+    foreign = False
+    for update in getattr(depsgraph, "updates", ()):
+        id_data = getattr(update.id, "original", None) or update.id
+
+        if isinstance(id_data, (bpy.types.Armature, bpy.types.Collection)):
+            # Bones umbenannt/hinzugefügt/entfernt, Objekte gelöscht: Handles neu auflösen
+            _GENERATION += 1
+            _BONE_INDEX.clear()
+            if isinstance(id_data, bpy.types.Armature):
+                sockets.note_bone_items_changed(id_data)
+            continue
+        if isinstance(id_data, bpy.types.Action):
+            _ANIMATED.clear()
+            foreign = True
+            continue
+        if not isinstance(id_data, bpy.types.Object) or id_data.type != "ARMATURE":
+            continue
+
+        arm_ptr = id_data.as_pointer()
+        if arm_ptr in _PREFETCH_TAGGED:
+            _PREFETCH_TAGGED.discard(arm_ptr)
+            continue
+        if arm_ptr in _SELF_TAGGED:
+            _SELF_TAGGED.discard(arm_ptr)
+            continue
+        _LAST.pop(arm_ptr, None)
+        _ANIMATED.pop(arm_ptr, None)
+        foreign = True
+    return foreign
+
+
+# --------------------------------------------------------------------
+# prefetch capture
+# --------------------------------------------------------------------
+# Prefetch schreibt zukünftige Frames in die echten Pose-Bones (Nodes lesen dort Start-
+# und Read-Posen), ohne Tag. end_capture stellt die vorher sichtbare Pose wieder her.
+
+def _capture_original(arm_ob, arm_ptr, pbone, animated):
+    global _CAPTURE_EXACT
+    if animated:
+        # FCurve-Werte des Ziel-Frames sind hier nicht ausgewertet
+        _CAPTURE_EXACT = False
+
+    per_arm = _CAPTURE.get(arm_ptr)
+    if per_arm is None:
+        per_arm = _CAPTURE[arm_ptr] = (arm_ob, {})
+    if pbone.name in per_arm[1]:
+        return
+
+    rna = (
+        pbone.rotation_mode,
+        tuple(pbone.location),
+        tuple(pbone.rotation_quaternion),
+        tuple(pbone.rotation_euler),
+        tuple(pbone.scale),
+    )
+    buf = _LAST.get(arm_ptr, {}).get(pbone.name)
+    per_arm[1][pbone.name] = (rna, None if buf is None else list(buf))
+
+def begin_capture():
+    global _CAPTURE, _CAPTURE_EXACT, _CAPTURE_FRAME_STATE
+    _CAPTURE = {}
+    _CAPTURE_EXACT = True
+    _CAPTURE_FRAME_STATE = (dict(_FRAME_WRITES), _FRAME_POSE_ONLY)
+
+def end_capture():
+    """Beschriebene Bones auf ihre Werte vor begin_capture zurücksetzen. True, wenn das Ergebnis exakt war."""
+    global _CAPTURE, _FRAME_POSE_ONLY, _CAPTURE_FRAME_STATE
+    captured = _CAPTURE or {}
+    _CAPTURE = None
+
+    for arm_ptr, (arm_ob, bones) in captured.items():
+        per_arm = _LAST.get(arm_ptr)
+        try:
+            pose_bones = arm_ob.pose.bones
+        except Exception:
+            continue
+        for name, (rna, buf) in bones.items():
+            pbone = pose_bones.get(name)
+            if pbone is None:
+                continue
+            mode, loc, rot_q, rot_e, scale = rna
+            if pbone.rotation_mode != mode:
+                pbone.rotation_mode = mode
+            pbone.location = loc
+            pbone.rotation_quaternion = rot_q
+            pbone.rotation_euler = rot_e
+            pbone.scale = scale
+            if per_arm is not None:
+                if buf is None:
+                    per_arm.pop(name, None)
+                else:
+                    per_arm[name] = buf
+        _PREFETCH_TAGGED.add(arm_ptr)
+
+    if _CAPTURE_FRAME_STATE is not None:
+        writes, pose_only = _CAPTURE_FRAME_STATE
+        _FRAME_WRITES.clear()
+        _FRAME_WRITES.update(writes)
+        _FRAME_POSE_ONLY = pose_only
+        _CAPTURE_FRAME_STATE = None
+    return _CAPTURE_EXACT
+
+def capturing():
+    return _CAPTURE is not None
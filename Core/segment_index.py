@@ -0,0 +1,421 @@
+# animation_graph/Core/segment_index.py
+
+from bisect import bisect_left
+
+from bpy.app.handlers import persistent, load_post, undo_post, redo_post
+
+from . import eval_plan
+from .helper_methoden import collect_tree_segments, collect_group_bounds, action_input_revision
+
+
+# Tick-Reihenfolge wie bisher in _evaluate_tree: erst alle Transform-, dann alle Property-Nodes.
+# Noise und Spring liegen über den Transform-Nodes desselben Frames.
+_SEGMENT_NODES = (
+    "DefineBoneTransformNode", "DefineBoneSetTransformNode", "DefineBoneSetNoiseNode", "DefineBoneSetSpringNode",
+    "DefineBonePropertyNode",
+)
+
+# Nodes, die nach dem Ende ihre Endpose halten
+_HOLD_NODES = ("DefineBoneTransformNode", "DefineBoneSetTransformNode")
+
+# Frames pro Bucket im Zeitindex
+_BUCKET = 32
+
+# Start/End werden wie in collect_tree_timekeys gerundet, die Nodes selbst schneiden
+# Float-Inputs per int() ab. Ein Frame Rand deckt die Abweichung ab (Nodes prüfen exakt).
+_PAD = 1
+
+# (tree pointer, action pointer) -> SegmentIndex
+_INDEXES = {}
+
+
+def register():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded not in h: h.append(_on_data_reloaded)
+
+def unregister():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded in h: h.remove(_on_data_reloaded)
+    _INDEXES.clear()
+
+
+@persistent
+def _on_data_reloaded(*_args):
+    _INDEXES.clear()
+
+
+class Segment:
+    """Ein zeitlich begrenzter Node (Transform/Property) eines Trees mit aufgelöstem [start, end]."""
+
+    __slots__ = ("node", "order", "start", "end", "end_value", "holds", "bone_key", "exact", "deps")
+
+    def __init__(self, node, order, start, end):
+        self.node = node
+        self.order = order
+        self.end_value = end
+        # gepolstert; None = nicht auflösbar -> jeden Frame ticken
+        self.start = None if start is None else start - _PAD
+        self.end = None if end is None else end + _PAD
+        # Transform-Nodes halten nach dem Ende ihre Endpose, Property-Nodes stellen einmal zurück.
+        self.holds = (getattr(node, "bl_idname", "") in _HOLD_NODES)
+        self.bone_key = _bone_key(node)
+        self.exact = _has_exact_bounds(node)
+        self.deps = []
+
+
+class GroupSegment:
+    """Group-Node mit Seiteneffekten und der Hülle [start, end] aller Segmente im Subtree."""
+
+    __slots__ = ("node", "start", "end", "holds", "live")
+
+    def __init__(self, node, start, end, holds):
+        self.node = node
+        self.start = None if start is None else start - _PAD
+        self.end = None if end is None else end + _PAD
+        # Enthält der Subtree Transform-Nodes, muss die Group nach dem Ende weiter ticken (Haltepose).
+        self.holds = holds
+        # seit dem Start getickt, verschachtelte Nodes halten ggf. Zustand
+        self.live = False
+
+
+class SegmentIndex:
+    """
+    Zeitindex der Segmente eines Trees: Buckets fester Breite für aktive Segmente plus
+    pro Bone nach End sortierte Arrays für die Haltepose.
+    """
+
+    __slots__ = ("plan", "revision", "always", "buckets", "holds", "groups",
+                 "live_holds", "live_props", "last_frame")
+
+    def __init__(self, plan, revision, segments, groups):
+        self.plan = plan
+        self.revision = revision
+        self.groups = groups
+        self.always = []
+        # bucket -> [Segment]
+        self.buckets = {}
+        # bone key -> (sortierte Ends, jeweils nach Node-Reihenfolge letztes Segment bis dahin)
+        self.holds = {}
+
+        # Segmente, die seit ihrem Start getickt wurden und ggf. noch Zustand im pose_cache halten
+        self.live_holds = set()
+        self.live_props = set()
+        self.last_frame = None
+
+        per_bone = {}
+        for seg in segments:
+            if seg.start is None or (seg.holds and seg.bone_key is None):
+                self.always.append(seg)
+                continue
+
+            for b in range(seg.start // _BUCKET, seg.end // _BUCKET + 1):
+                self.buckets.setdefault(b, []).append(seg)
+
+            if seg.holds:
+                per_bone.setdefault(seg.bone_key, []).append(seg)
+
+        for bone_key, segs in per_bone.items():
+            segs.sort(key=lambda s: s.end)
+            ends = []
+            latest = []
+            best = None
+            for seg in segs:
+                if best is None or seg.order > best.order:
+                    best = seg
+                ends.append(seg.end)
+                latest.append(best)
+            self.holds[bone_key] = (ends, latest)
+
+    def adopt_live(self, old):
+        """Live-Zustand eines veralteten Index übernehmen (Segmente per Node-Pointer zuordnen)."""
+        if old is None:
+            return
+        by_ptr = {}
+        for segs in (self.always, *self.buckets.values()):
+            for seg in segs:
+                by_ptr[seg.node.as_pointer()] = seg
+
+        for old_set in (old.live_holds, old.live_props):
+            for seg in old_set:
+                try:
+                    new_seg = by_ptr.get(seg.node.as_pointer())
+                except Exception:
+                    continue
+                if new_seg is not None:
+                    (self.live_holds if new_seg.holds else self.live_props).add(new_seg)
+
+        live_groups = set()
+        for group in old.groups:
+            try:
+                if group.live:
+                    live_groups.add(group.node.as_pointer())
+            except Exception:
+                continue
+        for group in self.groups:
+            group.live = group.node.as_pointer() in live_groups
+        self.last_frame = old.last_frame
+
+    def segments_for_frame(self, frame):
+        """
+        Segmente, die in diesem Frame getickt werden müssen (in Tick-Reihenfolge):
+        aktive, pro Bone die Haltepose und solche, deren Zustand aufgeräumt werden muss.
+        """
+        picked = {}
+
+        for seg in self.always:
+            picked[seg.order] = seg
+
+        for seg in self.buckets.get(frame // _BUCKET, ()):
+            if seg.start <= frame <= seg.end:
+                picked[seg.order] = seg
+
+        # Haltepose: pro Bone das nach Node-Reihenfolge letzte bereits beendete Segment
+        for ends, latest in self.holds.values():
+            i = bisect_left(ends, frame)
+            if i:
+                seg = latest[i - 1]
+                picked[seg.order] = seg
+
+        # Property-Nodes setzen nach dem Ende einmal zurück
+        for seg in self.live_props:
+            if frame > seg.end:
+                picked[seg.order] = seg
+
+        # Rückwärtssprung: Segmente vor ihrem Start verwerfen ihre Startpose
+        if self.last_frame is not None and frame < self.last_frame:
+            for seg in self.live_holds:
+                if frame < seg.start:
+                    picked[seg.order] = seg
+        self.last_frame = frame
+
+        out = [picked[order] for order in sorted(picked)]
+        for seg in out:
+            if seg.start is None:
+                continue
+            live = self.live_holds if seg.holds else self.live_props
+            if frame < seg.start or (not seg.holds and frame > seg.end):
+                live.discard(seg)
+            else:
+                live.add(seg)
+        return out
+
+
+    def groups_for_frame(self, frame):
+        """
+        Group-Nodes, die in diesem Frame getickt werden müssen: innerhalb ihrer Hülle, danach
+        nur mit Haltepose, außerhalb einmal zum Aufräumen des Zustands verschachtelter Nodes.
+        """
+        out = []
+        for group in self.groups:
+            if group.start is None:
+                out.append(group.node)
+                continue
+            if frame < group.start or (frame > group.end and not group.holds):
+                if group.live:
+                    out.append(group.node)
+                    group.live = False
+                continue
+            group.live = True
+            out.append(group.node)
+        return out
+
+
+def _bone_key(node):
+    try:
+        arm_ob, bone_name = node.socket_bone_ref("Bone")
+    except Exception:
+        return None
+    if not arm_ob or getattr(arm_ob, "type", "") != "ARMATURE" or not bone_name:
+        return None
+    pose = getattr(arm_ob, "pose", None)
+    if pose is None or pose.bones.get(bone_name) is None:
+        return None
+    return (arm_ob.as_pointer(), bone_name)
+
+def _has_exact_bounds(node):
+    # Int-Quellen: gerundeter Wert == int()-Wert der Nodes
+    for name in ("Start", "Duration"):
+        sock = node.inputs.get(name)
+        if sock is None or not sock.is_linked or not sock.links:
+            continue
+        if getattr(sock.links[0].from_socket, "bl_idname", "") != "NodeSocketInt":
+            return False
+    return True
+
+def _bound_inputs(node):
+    return [s for s in (node.inputs.get(n) for n in ("Start", "Duration", "Offset")) if s is not None]
+
+def _static_inputs(sockets, groups, seen):
+    """
+    True, wenn alle Quellen der sockets über die Zeit konstant sind (Konstanten, reine Math-Nodes,
+    End anderer Segmente mit konstanten Grenzen, Group-/Action-Inputs). groups: umgebende
+    Group-Nodes, innerster zuletzt.
+    """
+    stack = [(sock, groups) for sock in sockets]
+    while stack:
+        sock, groups = stack.pop()
+        if not sock.is_linked:
+            continue
+        for link in sock.links:
+            up = link.from_node
+            key = (up.as_pointer(), groups[-1].as_pointer() if groups else 0)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if getattr(up, "type", "") == "GROUP_INPUT":
+                # Top-Level: Action-Inputs (Revision im Index-Key); sonst weiter im Parent
+                if groups:
+                    stack.extend((s, groups[:-1]) for s in groups[-1].inputs)
+                continue
+            if getattr(up, "bl_idname", "") in _SEGMENT_NODES:
+                stack.extend((s, groups) for s in _bound_inputs(up))
+                continue
+            if eval_plan.is_pure_node(up):
+                stack.extend((s, groups) for s in up.inputs)
+                continue
+            # Expression mit frame, Read-Nodes, Group-Outputs, ...: pro Frame anders
+            return False
+    return True
+
+def _static_bounds(node):
+    return _static_inputs(_bound_inputs(node), (), set())
+
+def _static_group_bounds(group_node, groups=(), trees=None):
+    sub = getattr(group_node, "node_tree", None)
+    if sub is None:
+        return True
+    trees = set() if trees is None else trees
+    if sub.as_pointer() in trees:
+        return True
+    trees.add(sub.as_pointer())
+
+    chain = groups + (group_node,)
+    for node in sub.nodes:
+        bl_idname = getattr(node, "bl_idname", "")
+        if bl_idname in _SEGMENT_NODES:
+            if not _static_inputs(_bound_inputs(node), chain, set()):
+                return False
+        elif bl_idname == "AnimNodeGroup" and not _static_group_bounds(node, chain, trees):
+            return False
+    return True
+
+def _collect_deps(seg, by_ptr):
+    """Segmente, deren End (direkt oder über Math-Nodes) in Start/Duration von seg eingeht."""
+    seen = set()
+    stack = [s for s in (seg.node.inputs.get("Start"), seg.node.inputs.get("Duration")) if s is not None]
+
+    while stack:
+        sock = stack.pop()
+        if not sock.is_linked:
+            continue
+        for link in sock.links:
+            up = link.from_node
+            up_ptr = up.as_pointer()
+            if up_ptr in seen:
+                continue
+            seen.add(up_ptr)
+
+            dep = by_ptr.get(up_ptr)
+            if dep is not None:
+                seg.deps.append(dep)
+                continue
+            if getattr(up, "bl_idname", "") == "AnimNodeGroup" or getattr(up, "type", "") == "GROUP_INPUT":
+                continue
+            stack.extend(up.inputs)
+
+def build_index(tree, scene=None, plan=None, revision=None):
+    rows = collect_tree_segments(tree, scene=scene)
+    rows.sort(key=lambda row: _SEGMENT_NODES.index(row[0].bl_idname))
+
+    segments = []
+    by_ptr = {}
+    for order, (node, start, end) in enumerate(rows):
+        # Grenzen, die vom Frame abhängen, sind zum Bauzeitpunkt nur eine Momentaufnahme:
+        # solche Segmente jeden Frame ticken (die Nodes prüfen selbst exakt)
+        if not _static_bounds(node):
+            start = end = None
+        seg = Segment(node, order, start, end)
+        segments.append(seg)
+        by_ptr[node.as_pointer()] = seg
+
+    for seg in segments:
+        _collect_deps(seg, by_ptr)
+
+    # Reine Groups (ohne Transform/Property-Nodes) werden nur per Pull ausgewertet.
+    groups = []
+    for node, start, end in collect_group_bounds(tree, scene=scene):
+        if plan is not None and not plan.ticks_group(node.as_pointer()):
+            continue
+        sub = getattr(node, "node_tree", None)
+        holds = sub is None or eval_plan.subtree_contains(sub, _HOLD_NODES)
+        if not _static_group_bounds(node):
+            start = end = None
+        groups.append(GroupSegment(node, start, end, holds))
+    return SegmentIndex(plan, revision, segments, groups)
+
+def get_index(tree, action, scene):
+    """
+    Zeitindex für (tree, action); neu aufgebaut, wenn sich Tree-Struktur/Werte
+    (neuer Eval-Plan) oder Action-Inputs geändert haben. None, wenn nicht baubar.
+    """
+    try:
+        key = (tree.as_pointer(), action.as_pointer() if action is not None else 0)
+        plan = eval_plan.get_plan(tree)
+    except Exception:
+        return None
+
+    revision = action_input_revision()
+    index = _INDEXES.get(key)
+    if index is not None and index.plan is plan and index.revision == revision:
+        return index
+
+    try:
+        new_index = build_index(tree, scene=scene, plan=plan, revision=revision)
+    except Exception:
+        _INDEXES.pop(key, None)
+        return None
+
+    new_index.adopt_live(index)
+    _INDEXES[key] = new_index
+    return new_index
+
+def snapshot_live():
+    """Live-Zustand aller Indizes kopieren (Prefetch wertet fremde Frames aus und stellt ihn danach wieder her)."""
+    return {key: (index, set(index.live_holds), set(index.live_props), index.last_frame,
+                  [group.live for group in index.groups])
+            for key, index in _INDEXES.items()}
+
+def restore_live(snapshot):
+    """Live-Zustand aus snapshot_live() zurückschreiben; seitdem neu gebaute Indizes starten leer."""
+    for key, index in _INDEXES.items():
+        entry = snapshot.get(key)
+        if entry is None or entry[0] is not index:
+            index.live_holds = set()
+            index.live_props = set()
+            index.last_frame = None
+            for group in index.groups:
+                group.live = False
+            continue
+        _index, holds, props, last_frame, groups_live = entry
+        index.live_holds = set(holds)
+        index.live_props = set(props)
+        index.last_frame = last_frame
+        for group, live in zip(index.groups, groups_live):
+            group.live = live
+
+def seed_skipped_dependencies(segments, tree, scene, ctx):
+    """
+    End-Werte nicht getickter Segmente, von denen getickte Segmente abhängen, direkt in
+    ctx.values schreiben, statt sie per Pull auszuwerten (und ihre Pose erneut zu setzen).
+    """
+    ticked = {seg.order for seg in segments}
+    for seg in segments:
+        for dep in seg.deps:
+            if dep.order in ticked or not dep.exact or not dep.holds or dep.bone_key is None:
+                continue
+            try:
+                dep.node.set_output_value(ctx, "End", int(dep.end_value))
+                dep.node.mark_evaluated(tree, scene, ctx)
+            except Exception:
+                pass
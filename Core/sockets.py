@@ -1,25 +1,135 @@
 # animation_graph/Core/sockets.py
 
+from bisect import bisect_left
+from fnmatch import fnmatchcase
+from itertools import islice
+
 import bpy
 
+# --------------------------------------------------------------------
+# bone items
+# --------------------------------------------------------------------
+# Bone-Enums werden bei jedem Redraw pro Socket/Slot abgefragt: Items pro Armature-Daten
+# gecacht. Blender hält nur Zeiger auf die Strings der zuletzt gelieferten Liste, der
+# Cache hält sie deshalb am Leben (auch die Platzhalter-Listen sind Modul-Konstanten).
+
+# armature data pointer -> _BoneItems
+_BONE_ITEMS = {}
+
+# Ab so vielen Bones zeigen Bone-Picker ein Suchfeld statt des Dropdowns
+BONE_SEARCH_MIN = 64
+_SEARCH_LIMIT = 200
+
+_NO_ARMATURE_ITEMS = [("", "(erst Armature wählen)", "Bitte zuerst eine Armature auswählen.")]
+_NO_BONES_ITEMS = [("", "(keine Bones vorhanden)", "Die gewählte Armature hat keine Bones.")]
+
+class _BoneItems:
+    __slots__ = ("fingerprint", "names", "items", "prefix")
+
+    def __init__(self, fingerprint, names):
+        # None = veraltet (Bones umbenannt o.ä.), beim nächsten Zugriff neu aufbauen
+        self.fingerprint = fingerprint
+        self.names = names
+        self.items = [(n, n, "") for n in names]
+        # (Name klein, Name) sortiert: Präfix-Suche per bisect
+        self.prefix = sorted((n.lower(), n) for n in names)
+
+def _bone_items_entry(arm_obj):
+    data = getattr(arm_obj, "data", None) if arm_obj and arm_obj.type == "ARMATURE" else None
+    if data is None:
+        return None
+    key = data.as_pointer()
+    # Bone-Set als Fingerprint: Umbenennen/Tauschen ändert ihn auch ohne Depsgraph-Update
+    names = tuple(b.name for b in data.bones)
+    entry = _BONE_ITEMS.get(key)
+    if entry is None or entry.fingerprint != names:
+        entry = _BONE_ITEMS[key] = _BoneItems(names, names)
+    return entry
+
+def bone_enum_items(arm_obj, no_armature=_NO_ARMATURE_ITEMS, no_bones=_NO_BONES_ITEMS):
+    """Gecachte Enum-Items aller Bones von arm_obj (Platzhalter ohne Armature/Bones)."""
+    entry = _bone_items_entry(arm_obj)
+    if entry is None:
+        return no_armature
+    return entry.items or no_bones
+
+def bone_count(arm_obj):
+    entry = _bone_items_entry(arm_obj)
+    return len(entry.names) if entry is not None else 0
+
+def search_bones(arm_obj, edit_text):
+    """Bone-Namen für ein Suchfeld: erst Präfix-Treffer (bisect), dann Teilstring-Treffer."""
+    entry = _bone_items_entry(arm_obj)
+    if entry is None:
+        return []
+    text = (edit_text or "").lower()
+    if not text:
+        return list(entry.names[:_SEARCH_LIMIT])
+
+    prefix = entry.prefix
+    out = []
+    idx = bisect_left(prefix, (text,))
+    while idx < len(prefix) and len(out) < _SEARCH_LIMIT and prefix[idx][0].startswith(text):
+        out.append(prefix[idx][1])
+        idx += 1
+
+    if len(out) < _SEARCH_LIMIT:
+        found = set(out)
+        rest = (n for n in entry.names if n not in found and text in n.lower())
+        out.extend(islice(rest, _SEARCH_LIMIT - len(out)))
+    return out
+
+def note_bone_items_changed(arm_data=None):
+    """Armature-Daten geändert (Bones umbenannt, ...): Items beim nächsten Zugriff neu aufbauen."""
+    if arm_data is None:
+        entries = _BONE_ITEMS.values()
+    else:
+        entry = _BONE_ITEMS.get(arm_data.as_pointer())
+        entries = (entry,) if entry is not None else ()
+    # Einträge bleiben bis zum Neuaufbau bestehen (Enum-Strings)
+    for entry in entries:
+        entry.fingerprint = None
+    _BONE_SETS.clear()
+
+def clear_bone_items():
+    _BONE_ITEMS.clear()
+
 def _enum_bones_from_selected_armature(self, context):
     """
     Baut die Bone-Liste dynamisch basierend auf self.armature_obj.
     Muss eine Liste von (identifier, name, description) liefern.
     """
-    arm_obj = getattr(self, "armature_obj", None)
+    return bone_enum_items(getattr(self, "armature_obj", None))
 
-    if not arm_obj or arm_obj.type != "ARMATURE" or not arm_obj.data:
-        return [("", "(erst Armature wählen)", "Bitte zuerst eine Armature auswählen.")]
+def _search_socket_bones(self, context, edit_text):
+    return search_bones(getattr(self, "armature_obj", None), edit_text)
 
-    items = []
-    # arm_obj.data ist bpy.types.Armature, .bones sind Edit/Rest-Bones (nicht PoseBones)
-    for b in arm_obj.data.bones:
-        items.append((b.name, b.name, ""))
+def _get_bone_search(self):
+    return self.bone_name or ""
 
-    if not items:
-        return [("", "(keine Bones vorhanden)", "Die gewählte Armature hat keine Bones.")]
-    return items
+def _set_bone_search(self, value):
+    arm_obj = getattr(self, "armature_obj", None)
+    if value and arm_obj and arm_obj.type == "ARMATURE" and arm_obj.data.bones.get(value) is not None:
+        self.bone_name = value
+
+def _tag_bone_socket_tree(socket):
+    """
+    Bone-Auswahl im UI geändert -> Tree-Update (Segment-Index etc. neu aufbauen).
+    Group-Input- und Group-Node-Outputs werden pro Frame bei der Auswertung beschrieben
+    und lösen daher kein Update aus.
+    """
+    node = getattr(socket, "node", None)
+    if getattr(socket, "is_output", False) and (
+        getattr(node, "type", "") == "GROUP_INPUT" or getattr(node, "bl_idname", "") == "AnimNodeGroup"
+    ):
+        return
+    tree = getattr(socket, "id_data", None)
+    if tree is None or getattr(tree, "bl_idname", "") != "AnimNodeTree":
+        return
+    try:
+        tree.update_tag()
+    except Exception:
+        pass
 
 def _on_armature_changed(self, context):
     """
@@ -30,11 +140,14 @@ def _on_armature_changed(self, context):
 
     if not arm_obj or arm_obj.type != "ARMATURE" or not arm_obj.data:
         self.bone_name = ""
-        return
-
-    if current and current not in arm_obj.data.bones:
+    elif current and current not in arm_obj.data.bones:
         self.bone_name = ""
 
+    _tag_bone_socket_tree(self)
+
+def _on_bone_changed(self, context):
+    _tag_bone_socket_tree(self)
+
 class NodeSocketBone(bpy.types.NodeSocket):
     bl_idname = "NodeSocketBone"
     bl_label = "Bone"
@@ -52,6 +165,16 @@ class NodeSocketBone(bpy.types.NodeSocket):
         name="Bone",
         description="Bone to use",
         items=_enum_bones_from_selected_armature,
+        update=_on_bone_changed,
+    )
+
+    # Suchfeld für große Rigs; liest/schreibt bone_name
+    bone_search: bpy.props.StringProperty(
+        name="Bone",
+        description="Bone suchen",
+        get=_get_bone_search,
+        set=_set_bone_search,
+        search=_search_socket_bones,
     )
 
     def draw(self, context, layout, node, text):
@@ -94,11 +217,192 @@ class NodeSocketBone(bpy.types.NodeSocket):
         arm_obj = self.armature_obj
         row = col.row(align=True)
         row.enabled = bool(arm_obj and arm_obj.type == "ARMATURE" and arm_obj.data)
-        row.prop(self, "bone_name", text="")
+        if bone_count(arm_obj) >= BONE_SEARCH_MIN:
+            row.prop(self, "bone_search", text="", icon="BONE_DATA")
+        else:
+            row.prop(self, "bone_name", text="")
 
     def draw_color(self, context, node):
         return (0.8, 0.7, 0.2, 1.0)
 
+# --------------------------------------------------------------------
+# bone set
+# --------------------------------------------------------------------
+# Armature plus mehrere Bones: explizite Liste (aus der Pose-Selektion übernommen),
+# Bone Collection oder Namensmuster (fnmatch).
+
+_BONE_LIST_SEP = "\n"
+
+# (Signatur, Anzahl Bones der Armature) -> Bone-Namen
+_BONE_SETS = {}
+_BONE_SETS_MAX = 256
+
+def _enum_bone_collections(self, context):
+    arm_obj = getattr(self, "armature_obj", None)
+    data = getattr(arm_obj, "data", None) if arm_obj and arm_obj.type == "ARMATURE" else None
+    if data is None:
+        return [("", "(erst Armature wählen)", "")]
+    items = [(c.name, c.name, "") for c in getattr(data, "collections_all", ())]
+    return items or [("", "(keine Bone Collections)", "")]
+
+def _on_bone_set_changed(self, context):
+    _tag_bone_socket_tree(self)
+
+def bone_set_signature(sock):
+    """Hashbarer Schlüssel der Bone-Set-Definition eines Sockets."""
+    arm_obj = getattr(sock, "armature_obj", None)
+    source = getattr(sock, "source", "LIST")
+    if source == "COLLECTION":
+        param = getattr(sock, "collection_name", "")
+    elif source == "PATTERN":
+        param = getattr(sock, "pattern", "")
+    else:
+        param = getattr(sock, "bone_list", "")
+    return (arm_obj.as_pointer() if arm_obj else 0, source, param)
+
+def _resolve_names(arm_obj, source, param):
+    bones = arm_obj.data.bones
+    if source == "COLLECTION":
+        coll = arm_obj.data.collections_all.get(param) if param else None
+        if coll is None:
+            return ()
+        members = {b.name for b in coll.bones}
+        # Armature-Reihenfolge (Eltern vor Kindern), nicht die der Collection
+        return tuple(b.name for b in bones if b.name in members)
+    if source == "PATTERN":
+        if not param:
+            return ()
+        return tuple(b.name for b in bones if fnmatchcase(b.name, param))
+    return tuple(name for name in param.split(_BONE_LIST_SEP) if name and bones.get(name) is not None)
+
+def resolve_bone_set(sock):
+    """(Armature, Bone-Namen) der Bone-Set-Definition von sock; ((None, ()) wenn ungültig)."""
+    arm_obj = getattr(sock, "armature_obj", None)
+    if not arm_obj or arm_obj.type != "ARMATURE" or not arm_obj.data:
+        return (None, ())
+
+    key = (bone_set_signature(sock), len(arm_obj.data.bones))
+    names = _BONE_SETS.get(key)
+    if names is None:
+        if len(_BONE_SETS) >= _BONE_SETS_MAX:
+            _BONE_SETS.clear()
+        names = _BONE_SETS[key] = _resolve_names(arm_obj, key[0][1], key[0][2])
+    return (arm_obj, names)
+
+def clear_bone_set_cache():
+    _BONE_SETS.clear()
+
+class NodeSocketBoneSet(bpy.types.NodeSocket):
+    bl_idname = "NodeSocketBoneSet"
+    bl_label = "Bone Set"
+    display_shape = 'SQUARE_DOT'
+
+    armature_obj: bpy.props.PointerProperty(
+        name="Armature",
+        description="Armature-Objekt aus der aktuellen Datei",
+        type=bpy.types.Object,
+        poll=lambda self, obj: obj is not None and obj.type == "ARMATURE",
+        update=_on_bone_set_changed,
+    )
+
+    source: bpy.props.EnumProperty(
+        name="Source",
+        items=[
+            ("LIST", "Bones", "Explizite Bone-Liste (aus der Pose-Selektion)"),
+            ("COLLECTION", "Collection", "Alle Bones einer Bone Collection"),
+            ("PATTERN", "Pattern", "Bone-Namen nach Muster, z.B. tail_*"),
+        ],
+        default="LIST",
+        update=_on_bone_set_changed,
+    )
+
+    collection_name: bpy.props.EnumProperty(
+        name="Collection",
+        items=_enum_bone_collections,
+        update=_on_bone_set_changed,
+    )
+
+    pattern: bpy.props.StringProperty(
+        name="Pattern",
+        description="fnmatch-Muster (Groß-/Kleinschreibung beachten)",
+        update=_on_bone_set_changed,
+    )
+
+    bone_list: bpy.props.StringProperty(
+        name="Bones",
+        description="Bone-Namen, zeilengetrennt",
+        options={"HIDDEN"},
+        update=_on_bone_set_changed,
+    )
+
+    def draw(self, context, layout, node, text):
+        if text:
+            layout.label(text=text)
+
+        src = self
+        if self.is_linked and self.links and not self.is_output:
+            src = self.links[0].from_socket
+        editable = src is self and not (self.is_output and getattr(node, "type", "") == "GROUP_INPUT")
+
+        arm_obj = getattr(src, "armature_obj", None)
+        if not editable:
+            _arm, names = resolve_bone_set(src)
+            col = layout.column(align=True)
+            col.enabled = False
+            col.label(text=arm_obj.name if arm_obj else "(keine Armature)")
+            col.label(text=f"{len(names)} Bones")
+            return
+
+        col = layout.column(align=True)
+        col.prop(self, "armature_obj", text="")
+        row = col.row(align=True)
+        row.enabled = bool(arm_obj and arm_obj.type == "ARMATURE" and arm_obj.data)
+        row.prop(self, "source", text="")
+        if self.source == "COLLECTION":
+            row.prop(self, "collection_name", text="")
+        elif self.source == "PATTERN":
+            row.prop(self, "pattern", text="")
+        else:
+            op = row.operator("animgraph.bone_set_from_selection", text="", icon="RESTRICT_SELECT_OFF")
+            op.node_name = node.name
+            op.socket_identifier = self.identifier
+            op.is_output = self.is_output
+            _arm, names = resolve_bone_set(self)
+            row.label(text=f"{len(names)}")
+
+    def draw_color(self, context, node):
+        return (0.8, 0.55, 0.2, 1.0)
+
+class ANIMGRAPH_OT_bone_set_from_selection(bpy.types.Operator):
+    """Selektierte Pose-Bones der Armature als Bone-Liste übernehmen"""
+    bl_idname = "animgraph.bone_set_from_selection"
+    bl_label = "Bone Set from Selection"
+    bl_options = {"REGISTER", "UNDO"}
+
+    node_name: bpy.props.StringProperty()
+    socket_identifier: bpy.props.StringProperty()
+    is_output: bpy.props.BoolProperty()
+
+    def execute(self, context):
+        space = context.space_data
+        tree = getattr(space, "edit_tree", None)
+        node = tree.nodes.get(self.node_name) if tree else None
+        if node is None:
+            return {"CANCELLED"}
+        sockets = node.outputs if self.is_output else node.inputs
+        sock = next((s for s in sockets if s.identifier == self.socket_identifier), None)
+        arm_obj = getattr(sock, "armature_obj", None)
+        if sock is None or not arm_obj or arm_obj.type != "ARMATURE":
+            return {"CANCELLED"}
+
+        # Armature-Reihenfolge beibehalten
+        selected = [b.name for b in arm_obj.data.bones if b.select]
+        if not selected:
+            self.report({"WARNING"}, "Keine Bones selektiert")
+            return {"CANCELLED"}
+        sock.bone_list = _BONE_LIST_SEP.join(selected)
+        return {"FINISHED"}
+
 _SOCKET_PREFIX = "NodeSocket"
 def _S(datatype: str) -> str:
     return _SOCKET_PREFIX + datatype.lower().capitalize()
@@ -154,16 +458,24 @@ validLinks = {
     "TRANSLATION": {"TRANSLATION","VECTOR"},
     "MATRIX":      {"MATRIX"},
     "BONE":        {"BONE"},
+    "BONESET":     {"BONESET"},
 }
-def isValidLink(l: bpy.types.NodeLink) -> bool:
-    try:
-        from_sock = l.from_socket
-        to_sock = l.to_socket
-        vn = from_sock.bl_idname
-        zn = to_sock.bl_idname
-    except Exception:
-        return False
+# Alle Socket-Typen, die im AnimGraph vorkommen; für diese wird die Kompatibilität vorab berechnet.
+_KNOWN_SOCKET_TYPES = (
+    "NodeSocketInt",
+    "NodeSocketFloat",
+    "NodeSocketBool",
+    "NodeSocketString",
+    "NodeSocketVector",
+    "NodeSocketVectorXYZ",
+    "NodeSocketRotation",
+    "NodeSocketVectorTranslation",
+    "NodeSocketMatrix",
+    "NodeSocketBone",
+    "NodeSocketBoneSet",
+)
 
+def _link_compatible(vn: str, zn: str) -> bool:
     # Gleichartige Socket-Typen sind immer erlaubt.
     if vn == zn:
         return True
@@ -175,3 +487,22 @@ def isValidLink(l: bpy.types.NodeLink) -> bool:
 
     compatible = validLinks.get(allowed, set())
     return target in compatible
+
+# (from_bl_idname, to_bl_idname) -> bool
+_LINK_COMPAT = {(vn, zn): _link_compatible(vn, zn) for vn in _KNOWN_SOCKET_TYPES for zn in _KNOWN_SOCKET_TYPES}
+
+def isCompatible(vn: str, zn: str) -> bool:
+    key = (vn, zn)
+    ok = _LINK_COMPAT.get(key)
+    if ok is None:
+        # Unbekannte Typen (z.B. von anderen Addons) einmalig nachberechnen.
+        ok = _LINK_COMPAT[key] = _link_compatible(vn, zn)
+    return ok
+
+def isValidLink(l: bpy.types.NodeLink) -> bool:
+    try:
+        vn = l.from_socket.bl_idname
+        zn = l.to_socket.bl_idname
+    except Exception:
+        return False
+    return isCompatible(vn, zn)
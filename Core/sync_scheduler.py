@@ -0,0 +1,77 @@
+# animation_graph/Core/sync_scheduler.py
+
+import bpy
+from bpy.app.handlers import persistent, load_pre
+
+from . import dependency_index
+from .helper_methoden import sync_actions_for_tree
+
+
+# Edits innerhalb dieses Fensters (Sekunden) werden zu einem Sync pro (Action, Tree) zusammengefasst.
+_SYNC_DELAY = 0.25
+
+# tree pointer -> lookup key
+_PENDING = {}
+
+
+def register():
+    if _on_load_pre not in load_pre: load_pre.append(_on_load_pre)
+
+def unregister():
+    if _on_load_pre in load_pre: load_pre.remove(_on_load_pre)
+    if bpy.app.timers.is_registered(_on_timer):
+        bpy.app.timers.unregister(_on_timer)
+    _PENDING.clear()
+
+
+@persistent
+def _on_load_pre(*_args):
+    _PENDING.clear()
+
+
+def schedule_tree_sync(tree):
+    """
+    Queue tree -> action synchronization (Action-Inputs + Timekeys).
+    Mehrfache Aufrufe innerhalb von _SYNC_DELAY führen zu genau einem Sync.
+    """
+    if tree is None:
+        return
+
+    try:
+        _PENDING[tree.as_pointer()] = dependency_index.lookup_key(tree)
+    except Exception:
+        return
+
+    # Ohne Event-Loop (blender -b) laufen keine Timer.
+    if bpy.app.background:
+        flush_pending()
+        return
+
+    if not bpy.app.timers.is_registered(_on_timer):
+        bpy.app.timers.register(_on_timer, first_interval=_SYNC_DELAY)
+
+def _on_timer():
+    flush_pending()
+    return None
+
+def flush_pending(context=None):
+    if not _PENDING:
+        return
+
+    pending = list(_PENDING.items())
+    _PENDING.clear()
+
+    # Timekeys verschachtelter Groups landen in den Actions aller Parent-Trees,
+    # daher die betroffenen Vorfahren einmalig mitsynchronisieren.
+    trees = {}
+    for tree_ptr, key in pending:
+        tree = dependency_index.resolve_tree(key, tree_ptr)
+        if tree is None:
+            continue
+        trees[tree_ptr] = tree
+        for parent in dependency_index.ancestor_trees(tree):
+            trees.setdefault(parent.as_pointer(), parent)
+
+    for tree in trees.values():
+        try: sync_actions_for_tree(tree, context=context)
+        except Exception: pass
@@ -0,0 +1,262 @@
+# animation_graph/Core/tree_hash.py
+
+from hashlib import blake2b
+
+import bpy
+from bpy.app.handlers import persistent, load_post, undo_post, redo_post
+
+from . import dependency_index
+from .helper_methoden import iter_interface_sockets, interface_socket_identifier, interface_socket_type
+
+
+# Inhalts-Hash eines AnimNodeTree: Nodes (Typ, Name, Python-Properties), Socket-Defaults
+# unverlinkter Inputs, Bone-Sockets, Links, Interface und rekursiv verschachtelte Group-Trees.
+# Enthält keine Pointer und ist damit über Sessions/Dateien hinweg stabil.
+
+_DIGEST_SIZE = 16
+
+# tree pointer -> _HashState
+_STATES = {}
+
+# Trees, deren nächstes update() von einem Node-Property-Callback ausgelöst wurde:
+# nur die dirty Nodes, Links und Interface neu hashen statt aller Nodes (sofern sich die
+# Struktur seit dem letzten Hash nicht geändert hat).
+_NODE_ONLY = set()
+
+# Outputs dieser Nodes werden bei der Auswertung pro Frame beschrieben (Runtime, kein Inhalt)
+_RUNTIME_OUTPUT_NODES = {"NodeGroupInput", "AnimNodeGroup"}
+
+
+def register():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded not in h: h.append(_on_data_reloaded)
+
+def unregister():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded in h: h.remove(_on_data_reloaded)
+    _STATES.clear()
+    _NODE_ONLY.clear()
+
+
+@persistent
+def _on_data_reloaded(*_args):
+    _STATES.clear()
+    _NODE_ONLY.clear()
+
+
+class _HashState:
+    __slots__ = ("full", "dirty_nodes", "node_digests", "links_digest", "iface_digest", "digest", "structure")
+
+    def __init__(self):
+        self.full = True
+        # node names, die neu gehasht werden müssen
+        self.dirty_nodes = set()
+        # node name -> digest
+        self.node_digests = {}
+        self.links_digest = b""
+        self.iface_digest = b""
+        self.digest = None
+        # _structure_key beim letzten Hash
+        self.structure = None
+
+
+# --------------------------------------------------------------------
+# value tokens
+# --------------------------------------------------------------------
+
+def value_token(v):
+    if v is None or isinstance(v, (bool, int, float, str)):
+        return repr(v)
+    if isinstance(v, bpy.types.ID):
+        return "ID:" + repr(dependency_index.lookup_key(v))
+    if isinstance(v, bpy.types.bpy_struct):
+        return type(v).__name__
+    try:
+        # bpy_prop_array, Vector, Matrix (Zeilen), Tupel
+        return "(" + ",".join(value_token(x) for x in v) + ")"
+    except TypeError:
+        return type(v).__name__
+
+def _feed(h, *parts):
+    for part in parts:
+        h.update(part.encode("utf-8", "surrogatepass"))
+        h.update(b"\x00")
+
+def _socket_tokens(sock, with_value):
+    out = [sock.identifier, sock.bl_idname]
+    if sock.bl_idname == "NodeSocketBone":
+        out.append(value_token(getattr(sock, "armature_obj", None)))
+        out.append(str(getattr(sock, "bone_name", "") or ""))
+    elif sock.bl_idname == "NodeSocketBoneSet":
+        out.append(value_token(getattr(sock, "armature_obj", None)))
+        out.extend(str(getattr(sock, p, "") or "") for p in ("source", "collection_name", "pattern", "bone_list"))
+    elif with_value and hasattr(sock, "default_value"):
+        out.append(value_token(sock.default_value))
+    return out
+
+
+# --------------------------------------------------------------------
+# digests
+# --------------------------------------------------------------------
+
+def _node_digest(node, stack):
+    h = blake2b(digest_size=_DIGEST_SIZE)
+    _feed(h, node.bl_idname, node.name)
+
+    for prop in node.bl_rna.properties:
+        if not prop.is_runtime:
+            continue
+        _feed(h, prop.identifier, value_token(getattr(node, prop.identifier, None)))
+
+    # Inhalt außerhalb der Node-Properties (z.B. Easing-Kurven in einer Hilfs-Group)
+    hash_token = getattr(node, "hash_token", None)
+    if callable(hash_token):
+        _feed(h, "token", hash_token())
+
+    sub = getattr(node, "node_tree", None)
+    if sub is not None and getattr(sub, "bl_idname", "") == "AnimNodeTree":
+        _feed(h, "node_tree", _tree_digest(sub, stack).hex())
+
+    for sock in node.inputs:
+        # verlinkte Inputs: Wert kommt vom Link
+        _feed(h, "in", *_socket_tokens(sock, with_value=not sock.is_linked))
+
+    runtime_outputs = node.bl_idname in _RUNTIME_OUTPUT_NODES
+    # Nodes ohne Inputs (Konstanten): Output-Wert ist vom Nutzer gesetzt
+    user_outputs = not runtime_outputs and len(node.inputs) == 0
+    for sock in node.outputs:
+        if runtime_outputs:
+            _feed(h, "out", sock.identifier, sock.bl_idname)
+            continue
+        # Sonst schreibt die Auswertung die Output-default_values; nur Bone-Auswahl ist Inhalt
+        _feed(h, "out", *_socket_tokens(sock, with_value=user_outputs))
+
+    return h.digest()
+
+def _links_digest(tree):
+    rows = sorted(
+        (l.from_node.name, l.from_socket.identifier, l.to_node.name, l.to_socket.identifier, str(l.is_muted))
+        for l in tree.links
+    )
+    h = blake2b(digest_size=_DIGEST_SIZE)
+    for row in rows:
+        _feed(h, *row)
+    return h.digest()
+
+def _interface_digest(tree):
+    h = blake2b(digest_size=_DIGEST_SIZE)
+    for item in iter_interface_sockets(tree):
+        _feed(
+            h,
+            str(getattr(item, "in_out", "")),
+            str(getattr(item, "name", "")),
+            str(interface_socket_identifier(item) or ""),
+            str(interface_socket_type(item) or ""),
+        )
+    return h.digest()
+
+def _tree_digest(tree, stack):
+    tree_ptr = tree.as_pointer()
+    if tree_ptr in stack:
+        # rekursive Group-Verschachtelung
+        return b"\x00" * _DIGEST_SIZE
+
+    state = _STATES.get(tree_ptr)
+    if state is None:
+        state = _STATES[tree_ptr] = _HashState()
+    if state.digest is not None:
+        return state.digest
+
+    stack.add(tree_ptr)
+    try:
+        if not state.full and set(state.node_digests) != {node.name for node in tree.nodes}:
+            state.full = True
+
+        if state.full:
+            state.node_digests = {node.name: _node_digest(node, stack) for node in tree.nodes}
+            state.full = False
+        else:
+            for name in state.dirty_nodes:
+                node = tree.nodes.get(name)
+                if node is not None:
+                    state.node_digests[name] = _node_digest(node, stack)
+        state.structure = _structure_key(tree)
+        state.links_digest = _links_digest(tree)
+        state.iface_digest = _interface_digest(tree)
+        state.dirty_nodes.clear()
+
+        h = blake2b(digest_size=_DIGEST_SIZE)
+        for name in sorted(state.node_digests):
+            h.update(state.node_digests[name])
+        h.update(state.links_digest)
+        h.update(state.iface_digest)
+        state.digest = h.digest()
+    finally:
+        stack.discard(tree_ptr)
+    return state.digest
+
+def content_hash(tree):
+    """Hex-Digest des Tree-Inhalts (inkl. verschachtelter Groups); stabiler Cache-Key."""
+    return _tree_digest(tree, set()).hex()
+
+
+# --------------------------------------------------------------------
+# invalidation
+# --------------------------------------------------------------------
+
+def _invalidate_users(tree, seen):
+    # Group-Nodes in Parent-Trees hashen den Subtree mit.
+    for parent, group_nodes in dependency_index.group_users(tree):
+        parent_ptr = parent.as_pointer()
+        state = _STATES.get(parent_ptr)
+        if state is not None:
+            state.dirty_nodes.update(node.name for node in group_nodes)
+            state.digest = None
+        if parent_ptr not in seen:
+            seen.add(parent_ptr)
+            _invalidate_users(parent, seen)
+
+def _structure_key(tree):
+    # Nodes mit Socket-Anzahl und Links: ändert sich das, ändern sich auch is_linked und
+    # damit die Digests anderer Nodes als der dirty markierten
+    return hash((
+        tuple((node.name, len(node.inputs), len(node.outputs)) for node in tree.nodes),
+        tuple(
+            (l.from_node.name, l.from_socket.identifier, l.to_node.name, l.to_socket.identifier)
+            for l in tree.links
+        ),
+    ))
+
+def tree_changed(tree):
+    """Aus AnimNodeTree.update/interface_update: Tree komplett neu hashen (außer nach node_changed)."""
+    try:
+        tree_ptr = tree.as_pointer()
+    except Exception:
+        _STATES.clear()
+        return
+
+    state = _STATES.get(tree_ptr)
+    if state is not None:
+        node_only = tree_ptr in _NODE_ONLY
+        _NODE_ONLY.discard(tree_ptr)
+        if not node_only or state.structure != _structure_key(tree):
+            state.full = True
+        state.digest = None
+    _invalidate_users(tree, {tree_ptr})
+
+def node_changed(node):
+    """
+    Aus Node-Property-Update-Callbacks: nur diesen Node neu hashen und ein Tree-Update
+    auslösen; das folgende AnimNodeTree.update erzwingt dann keinen kompletten Rehash.
+    """
+    tree = getattr(node, "id_data", None)
+    if tree is None:
+        return
+
+    tree_ptr = tree.as_pointer()
+    state = _STATES.get(tree_ptr)
+    if state is not None:
+        state.dirty_nodes.add(node.name)
+        state.digest = None
+        _NODE_ONLY.add(tree_ptr)
+    tree.update_tag()
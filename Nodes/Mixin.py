@@ -1,14 +1,169 @@
 # animation_graph/Nodes/Mixin.py
 
 import bpy
-from mathutils import Vector, Matrix
+
+from ..Core import eval_plan, dependency_index, sockets, pose_buffer
+
+_MISSING = object()
+
+
+# --------------------------------------------------------------------
+# group inputs
+# --------------------------------------------------------------------
+# Group-Subtrees laufen mit ctx.group_scope = (group node, parent tree, parent ctx).
+# Group-Input-Werte werden erst beim Lesen im Parent aufgelöst (pro Instanz in ctx.values
+# gemerkt), statt sie vorab auf die Sockets des Group-Input-Nodes zu schreiben.
+
+def _output_index(node, sock):
+    ptr = sock.as_pointer()
+    for idx, out in enumerate(node.outputs):
+        if out.as_pointer() == ptr:
+            return idx
+    return None
+
+def _bound_group_input(idx, key, fallback_sock, scene, ctx):
+    scope = getattr(ctx, "group_scope", None)
+    if scope is None or idx is None:
+        return getattr(fallback_sock, "default_value", None)
+
+    group_node, parent_tree, parent_ctx = scope
+    parent_in = group_node.inputs[idx] if idx < len(group_node.inputs) else None
+    if parent_in is None:
+        v = getattr(fallback_sock, "default_value", None)
+    else:
+        slot = group_node._input_slot(parent_tree, parent_in.name)
+        if slot is not None and slot.socket.as_pointer() == parent_in.as_pointer():
+            v = group_node.eval_slot(parent_tree, slot, scene, parent_ctx)
+        else:
+            v = group_node.eval_socket(parent_tree, parent_in, scene, parent_ctx)
+    ctx.values[key] = v
+    return v
+
+def _socket_bone_value(sock, ctx):
+    if getattr(sock, "is_linked", False) and sock.links:
+        from_sock = sock.links[0].from_socket
+        from_node = from_sock.node
+        if getattr(from_node, "type", "") == "GROUP_INPUT":
+            ref = _group_input_bone_ref(from_node, from_sock, ctx)
+            if ref is not None:
+                return ref
+        return (getattr(from_sock, "armature_obj", None), getattr(from_sock, "bone_name", "") or "")
+
+    return (getattr(sock, "armature_obj", None), getattr(sock, "bone_name", "") or "")
+
+def _group_input_bone_ref(group_input, from_sock, ctx):
+    if ctx is not None:
+        key = (group_input.as_pointer(), from_sock.name)
+        values = getattr(ctx, "values", None) or {}
+        ref = values.get(key)
+        if isinstance(ref, tuple):
+            return ref
+
+        scope = getattr(ctx, "group_scope", None)
+        if scope is None:
+            return None
+        group_node, _parent_tree, parent_ctx = scope
+        idx = _output_index(group_input, from_sock)
+        if idx is None or idx >= len(group_node.inputs):
+            return None
+        ref = _socket_bone_value(group_node.inputs[idx], parent_ctx)
+        ctx.values[key] = ref
+        return ref
+
+    # Ohne Auswertung (UI): gespeicherter Socket-Wert, sonst über die erste Group-Instanz
+    if getattr(from_sock, "armature_obj", None) is not None:
+        return None
+    idx = _output_index(group_input, from_sock)
+    for _parent, group_nodes in dependency_index.group_users(group_input.id_data):
+        for group_node in group_nodes:
+            if idx is not None and idx < len(group_node.inputs):
+                return _socket_bone_value(group_node.inputs[idx], None)
+    return None
+
+def _bone_set_socket(sock, ctx):
+    """Socket mit der Bone-Set-Definition für sock (Links und Group-Inputs aufgelöst)."""
+    if not (getattr(sock, "is_linked", False) and sock.links):
+        return sock
+    from_sock = sock.links[0].from_socket
+    group_input = from_sock.node
+    if getattr(group_input, "type", "") != "GROUP_INPUT":
+        return from_sock
+
+    idx = _output_index(group_input, from_sock)
+    scope = getattr(ctx, "group_scope", None) if ctx is not None else None
+    if scope is not None:
+        group_node, _parent_tree, parent_ctx = scope
+        if idx is not None and idx < len(group_node.inputs):
+            return _bone_set_socket(group_node.inputs[idx], parent_ctx)
+        return from_sock
+
+    # Ohne Auswertung (UI): gespeicherter Socket-Wert, sonst über die erste Group-Instanz
+    if ctx is None and getattr(from_sock, "armature_obj", None) is None:
+        for _parent, group_nodes in dependency_index.group_users(group_input.id_data):
+            for group_node in group_nodes:
+                if idx is not None and idx < len(group_node.inputs):
+                    return _bone_set_socket(group_node.inputs[idx], None)
+    return from_sock
+
+def _plan_bone_handle(tree, node, socket_name, ctx):
+    """BoneHandle des Bone-Inputs aus dem Eval-Plan; _MISSING, wenn er nur pro Frame bekannt ist."""
+    try:
+        ref = eval_plan.get_plan(tree).bone_refs.get((node.as_pointer(), socket_name))
+    except Exception:
+        ref = None
+    if ref is None:
+        return _MISSING
+
+    if ref.bind_index is None:
+        if ref.handle is None:
+            ref.handle = pose_buffer.bone_handle(ref.arm_ob, ref.bone_name)
+        return ref.handle
+
+    # Group-Input: über den Input der Group-Instanz im Parent-Plan
+    scope = getattr(ctx, "group_scope", None) if ctx is not None else None
+    if scope is None:
+        # Top-Level: Wert kommt aus dem Action-Panel
+        return _MISSING
+    group_node, parent_tree, parent_ctx = scope
+    if ref.bind_index >= len(group_node.inputs):
+        return None
+    return _plan_bone_handle(parent_tree, group_node, group_node.inputs[ref.bind_index].name, parent_ctx)
+
+# --------------------------------------------------------------------
+# sockets
+# --------------------------------------------------------------------
+
+def retype_socket(sockets, name, socket_type, index):
+    """Socket name auf socket_type umstellen; Links und Position bleiben erhalten."""
+    old = sockets.get(name)
+    if old is not None and old.bl_idname == socket_type:
+        return old
+
+    tree = sockets.id_data
+    peers = []
+    if old is not None:
+        peers = [l.to_socket if old.is_output else l.from_socket for l in old.links]
+        sockets.remove(old)
+
+    new = sockets.new(socket_type, name)
+    try: sockets.move(len(sockets) - 1, index)
+    except Exception: pass
+
+    for peer in peers:
+        try:
+            if new.is_output: tree.links.new(new, peer)
+            else: tree.links.new(peer, new)
+        except Exception:
+            pass
+    return new
+
 
 class AnimGraphNodeMixin:
     """
     Evaluations-Mixin (single-link MVP, aber deterministisch):
     - Upstream Evaluation (einmal pro Frame)
     - Runtime-Value Propagation über ctx.values statt socket.default_value
-    - Typed socket getter: int/float/vector/matrix
+    - Typed socket getter: int/float/vector/matrix (Konverter aus dem Eval-Plan)
     """
 
     @classmethod
@@ -43,8 +198,6 @@ class AnimGraphNodeMixin:
             ctx.values = {}
         if not hasattr(ctx, "eval_cache") or ctx.eval_cache is None:
             ctx.eval_cache = set()
-        if not hasattr(ctx, "eval_stack") or ctx.eval_stack is None:
-            ctx.eval_stack = set()
 
     def set_output_value(self, ctx, sock_name: str, value):
         self._ensure_ctx_runtime(ctx)
@@ -61,28 +214,24 @@ class AnimGraphNodeMixin:
         """
         Ensures this node is evaluated once per frame.
         ctx needs: ctx.eval_cache (set), ctx.values (dict)
+        Zyklen sind zur Plan-Zeit gekappt (eval_plan); der Eintrag in eval_cache vor
+        evaluate verhindert zusätzlich Wiedereintritt.
         """
         self._ensure_ctx_runtime(ctx)
 
-        frame_key = self._frame_key(tree, scene)
-        key = (self.as_pointer(), frame_key)
+        key = (self.as_pointer(), self._frame_key(tree, scene))
         if key in ctx.eval_cache:
             return
-
-        # Protect direct eval_upstream callers that bypass eval_socket guards.
-        guard = ("UPSTREAM_EVAL", self.as_pointer(), frame_key)
-        if guard in ctx.eval_stack:
-            return
-        ctx.eval_stack.add(guard)
-
         ctx.eval_cache.add(key)
 
-        try:
-            fn = getattr(self, "evaluate", None)
-            if callable(fn):
-                fn(tree, scene, ctx)
-        finally:
-            ctx.eval_stack.discard(guard)
+        fn = getattr(self, "evaluate", None)
+        if callable(fn):
+            fn(tree, scene, ctx)
+
+    def mark_evaluated(self, tree, scene, ctx):
+        """Für diesen Frame als ausgewertet markieren; eval_upstream ruft evaluate dann nicht mehr auf."""
+        self._ensure_ctx_runtime(ctx)
+        ctx.eval_cache.add((self.as_pointer(), self._frame_key(tree, scene)))
 
     def eval_socket(self, tree, sock, scene, ctx):
         """
@@ -98,24 +247,67 @@ class AnimGraphNodeMixin:
             link = sock.links[0]
             from_sock = link.from_socket
             from_node = from_sock.node
+            from_ptr = from_node.as_pointer()
 
-            # recursion guard (cycles kill determinism)
-            guard = (tree.as_pointer(), from_node.as_pointer(), self._scene_time_key(scene))
-            if guard in ctx.eval_stack:
-                return getattr(from_sock, "default_value", None)  # last resort
-            ctx.eval_stack.add(guard)
-            try:
-                if hasattr(from_node, "eval_upstream"):
-                    from_node.eval_upstream(tree, scene, ctx)
-                # Runtime-Wert lesen (nicht default_value!)
-                return ctx.values.get((from_node.as_pointer(), from_sock.name),
-                                      getattr(from_sock, "default_value", None))
-            finally:
-                ctx.eval_stack.discard(guard)
+            # Link schließt einen Zyklus (zur Plan-Zeit erkannt)
+            if eval_plan.get_plan(tree).is_cut(from_ptr, link.to_node.as_pointer()):
+                return getattr(from_sock, "default_value", None)
+
+            if hasattr(from_node, "eval_upstream"):
+                from_node.eval_upstream(tree, scene, ctx)
+            # Runtime-Wert lesen (nicht default_value!)
+            key = (from_ptr, from_sock.name)
+            v = ctx.values.get(key, _MISSING)
+            if v is not _MISSING:
+                return v
+            if getattr(from_node, "type", "") == "GROUP_INPUT":
+                return _bound_group_input(_output_index(from_node, from_sock), key, from_sock, scene, ctx)
+            return getattr(from_sock, "default_value", None)
 
         # unlinked: UI default
         return getattr(sock, "default_value", None)
 
+    def _input_slot(self, tree, name):
+        try:
+            return eval_plan.get_plan(tree).slot(self.as_pointer(), name)
+        except Exception:
+            return None
+
+    def eval_slot(self, tree, slot, scene, ctx):
+        """
+        Wie eval_socket, aber mit zur Plan-Zeit aufgelöstem Link (kein links[0]-Lookup pro Read).
+        """
+        if slot.folded:
+            # konstanter Teilgraph, zur Plan-Zeit ausgewertet
+            return slot.literal
+        from_node = slot.from_node
+        if from_node is None:
+            # unlinked: UI default
+            return getattr(slot.socket, "default_value", None)
+        if slot.cut:
+            # Link schließt einen Zyklus (zur Plan-Zeit erkannt)
+            return getattr(slot.from_socket, "default_value", None)
+
+        self._ensure_ctx_runtime(ctx)
+
+        if hasattr(from_node, "eval_upstream"):
+            from_node.eval_upstream(tree, scene, ctx)
+        # Runtime-Wert lesen (nicht default_value!)
+        v = ctx.values.get(slot.from_key, _MISSING)
+        if v is _MISSING:
+            if slot.bind_index is not None:
+                return _bound_group_input(slot.bind_index, slot.from_key, slot.from_socket, scene, ctx)
+            v = getattr(slot.from_socket, "default_value", None)
+        return v
+
+    def _read_input(self, tree, name, scene, ctx, kind):
+        slot = self._input_slot(tree, name)
+        if slot is None:
+            return None, None
+        v = self.eval_slot(tree, slot, scene, ctx)
+        # Konverter nur benutzen, wenn der Getter zum Socket-Typ passt
+        return v, (slot.convert if slot.kind == kind else None)
+
     # -----------------------------
     # typed socket helpers
     # -----------------------------
@@ -123,55 +315,55 @@ class AnimGraphNodeMixin:
         return self.inputs.get(name) if self else None
 
     def socket_int(self, tree, name, scene, ctx, fallback=0):
-        v = self.eval_socket(tree, self._in(name), scene, ctx)
-        try:
-            return int(v)
-        except Exception:
-            try:
-                return int(float(v))
-            except Exception:
-                return int(fallback)
+        v, convert = self._read_input(tree, name, scene, ctx, "INT")
+        if convert is not None:
+            return convert(v, fallback)
+        return eval_plan.coerce_int(v, fallback)
 
     def socket_float(self, tree, name, scene, ctx, fallback=0.0):
-        v = self.eval_socket(tree, self._in(name), scene, ctx)
-        try:
-            return float(v)
-        except Exception:
-            return float(fallback)
+        v, convert = self._read_input(tree, name, scene, ctx, "FLOAT")
+        if convert is not None:
+            return convert(v, fallback)
+        return eval_plan.coerce_float(v, fallback)
 
     def socket_vector(self, tree, name, scene, ctx, fallback=(0.0, 0.0, 0.0)):
-        v = self.eval_socket(tree, self._in(name), scene, ctx)
-        try:
-            return Vector(v)
-        except Exception:
-            return Vector(fallback)
+        v, convert = self._read_input(tree, name, scene, ctx, "VECTOR")
+        if convert is not None:
+            return convert(v, fallback)
+        return eval_plan.coerce_vector(v, fallback)
 
     def socket_matrix(self, tree, name, scene, ctx, fallback=None):
-        v = self.eval_socket(tree, self._in(name), scene, ctx)
-        if v is None:
-            return fallback
-        try:
-            return Matrix(v)
-        except Exception:
-            return fallback
+        v, convert = self._read_input(tree, name, scene, ctx, "MATRIX")
+        if convert is not None:
+            return convert(v, fallback)
+        return eval_plan.coerce_matrix(v, fallback)
 
     # -----------------------------
     # bone socket helpers (unverändert)
     # -----------------------------
-    def socket_bone_ref(self, socket_name="Bone"):
+    def socket_bone_ref(self, socket_name="Bone", ctx=None):
+        """(Armature, Bone-Name) des Sockets; mit ctx werden Group-Inputs pro Instanz aufgelöst."""
         s = self.inputs.get(socket_name) if self else None
         if not s:
             return (None, "")
+        return _socket_bone_value(s, ctx)
 
-        if getattr(s, "is_linked", False) and s.links:
-            from_sock = s.links[0].from_socket
-            arm = getattr(from_sock, "armature_obj", None)
-            bone = getattr(from_sock, "bone_name", "") or ""
-            return (arm, bone)
+    def socket_pose_bone(self, tree, socket_name="Bone", ctx=None):
+        """(Armature, Bone-Name, PoseBone) des Bone-Inputs über den zur Plan-Zeit aufgelösten Handle."""
+        handle = _plan_bone_handle(tree, self, socket_name, ctx)
+        if handle is _MISSING:
+            handle = pose_buffer.bone_handle(*self.socket_bone_ref(socket_name, ctx))
+        pbone = handle.resolve() if handle is not None else None
+        if pbone is None:
+            return (None, "", None)
+        return (handle.arm_ob, handle.bone_name, pbone)
 
-        arm = getattr(s, "armature_obj", None)
-        bone = getattr(s, "bone_name", "") or ""
-        return (arm, bone)
+    def socket_bone_set(self, socket_name="Bones", ctx=None):
+        """(Armature, Bone-Namen) des Bone-Set-Sockets; mit ctx pro Group-Instanz aufgelöst."""
+        s = self.inputs.get(socket_name) if self else None
+        if not s:
+            return (None, ())
+        return sockets.resolve_bone_set(_bone_set_socket(s, ctx))
 
     def socket_bone(self, socket_name="Bone", fallback=""):
         arm, bone = self.socket_bone_ref(socket_name)
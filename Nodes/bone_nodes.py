@@ -5,7 +5,7 @@ import bpy
 from bpy.props import EnumProperty
 
 from .Mixin import AnimGraphNodeMixin
-from ..Core import sockets
+from ..Core import sockets, pose_buffer, tree_hash
 
 
 def register():
@@ -19,8 +19,7 @@ def _on_node_prop_update(self, context):
     except Exception: pass
 
     try:
-        nt = getattr(self, "id_data", None)
-        if nt: nt.update_tag()
+        tree_hash.node_changed(self)
     except Exception: pass
 
     try:
@@ -100,12 +99,8 @@ class DefineBonePropertyNode(_BoneProperty):
     def update(self): super().update()
 
     def evaluate(self, tree, scene, ctx):
-        arm_ob, bone_name = self.socket_bone_ref("Bone")
-        if not arm_ob or getattr(arm_ob, "type", "") != "ARMATURE" or not bone_name:
-            return
-
-        pbone = arm_ob.pose.bones.get(bone_name)
-        if not pbone:
+        arm_ob, bone_name, pbone = self.socket_pose_bone(tree, "Bone", ctx)
+        if pbone is None:
             return
 
         spec = self._selected_property_spec()
@@ -161,12 +156,14 @@ class DefineBonePropertyNode(_BoneProperty):
                 last_value = state.get("last_value")
                 start_value = state.get("start_value", current_value)
                 if _values_equal_for_kind(kind, current_value, last_value):
+                    pose_buffer.note_property_write()
                     restore_value = self._coerce_for_kind(start_value, kind, start_value)
                     if self._uses_array_value_sockets(kind, restore_value):
                         restore_value = self._array_defaults(kind, restore_value)
                     try:
-                        if self._write_property_value(pbone, spec, restore_value):
-                            ctx.touched_armatures.add(arm_ob)
+                        if not _values_equal_for_kind(kind, current_value, restore_value):
+                            if self._write_property_value(pbone, spec, restore_value):
+                                ctx.touched_armatures.add(arm_ob)
                     except Exception:
                         pass
             ctx.pose_cache.pop(cache_key, None)
@@ -212,11 +209,15 @@ class DefineBonePropertyNode(_BoneProperty):
             value_out = _clone_value(target if t >= 1.0 else start_value)
 
         try:
-            if not self._write_property_value(pbone, spec, value_out): return
+            pose_buffer.note_property_write()
+            # Haltewert: Property hat den Wert schon -> kein Schreiben, kein Depsgraph-Tag
+            unchanged = _values_equal_for_kind(kind, current_value, value_out)
+            if not unchanged and not self._write_property_value(pbone, spec, value_out): return
             state["last_value"] = _clone_value(value_out)
             ctx.pose_cache[cache_key] = state
             runtime_cache[cache_key] = state
-            ctx.touched_armatures.add(arm_ob)
+            if not unchanged:
+                ctx.touched_armatures.add(arm_ob)
         except Exception: pass
 
     def _ensure_socket(self): self._ensure_value_socket()
@@ -537,12 +538,8 @@ class ReadBonePropertyNode(_BoneProperty):
 
     def update(self): super().update()
     def evaluate(self, tree, scene, ctx):
-        arm_ob, bone_name = self.socket_bone_ref("Bone")
-        if not arm_ob or getattr(arm_ob, "type", "") != "ARMATURE" or not bone_name:
-            return
-
-        pbone = arm_ob.pose.bones.get(bone_name)
-        if not pbone:
+        arm_ob, bone_name, pbone = self.socket_pose_bone(tree, "Bone", ctx)
+        if pbone is None:
             return
 
         spec = self._selected_property_spec()
@@ -1,11 +1,18 @@
 # animation_graph/Nodes/bone_transform_node.py
 
+import math
+
 import bpy
+import numpy as np
 from bpy.types import Node
 from bpy.props import EnumProperty
 from mathutils import Vector, Euler, Matrix, Quaternion
 
 from .Mixin import AnimGraphNodeMixin
+from ..Core.eval_plan import coerce_vector
+from ..Core import pose_buffer, playback_cache, tree_hash
+from ..Core.helper_methoden import action_input_revision
+from . import easing, noise, spring
 
 
 def register():
@@ -16,60 +23,281 @@ def unregister():
 # -----------------------------
 # small utilities (module-local)
 # -----------------------------
-def _apply_easing(t, easing):
-    if easing in {"AUTO", "EASE_IN_OUT"}:
-        return t * t * (3.0 - 2.0 * t)  # smoothstep
-    if easing == "EASE_IN":
-        return t * t
-    if easing == "EASE_OUT":
-        u = 1.0 - t
-        return 1.0 - (u * u)
-    return t
-
-def _interp_factor(t, interpolation, easing):
-    if interpolation == "CONSTANT":
-        return 1.0 if t >= 1.0 else 0.0
-    if interpolation == "LINEAR":
-        return t
-    return _apply_easing(t, easing)
-
 def _capture_start_pose(pbone):
     rot_mode = pbone.rotation_mode
     if rot_mode == "QUATERNION":
         rot = pbone.rotation_quaternion.copy()
+        rot_q = rot.copy()
     else:
         rot = pbone.rotation_euler.copy()
+        rot_q = rot.to_quaternion()
     return {
         "loc": pbone.location.copy(),
         "scale": pbone.scale.copy(),
         "rot_mode": rot_mode,
         "rot": rot,
+        # Start-Rotation einmal pro Segment als Quaternion (nicht pro Frame umrechnen)
+        "rot_q": rot_q,
         "mat": pbone.matrix_basis.copy(),
     }
 
-def _rotation_target_from_euler(state, rot_vec, mode):
-    e = Euler((rot_vec.x, rot_vec.y, rot_vec.z), "XYZ")
+def _capture_transform_state(pbone):
+    """
+    Startpose plus vorallokierte Ziel-/Ausgabepuffer für DefineBoneTransformNode.
+    Pro Frame wird nur in diese Puffer geschrieben; neue mathutils-Objekte entstehen
+    nur, wenn sich die Inputs ändern (Ziel neu berechnen).
+    """
+    state = _capture_start_pose(pbone)
+    state.update({
+        # Quelle der aktuellen Ziele: representation/apply_mode + Input-Werte
+        "target_rep": None,
+        "target_mode": None,
+        "target_in": [0.0] * 9,
+        "target_mat": None,
+        "euler_in": Euler((0.0, 0.0, 0.0), "XYZ"),
+        # Ziele
+        "loc_t": state["loc"].copy(),
+        "scale_t": state["scale"].copy(),
+        "rot_t": state["rot"].copy(),
+        "rot_t_q": state["rot_q"].copy(),
+        # Ausgaben
+        "out_loc": state["loc"].copy(),
+        "out_scale": state["scale"].copy(),
+        "out_rot": state["rot"].copy(),
+        "out_rot_q": state["rot_q"].copy(),
+    })
+    return state
+
+def _store3(buf, i, v):
+    """v (3 Komponenten) nach buf[i:i+3] schreiben; True, wenn sich etwas geändert hat."""
+    x, y, z = v[0], v[1], v[2]
+    if buf[i] == x and buf[i + 1] == y and buf[i + 2] == z:
+        return False
+    buf[i] = x
+    buf[i + 1] = y
+    buf[i + 2] = z
+    return True
+
+def _read_vec3(node, tree, name, scene, ctx, fallback):
+    # Rohwert lesen: Vector/Euler/bpy_prop_array lassen sich direkt indizieren,
+    # ohne pro Frame einen Vector zu bauen.
+    v, _convert = node._read_input(tree, name, scene, ctx, "VECTOR")
+    try:
+        if len(v) >= 3:
+            return v
+    except Exception:
+        pass
+    return coerce_vector(v, fallback)
+
+def _lerp_into(out, a, b, f):
+    g = 1.0 - f
+    out[0] = g * a[0] + f * b[0]
+    out[1] = g * a[1] + f * b[1]
+    out[2] = g * a[2] + f * b[2]
+
+def _slerp_into(out, a, b, f):
+    # wie Quaternion.slerp (kürzester Weg, lineare Interpolation bei fast gleichen Rotationen)
+    cosom = a[0] * b[0] + a[1] * b[1] + a[2] * b[2] + a[3] * b[3]
+    sign = 1.0
+    if cosom < 0.0:
+        cosom = -cosom
+        sign = -1.0
+
+    if cosom < 1.0 - 1e-4:
+        omega = math.acos(cosom)
+        sinom = math.sin(omega)
+        w0 = math.sin((1.0 - f) * omega) / sinom
+        w1 = sign * math.sin(f * omega) / sinom
+    else:
+        w0 = 1.0 - f
+        w1 = sign * f
+
+    out[0] = w0 * a[0] + w1 * b[0]
+    out[1] = w0 * a[1] + w1 * b[1]
+    out[2] = w0 * a[2] + w1 * b[2]
+    out[3] = w0 * a[3] + w1 * b[3]
+
+def _update_component_targets(state, mode):
+    inp = state["target_in"]
+    loc_t = state["loc_t"]
+    scale_t = state["scale_t"]
+
+    if mode == "TO":
+        loc_t[0], loc_t[1], loc_t[2] = inp[0], inp[1], inp[2]
+        scale_t[0], scale_t[1], scale_t[2] = inp[6], inp[7], inp[8]
+    else:
+        sl = state["loc"]
+        ss = state["scale"]
+        loc_t[0], loc_t[1], loc_t[2] = sl[0] + inp[0], sl[1] + inp[1], sl[2] + inp[2]
+        scale_t[0], scale_t[1], scale_t[2] = ss[0] * inp[6], ss[1] * inp[7], ss[2] * inp[8]
 
     if state["rot_mode"] == "QUATERNION":
+        e = state["euler_in"]
+        e[0], e[1], e[2] = inp[3], inp[4], inp[5]
         dq = e.to_quaternion()
-        return dq if mode == "TO" else (Quaternion(state["rot"]) @ dq)
+        state["rot_t"][:] = dq if mode == "TO" else (state["rot_q"] @ dq)
+        return
 
+    rot_t = state["rot_t"]
     if mode == "TO":
-        return e
-    sr = state["rot"]
-    return Euler((sr.x + e.x, sr.y + e.y, sr.z + e.z), sr.order)
+        rot_t[0], rot_t[1], rot_t[2] = inp[3], inp[4], inp[5]
+    else:
+        sr = state["rot"]
+        rot_t[0], rot_t[1], rot_t[2] = sr[0] + inp[3], sr[1] + inp[4], sr[2] + inp[5]
 
-def _mix_rotation(state, rot_target, f):
-    if state["rot_mode"] == "QUATERNION":
-        return Quaternion(state["rot"]).slerp(Quaternion(rot_target), f)
+def _update_matrix_targets(state, m_in, mode):
+    m_t = m_in if mode == "TO" else (state["mat"] @ m_in)
+    loc_t, rot_t_q, scale_t = m_t.decompose()
+
+    state["loc_t"][:] = loc_t
+    state["rot_t_q"][:] = rot_t_q
+    state["scale_t"][:] = scale_t
+    state["target_mat"] = m_in.copy()
 
-    sr = state["rot"]
-    tr = rot_target
-    return Euler((
-        (1.0 - f) * sr.x + f * tr.x,
-        (1.0 - f) * sr.y + f * tr.y,
-        (1.0 - f) * sr.z + f * tr.z,
-    ), sr.order)
+# -----------------------------
+# bone set (vektorisiert, eine Zeile pro Bone)
+# -----------------------------
+def _quat_mul_rows(a, b):
+    """Zeilenweises Quaternion-Produkt a @ b, (N, 4) in w, x, y, z."""
+    aw, ax, ay, az = a[:, 0], a[:, 1], a[:, 2], a[:, 3]
+    bw, bx, by, bz = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+    return np.stack((
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ), axis=1)
+
+def _slerp_rows(a, b, f):
+    """_slerp_into für (N, 4)-Arrays und Faktoren f (N,)."""
+    cosom = np.einsum("ij,ij->i", a, b)
+    sign = np.where(cosom < 0.0, -1.0, 1.0)
+    cosom = np.abs(cosom)
+
+    far = cosom < 1.0 - 1e-4
+    omega = np.arccos(np.where(far, cosom, 0.0))
+    sinom = np.where(far, np.sin(omega), 1.0)
+    w0 = np.where(far, np.sin((1.0 - f) * omega) / sinom, 1.0 - f)
+    w1 = sign * np.where(far, np.sin(f * omega) / sinom, f)
+    return w0[:, None] * a + w1[:, None] * b
+
+def _capture_set_state(pbones):
+    modes = [pb.rotation_mode for pb in pbones]
+    quat = np.array([m == "QUATERNION" for m in modes], dtype=np.bool_)
+    rot_q = []
+    for pb, is_q in zip(pbones, quat):
+        rot_q.append(tuple(pb.rotation_quaternion) if is_q else tuple(pb.rotation_euler.to_quaternion()))
+    return {
+        "pbones": pbones,
+        "modes": modes,
+        "quat": quat,
+        "loc": np.array([tuple(pb.location) for pb in pbones], dtype=np.float64),
+        "scale": np.array([tuple(pb.scale) for pb in pbones], dtype=np.float64),
+        "rot_q": np.array(rot_q, dtype=np.float64),
+        "rot_e": np.array([tuple(pb.rotation_euler) for pb in pbones], dtype=np.float64),
+        # Quelle der aktuellen Ziele: apply_mode + Input-Werte
+        "target_key": None,
+    }
+
+def _update_set_targets(state, key):
+    mode, inp = key[0], key[1:]
+    pos = np.array(inp[0:3], dtype=np.float64)
+    rot = inp[3:6]
+    scl = np.array(inp[6:9], dtype=np.float64)
+    dq = np.array(tuple(Euler(rot, "XYZ").to_quaternion()), dtype=np.float64)
+    n = len(state["modes"])
+
+    if mode == "TO":
+        state["loc_t"] = np.broadcast_to(pos, (n, 3))
+        state["scale_t"] = np.broadcast_to(scl, (n, 3))
+        state["rot_e_t"] = np.broadcast_to(np.array(rot, dtype=np.float64), (n, 3))
+        state["rot_q_t"] = np.broadcast_to(dq, (n, 4))
+    else:
+        state["loc_t"] = state["loc"] + pos
+        state["scale_t"] = state["scale"] * scl
+        state["rot_e_t"] = state["rot_e"] + np.array(rot, dtype=np.float64)
+        state["rot_q_t"] = _quat_mul_rows(state["rot_q"], np.broadcast_to(dq, (n, 4)))
+    state["target_key"] = key
+
+def _euler_rows_to_quat(e):
+    """(N, 3) XYZ-Euler -> (N, 4) Quaternionen in w, x, y, z."""
+    h = e * 0.5
+    cx, cy, cz = np.cos(h[:, 0]), np.cos(h[:, 1]), np.cos(h[:, 2])
+    sx, sy, sz = np.sin(h[:, 0]), np.sin(h[:, 1]), np.sin(h[:, 2])
+    return np.stack((
+        cx * cy * cz + sx * sy * sz,
+        sx * cy * cz - cx * sy * sz,
+        cx * sy * cz + sx * cy * sz,
+        cx * cy * sz - sx * sy * cz,
+    ), axis=1)
+
+def _refresh_base(arm_ob, state):
+    """
+    Basis-Pose für Nodes, die über der Pose liegen (Noise, Spring): in diesem Frame schon
+    gesetzte Werte (Nodes davor, FCurves), sonst die Basis vom letzten Tick; nie der eigene
+    Wert vom Frame davor.
+    """
+    base = state["base"]
+    for i, pb in enumerate(state["pbones"]):
+        v = pose_buffer.frame_value(arm_ob, pb)
+        if v is not None:
+            base[i] = v
+        elif base[i] is None:
+            base[i] = pose_buffer.read_transform(pb)
+
+def _release_layer(arm_ob, state, ctx):
+    """Eigenen Anteil einmal zurücknehmen: Basis-Pose schreiben."""
+    _refresh_base(arm_ob, state)
+    base = state["base"]
+    if pose_buffer.write_transforms(
+        arm_ob, state["pbones"], [b[0] for b in base],
+        [b[1] for b in base], [b[2] for b in base], [b[3] for b in base],
+    ):
+        ctx.touched_armatures.add(arm_ob)
+
+def _fade_weight(frame, start, end, fade):
+    if fade <= 0:
+        return 1.0
+    w = min(frame - start, end - frame) / float(fade)
+    w = min(1.0, max(0.0, w))
+    return w * w * (3.0 - 2.0 * w)
+
+def _basis_matrix(rot_mode, loc, rot, scale):
+    if rot_mode == "QUATERNION":
+        r = Quaternion(rot)
+    else:
+        r = Euler(rot[:3], rot_mode if len(rot_mode) == 3 else "XYZ")
+    return Matrix.LocRotScale(Vector(loc), r, Vector(scale))
+
+def _chain_pose(arm_ob, state):
+    """
+    Pose-Space-Matrizen der Set-Bones aus den Basis-Kanälen dieses Frames (pbone.matrix stimmt
+    erst nach dem nächsten Depsgraph-Update). -> [(Parent-Frame, Pose-Matrix)] je Bone.
+    """
+    base_by_name = {pb.name: b for pb, b in zip(state["pbones"], state["base"])}
+    rest = state["rest"]
+    memo = {}
+
+    def frame_of(pb):
+        # Parent-Pose @ Rest relativ zum Parent (Pose-Matrix ohne matrix_basis)
+        rel = rest.get(pb.name)
+        if rel is None:
+            parent = pb.parent
+            rel = pb.bone.matrix_local.copy()
+            if parent is not None:
+                rel = parent.bone.matrix_local.inverted() @ rel
+            rest[pb.name] = rel
+        parent = pb.parent
+        return rel if parent is None else pose_of(parent) @ rel
+
+    def pose_of(pb):
+        m = memo.get(pb.name)
+        if m is None:
+            ch = base_by_name.get(pb.name) or pose_buffer.frame_value(arm_ob, pb) or pose_buffer.read_transform(pb)
+            m = memo[pb.name] = frame_of(pb) @ _basis_matrix(*ch)
+        return m
+
+    return [(frame_of(pb), pose_of(pb)) for pb in state["pbones"]]
 
 def _on_node_prop_update(self, context):
     try:
@@ -78,9 +306,7 @@ def _on_node_prop_update(self, context):
         pass
 
     try:
-        nt = getattr(self, "id_data", None)
-        if nt:
-            nt.update_tag()
+        tree_hash.node_changed(self)
     except Exception:
         pass
 
@@ -151,31 +377,10 @@ class _BoneTransform(Node, AnimGraphNodeMixin):
         col.prop(self, "apply_mode", text="")
 
 
-class DefineBoneTransformNode(_BoneTransform):
+class DefineBoneTransformNode(easing.EasingMixin, _BoneTransform):
     bl_idname = "DefineBoneTransformNode"
     bl_label = "Transform Bone"
 
-    interpolation: EnumProperty(
-        name="Interpolation",
-        items=[
-            ("CONSTANT", "Constant", "Jump at end"),
-            ("LINEAR", "Linear", "Linear transition"),
-            ("BEZIER", "Bezier", "Smooth (with easing)"),
-        ],
-        default="BEZIER",
-    )
-
-    easing: EnumProperty(
-        name="Easing",
-        items=[
-            ("AUTO", "Auto", "Default (Ease In/Out-ish)"),
-            ("EASE_IN", "Ease In", "Slow start, then faster"),
-            ("EASE_OUT", "Ease Out", "Fast start, then slower"),
-            ("EASE_IN_OUT", "Ease In/Out", "Slow start & end"),
-        ],
-        default="AUTO",
-    )
-
     def update_representation(self, context): self.update()
     def update_mode(self, context): self.update()
 
@@ -212,17 +417,11 @@ class DefineBoneTransformNode(_BoneTransform):
     def draw_buttons(self, context, layout):
         super().draw_buttons(context, layout)
         layout.separator()
-        col = layout.column(align=True)
-        col.prop(self, "interpolation")
-        col.prop(self, "easing")
+        self.draw_easing(layout)
 
     def evaluate(self, tree, scene, ctx):
-        arm_ob, bone_name = self.socket_bone_ref("Bone")
-        if not arm_ob or arm_ob.type != "ARMATURE" or not bone_name:
-            return
-
-        pbone = arm_ob.pose.bones.get(bone_name)
-        if not pbone:
+        arm_ob, bone_name, pbone = self.socket_pose_bone(tree, "Bone", ctx)
+        if pbone is None:
             return
 
         # deterministisch: alles als int frames
@@ -265,81 +464,65 @@ class DefineBoneTransformNode(_BoneTransform):
             if t < 0.0: t = 0.0
             if t > 1.0: t = 1.0
 
-        f = _interp_factor(t,
-                           getattr(self, "interpolation", "BEZIER"),
-                           getattr(self, "easing", "AUTO"))
+        f = self.interp_factor(t)
 
         state = ctx.pose_cache.get(cache_key)
         if state is None:
-            state = _capture_start_pose(pbone)
+            state = _capture_transform_state(pbone)
             ctx.pose_cache[cache_key] = state
 
         rep = getattr(self, "representation", "COMPONENTS")
         mode = getattr(self, "apply_mode", "TO")
+        retarget = (state["target_rep"] != rep or state["target_mode"] != mode)
 
         if rep == "MATRIX":
             m_in = self.socket_matrix(tree, "Matrix", scene, ctx, None)
             if m_in is None:
-                ctx.touched_armatures.add(arm_ob)
                 return
 
-            m_t = m_in if mode == "TO" else (state["mat"] @ m_in)
-            try:
-                loc_t, rot_t_q, scale_t = m_t.decompose()
-            except Exception:
+            if retarget or state["target_mat"] != m_in:
+                try:
+                    _update_matrix_targets(state, m_in, mode)
+                except Exception:
+                    return
+                state["target_rep"] = rep
+                state["target_mode"] = mode
+
+            out_q = state["out_rot_q"]
+            _slerp_into(out_q, state["rot_q"], state["rot_t_q"], f)
+            _lerp_into(state["out_loc"], state["loc"], state["loc_t"], f)
+            _lerp_into(state["out_scale"], state["scale"], state["scale_t"], f)
+
+            # Unveränderte Kanäle (Haltepose) werden nicht neu geschrieben/getaggt.
+            if pose_buffer.write_transform(arm_ob, pbone, state["out_loc"], "QUATERNION", out_q, state["out_scale"]):
                 ctx.touched_armatures.add(arm_ob)
-                return
-
-            if state["rot_mode"] == "QUATERNION":
-                start_q = Quaternion(state["rot"])
-            else:
-                start_q = Euler(state["rot"]).to_quaternion()
-
-            rot_q = start_q.slerp(rot_t_q, f)
-            loc = state["loc"].lerp(loc_t, f)
-            scale = state["scale"].lerp(scale_t, f)
-
-            pbone.location = loc
-            pbone.scale = scale
-            pbone.rotation_mode = "QUATERNION"
-            pbone.rotation_quaternion = rot_q
-
-            ctx.touched_armatures.add(arm_ob)
             return
 
         # COMPONENTS
-        pos = self.socket_vector(tree, "Translation", scene, ctx, (0.0, 0.0, 0.0))
-        rot_e = self.socket_vector(tree, "Rotation", scene, ctx, (0.0, 0.0, 0.0))
-        scl = self.socket_vector(tree, "Scale", scene, ctx, (1.0, 1.0, 1.0))
-
-        if mode == "TO":
-            loc_t = pos
-            scale_t = scl
-            rot_t = _rotation_target_from_euler(state, rot_e, mode="TO")
-        else:
-            loc_t = state["loc"] + pos
-            scale_t = Vector((
-                state["scale"].x * scl.x,
-                state["scale"].y * scl.y,
-                state["scale"].z * scl.z,
-            ))
-            rot_t = _rotation_target_from_euler(state, rot_e, mode="DELTA")
+        pos = _read_vec3(self, tree, "Translation", scene, ctx, (0.0, 0.0, 0.0))
+        rot_e = _read_vec3(self, tree, "Rotation", scene, ctx, (0.0, 0.0, 0.0))
+        scl = _read_vec3(self, tree, "Scale", scene, ctx, (1.0, 1.0, 1.0))
 
-        loc = state["loc"].lerp(loc_t, f)
-        scale = state["scale"].lerp(scale_t, f)
-        rot = _mix_rotation(state, rot_t, f)
+        inp = state["target_in"]
+        changed = _store3(inp, 0, pos) | _store3(inp, 3, rot_e) | _store3(inp, 6, scl)
+        if retarget or changed:
+            _update_component_targets(state, mode)
+            state["target_rep"] = rep
+            state["target_mode"] = mode
+            state["target_mat"] = None
 
-        pbone.location = loc
-        pbone.scale = scale
+        _lerp_into(state["out_loc"], state["loc"], state["loc_t"], f)
+        _lerp_into(state["out_scale"], state["scale"], state["scale_t"], f)
 
         if state["rot_mode"] == "QUATERNION":
-            pbone.rotation_mode = "QUATERNION"
-            pbone.rotation_quaternion = rot
+            out_rot = state["out_rot_q"]
+            _slerp_into(out_rot, state["rot_q"], state["rot_t"], f)
         else:
-            pbone.rotation_mode = state["rot_mode"]
-            pbone.rotation_euler = rot
+            out_rot = state["out_rot"]
+            _lerp_into(out_rot, state["rot"], state["rot_t"], f)
 
-        ctx.touched_armatures.add(arm_ob)
+        if pose_buffer.write_transform(arm_ob, pbone, state["out_loc"], state["rot_mode"], out_rot, state["out_scale"]):
+            ctx.touched_armatures.add(arm_ob)
 
 
 class ReadBoneTransformNode(_BoneTransform):
@@ -373,11 +556,8 @@ class ReadBoneTransformNode(_BoneTransform):
         if "Duration" in ins: ins["Duration"].hide = not use_delta
 
     def evaluate(self, tree, scene, ctx):
-        arm_ob, bone_name = self.socket_bone_ref("Bone")
-        if not arm_ob or arm_ob.type != "ARMATURE" or not bone_name: return
-
-        pbone = arm_ob.pose.bones.get(bone_name)
-        if not pbone: return
+        arm_ob, bone_name, pbone = self.socket_pose_bone(tree, "Bone", ctx)
+        if pbone is None: return
 
         # Bone length (rest bone)
         out_len = self.outputs.get("Length")
@@ -433,10 +613,7 @@ class ReadBoneTransformNode(_BoneTransform):
             ))
 
             # Rotation delta: q_delta = q_start^-1 * q_cur
-            if state["rot_mode"] == "QUATERNION": start_q = Quaternion(state["rot"])
-            else: start_q = Euler(state["rot"]).to_quaternion()
-
-            cur_rot_q = start_q.inverted() @ cur_rot_q
+            cur_rot_q = state["rot_q"].inverted() @ cur_rot_q
 
             # Matrix delta (approx): M_delta = M_start^-1 * M_cur
             try: cur_mat = state["mat"].inverted() @ cur_mat
@@ -464,7 +641,391 @@ class ReadBoneTransformNode(_BoneTransform):
             except Exception:
                 out_r.default_value = (0.0, 0.0, 0.0)
 
+class DefineBoneSetTransformNode(easing.EasingMixin, Node, AnimGraphNodeMixin):
+    """Transform Bone für ein ganzes Bone Set: ein Node, eine Auswertung, ein Pose-Write pro Kanal."""
+    bl_idname = "DefineBoneSetTransformNode"
+    bl_label = "Transform Bone Set"
+    bl_icon = "CON_TRANSFORM"
+
+    apply_mode: EnumProperty(
+        name="Apply",
+        items=[
+            ("TO", "To (Absolute)", "Use absolute transform"),
+            ("DELTA", "Delta", "Use delta relative to start"),
+        ],
+        default="TO",
+        update=_on_node_prop_update,
+    )
+
+    def init(self, context):
+        self.inputs.new("NodeSocketBoneSet", "Bones")
+        s = self.inputs.new("NodeSocketInt", "Start")
+        d = self.inputs.new("NodeSocketInt", "Duration")
+        o = self.inputs.new("NodeSocketInt", "Offset")
+        fo = self.inputs.new("NodeSocketFloat", "Falloff")
+        p = self.inputs.new("NodeSocketVectorTranslation", "Translation")
+        r = self.inputs.new("NodeSocketRotation", "Rotation")
+        sc = self.inputs.new("NodeSocketVectorXYZ", "Scale")
+        try:
+            s.default_value = 0
+            d.default_value = 10
+            o.default_value = 0
+            fo.default_value = 0.0
+            p.default_value = (0.0, 0.0, 0.0)
+            r.default_value = (0.0, 0.0, 0.0)
+            sc.default_value = (1.0, 1.0, 1.0)
+        except Exception:
+            pass
+
+        self.outputs.new("NodeSocketInt", "End")
+
+    def draw_buttons(self, context, layout):
+        col = layout.column(align=True)
+        col.prop(self, "apply_mode", text="")
+        layout.separator()
+        self.draw_easing(layout)
+
+    def evaluate(self, tree, scene, ctx):
+        arm_ob, names = self.socket_bone_set("Bones", ctx)
+        if not arm_ob or not names:
+            return
+
+        start = int(self.socket_int(tree, "Start", scene, ctx, 0))
+        duration = int(self.socket_int(tree, "Duration", scene, ctx, 10))
+        # Offset: Bone i startet i * Offset Frames nach Start (Welle entlang der Kette)
+        offset = max(0, int(self.socket_int(tree, "Offset", scene, ctx, 0)))
+        frame = int(scene.frame_current)
+
+        end_value = start + max(0, duration) + offset * (len(names) - 1)
+
+        out_end = self.outputs.get("End")
+        if out_end:
+            try:
+                out_end.default_value = int(end_value)
+            except Exception:
+                pass
+        self.set_output_value(ctx, "End", int(end_value))
+
+        cache_key = (
+            tree.as_pointer(),
+            self.as_pointer(),
+            arm_ob.as_pointer(),
+            names,
+            start,
+            duration,
+            offset,
+        )
+
+        if frame < start:
+            ctx.pose_cache.pop(cache_key, None)
+            return
+
+        state = ctx.pose_cache.get(cache_key)
+        if state is None:
+            pose_bones = arm_ob.pose.bones
+            pbones = [pb for pb in (pose_bones.get(name) for name in names) if pb is not None]
+            if not pbones:
+                return
+            state = _capture_set_state(pbones)
+            ctx.pose_cache[cache_key] = state
+
+        pos = _read_vec3(self, tree, "Translation", scene, ctx, (0.0, 0.0, 0.0))
+        rot_e = _read_vec3(self, tree, "Rotation", scene, ctx, (0.0, 0.0, 0.0))
+        scl = _read_vec3(self, tree, "Scale", scene, ctx, (1.0, 1.0, 1.0))
+        key = (
+            getattr(self, "apply_mode", "TO"),
+            pos[0], pos[1], pos[2], rot_e[0], rot_e[1], rot_e[2], scl[0], scl[1], scl[2],
+        )
+        if state["target_key"] != key:
+            _update_set_targets(state, key)
+
+        # time -> [0..1] pro Bone
+        n = len(state["modes"])
+        starts = start + offset * np.arange(n, dtype=np.float64)
+        if duration <= 0:
+            t = (frame >= starts).astype(np.float64)
+        else:
+            t = np.clip((frame - starts) / float(duration), 0.0, 1.0)
+
+        f = self.interp_factors(t)
+        falloff = self.socket_float(tree, "Falloff", scene, ctx, 0.0)
+        if falloff and n > 1:
+            # Gewicht 1 am ersten Bone bis 1 - Falloff am letzten
+            f = f * (1.0 - falloff * np.linspace(0.0, 1.0, n))
+        fc = f[:, None]
+
+        loc0, scale0 = state["loc"], state["scale"]
+        out_loc = loc0 + (state["loc_t"] - loc0) * fc
+        out_scale = scale0 + (state["scale_t"] - scale0) * fc
+        out_e = state["rot_e"] + (state["rot_e_t"] - state["rot_e"]) * fc
+        out_q = _slerp_rows(state["rot_q"], state["rot_q_t"], f)
+
+        rots = [
+            q if is_q else e
+            for is_q, q, e in zip(state["quat"].tolist(), out_q.tolist(), out_e.tolist())
+        ]
+        if pose_buffer.write_transforms(
+            arm_ob, state["pbones"], state["modes"], out_loc.tolist(), rots, out_scale.tolist()
+        ):
+            ctx.touched_armatures.add(arm_ob)
+
+
+class DefineBoneSetNoiseNode(Node, AnimGraphNodeMixin):
+    """Glatte, seedbare Noise auf einem Bone Set (Atmen, Idle-Wackeln), ein NumPy-Durchlauf pro Frame."""
+    bl_idname = "DefineBoneSetNoiseNode"
+    bl_label = "Bone Set Noise"
+    bl_icon = "MOD_NOISE"
+
+    def init(self, context):
+        self.inputs.new("NodeSocketBoneSet", "Bones")
+        s = self.inputs.new("NodeSocketInt", "Start")
+        d = self.inputs.new("NodeSocketInt", "Duration")
+        fa = self.inputs.new("NodeSocketInt", "Fade")
+        se = self.inputs.new("NodeSocketInt", "Seed")
+        sp = self.inputs.new("NodeSocketFloat", "Speed")
+        oc = self.inputs.new("NodeSocketInt", "Octaves")
+        p = self.inputs.new("NodeSocketVectorTranslation", "Translation")
+        r = self.inputs.new("NodeSocketRotation", "Rotation")
+        sc = self.inputs.new("NodeSocketVectorXYZ", "Scale")
+        try:
+            s.default_value = 0
+            d.default_value = 250
+            fa.default_value = 0
+            se.default_value = 0
+            sp.default_value = 0.05
+            oc.default_value = 2
+            p.default_value = (0.0, 0.0, 0.0)
+            r.default_value = (0.05, 0.05, 0.05)
+            sc.default_value = (0.0, 0.0, 0.0)
+        except Exception:
+            pass
+
+        self.outputs.new("NodeSocketInt", "End")
+
+    def evaluate(self, tree, scene, ctx):
+        arm_ob, names = self.socket_bone_set("Bones", ctx)
+        if not arm_ob or not names:
+            return
+
+        start = int(self.socket_int(tree, "Start", scene, ctx, 0))
+        duration = int(self.socket_int(tree, "Duration", scene, ctx, 250))
+        frame = int(scene.frame_current)
+        end_value = start + max(0, duration)
+
+        out_end = self.outputs.get("End")
+        if out_end:
+            try:
+                out_end.default_value = int(end_value)
+            except Exception:
+                pass
+        self.set_output_value(ctx, "End", int(end_value))
+
+        cache_key = (
+            tree.as_pointer(),
+            self.as_pointer(),
+            arm_ob.as_pointer(),
+            names,
+        )
+        state = ctx.pose_cache.get(cache_key)
+
+        if frame < start or frame > end_value:
+            # außerhalb: Noise einmal zurücknehmen
+            if state is not None:
+                ctx.pose_cache.pop(cache_key, None)
+                _release_layer(arm_ob, state, ctx)
+            return
+
+        if state is None:
+            pose_bones = arm_ob.pose.bones
+            pbones = [pb for pb in (pose_bones.get(name) for name in names) if pb is not None]
+            if not pbones:
+                return
+            state = {"pbones": pbones, "base": [None] * len(pbones)}
+            ctx.pose_cache[cache_key] = state
+        _refresh_base(arm_ob, state)
+
+        fade = int(self.socket_int(tree, "Fade", scene, ctx, 0))
+        w = _fade_weight(frame, start, end_value, fade)
+        pos = _read_vec3(self, tree, "Translation", scene, ctx, (0.0, 0.0, 0.0))
+        rot = _read_vec3(self, tree, "Rotation", scene, ctx, (0.0, 0.0, 0.0))
+        scl = _read_vec3(self, tree, "Scale", scene, ctx, (0.0, 0.0, 0.0))
+        amp = np.array((*pos[:3], *rot[:3], *scl[:3]), dtype=np.float64) * w
+
+        # Zeit inkl. Subframe (Motion Blur); nur vom Frame abhängig, nicht vom Verlauf
+        time = frame + float(getattr(scene, "frame_subframe", 0.0))
+        seed = int(self.socket_int(tree, "Seed", scene, ctx, 0))
+        speed = self.socket_float(tree, "Speed", scene, ctx, 0.05)
+        octaves = min(8, max(1, int(self.socket_int(tree, "Octaves", scene, ctx, 2))))
+
+        base = state["base"]
+        n = len(base)
+        # 9 Zeilen pro Bone (Translation, Rotation, Scale je XYZ); Seed pro Bone über die Zeile
+        offsets, phases = noise.row_keys(seed, n * 9)
+        v = noise.fbm(time, speed, octaves, offsets, phases).reshape(n, 9) * amp
+
+        modes = [b[0] for b in base]
+        quat = [m == "QUATERNION" for m in modes]
+        out_loc = np.array([b[1] for b in base], dtype=np.float64) + v[:, 0:3]
+        out_scale = np.array([b[3] for b in base], dtype=np.float64) + v[:, 6:9]
+        rot_q = np.array([b[2] if is_q else (1.0, 0.0, 0.0, 0.0) for b, is_q in zip(base, quat)], dtype=np.float64)
+        rot_e = np.array([(0.0, 0.0, 0.0) if is_q else b[2] for b, is_q in zip(base, quat)], dtype=np.float64)
+        out_q = _quat_mul_rows(rot_q, _euler_rows_to_quat(v[:, 3:6]))
+        out_e = rot_e + v[:, 3:6]
+
+        rots = [q if is_q else e for is_q, q, e in zip(quat, out_q.tolist(), out_e.tolist())]
+        if pose_buffer.write_transforms(
+            arm_ob, state["pbones"], modes, out_loc.tolist(), rots, out_scale.tolist()
+        ):
+            ctx.touched_armatures.add(arm_ob)
+
+
+class DefineBoneSetSpringNode(Node, AnimGraphNodeMixin):
+    """Feder-/Jiggle-Dynamik auf Bone-Ketten: Verlet-Simulation mit festen Substeps und Checkpoints."""
+    bl_idname = "DefineBoneSetSpringNode"
+    bl_label = "Bone Set Spring"
+    bl_icon = "FORCE_HARMONIC"
+
+    def init(self, context):
+        self.inputs.new("NodeSocketBoneSet", "Bones")
+        s = self.inputs.new("NodeSocketInt", "Start")
+        d = self.inputs.new("NodeSocketInt", "Duration")
+        st = self.inputs.new("NodeSocketFloat", "Stiffness")
+        da = self.inputs.new("NodeSocketFloat", "Damping")
+        g = self.inputs.new("NodeSocketVectorXYZ", "Gravity")
+        su = self.inputs.new("NodeSocketInt", "Substeps")
+        ck = self.inputs.new("NodeSocketInt", "Checkpoint")
+        try:
+            s.default_value = 0
+            d.default_value = 250
+            st.default_value = 60.0
+            da.default_value = 4.0
+            g.default_value = (0.0, 0.0, 0.0)
+            su.default_value = 4
+            ck.default_value = 10
+        except Exception:
+            pass
+
+        self.outputs.new("NodeSocketInt", "End")
+
+    def evaluate(self, tree, scene, ctx):
+        arm_ob, names = self.socket_bone_set("Bones", ctx)
+        if not arm_ob or not names:
+            return
+
+        start = int(self.socket_int(tree, "Start", scene, ctx, 0))
+        duration = int(self.socket_int(tree, "Duration", scene, ctx, 250))
+        frame = int(scene.frame_current)
+        end_value = start + max(0, duration)
+
+        out_end = self.outputs.get("End")
+        if out_end:
+            try:
+                out_end.default_value = int(end_value)
+            except Exception:
+                pass
+        self.set_output_value(ctx, "End", int(end_value))
+
+        cache_key = (
+            tree.as_pointer(),
+            self.as_pointer(),
+            arm_ob.as_pointer(),
+            names,
+        )
+        state = ctx.pose_cache.get(cache_key)
+
+        if frame < start or frame > end_value:
+            if state is not None:
+                ctx.pose_cache.pop(cache_key, None)
+                _release_layer(arm_ob, state, ctx)
+            return
+
+        if state is None:
+            pose_bones = arm_ob.pose.bones
+            pbones = [pb for pb in (pose_bones.get(name) for name in names) if pb is not None]
+            if not pbones:
+                return
+            # Parents vor Children (Ausgabe akkumuliert entlang der Kette)
+            pbones.sort(key=lambda pb: len(pb.parent_recursive))
+            index = {pb.name: i for i, pb in enumerate(pbones)}
+            state = {
+                "pbones": pbones,
+                "base": [None] * len(pbones),
+                "parents": np.array(
+                    [index.get(pb.parent.name, -1) if pb.parent else -1 for pb in pbones], dtype=np.int64
+                ),
+                "rest": {},
+                "sim": None,
+            }
+            ctx.pose_cache[cache_key] = state
+        _refresh_base(arm_ob, state)
+
+        pbones = state["pbones"]
+        parents = state["parents"]
+        chain = _chain_pose(arm_ob, state)
+        heads = [m.translation for _frame, m in chain]
+        tails = [m @ Vector((0.0, pb.bone.length, 0.0)) for pb, (_frame, m) in zip(pbones, chain)]
+
+        # Simulation im World Space (Objekt-Bewegung erzeugt Nachschwingen)
+        mw = arm_ob.matrix_world
+        head_w = np.array([tuple(mw @ v) for v in heads], dtype=np.float64)
+        tail_w = np.array([tuple(mw @ v) for v in tails], dtype=np.float64)
+
+        render = scene.render
+        fps = render.fps / (render.fps_base or 1.0)
+        params = spring.SpringParams(
+            self.socket_float(tree, "Stiffness", scene, ctx, 60.0),
+            self.socket_float(tree, "Damping", scene, ctx, 4.0),
+            tuple(_read_vec3(self, tree, "Gravity", scene, ctx, (0.0, 0.0, 0.0))),
+            self.socket_int(tree, "Substeps", scene, ctx, 4),
+            self.socket_int(tree, "Checkpoint", scene, ctx, 10),
+            1.0 / fps if fps > 0.0 else 1.0 / 24.0,
+            start,
+            (tree_hash.content_hash(tree), action_input_revision()),
+        )
+        # Prefetch liest ungeprüfte Bone-Werte: nur eigener Zustand, nichts in den Checkpoint-Speicher
+        pos_w = spring.advance(
+            state, playback_cache.checkpoints(cache_key), frame, start, head_w, tail_w, parents, params,
+            record=not pose_buffer.capturing(),
+        )
+        anchor_w = spring.anchors(pos_w, head_w, tail_w, parents)
+
+        # Zurück in den Pose Space; pro Bone die Rotation, die den animierten Tail auf den
+        # simulierten dreht, entlang der Kette akkumuliert (Children erben die Drehung).
+        mw_inv = mw.inverted_safe()
+        acc = []
+        modes = []
+        rots = []
+        for i, (pb, b, (frame_m, _m)) in enumerate(zip(pbones, state["base"], chain)):
+            p = int(parents[i])
+            acc_p = acc[p] if p >= 0 else Quaternion()
+            sim_dir = (mw_inv @ Vector(pos_w[i])) - (mw_inv @ Vector(anchor_w[i]))
+            anim_dir = acc_p @ (tails[i] - heads[i])
+            q = anim_dir.rotation_difference(sim_dir) if sim_dir.length > 1e-9 else Quaternion()
+            acc.append(q @ acc_p)
+
+            # Drehung q im Pose Space -> in matrix_basis: C^-1 q C mit C = Parent-Frame (inkl. acc_p)
+            c = acc_p @ frame_m.to_quaternion()
+            local = c.inverted() @ q @ c
+            rot_mode, _loc, rot, _scale = b
+            modes.append(rot_mode)
+            if rot_mode == "QUATERNION":
+                rots.append(tuple(local @ Quaternion(rot)))
+            else:
+                order = rot_mode if len(rot_mode) == 3 else "XYZ"
+                e = Euler(rot[:3], order)
+                rots.append(tuple((local @ e.to_quaternion()).to_euler(order, e)))
+
+        base = state["base"]
+        if pose_buffer.write_transforms(
+            arm_ob, pbones, modes, [b[1] for b in base], rots, [b[3] for b in base]
+        ):
+            ctx.touched_armatures.add(arm_ob)
+
+
 _CLASSES = [
     DefineBoneTransformNode,
+    DefineBoneSetTransformNode,
+    DefineBoneSetNoiseNode,
+    DefineBoneSetSpringNode,
     ReadBoneTransformNode,
 ]
@@ -0,0 +1,436 @@
+# animation_graph/Nodes/easing.py
+
+import math
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent, load_post, undo_post, redo_post, depsgraph_update_post, save_pre
+from bpy.props import EnumProperty, FloatVectorProperty, StringProperty
+
+from ..Core import tree_hash
+
+
+def register():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded not in h: h.append(_on_data_reloaded)
+    if _on_depsgraph_update not in depsgraph_update_post: depsgraph_update_post.append(_on_depsgraph_update)
+    if _on_save_pre not in save_pre: save_pre.append(_on_save_pre)
+
+def unregister():
+    for h in (load_post, undo_post, redo_post):
+        if _on_data_reloaded in h: h.remove(_on_data_reloaded)
+    if _on_depsgraph_update in depsgraph_update_post: depsgraph_update_post.remove(_on_depsgraph_update)
+    if _on_save_pre in save_pre: save_pre.remove(_on_save_pre)
+    if bpy.app.timers.is_registered(_on_curve_timer):
+        bpy.app.timers.unregister(_on_curve_timer)
+    _NODE_LUTS.clear()
+    _CURVE_FINGERPRINTS.clear()
+    _CURVE_EDITED.clear()
+
+@persistent
+def _on_data_reloaded(*_args):
+    _NODE_LUTS.clear()
+    _CURVE_FINGERPRINTS.clear()
+
+
+# --------------------------------------------------------------------
+# lookup tables
+# --------------------------------------------------------------------
+# Presets, Bezier-Handles und eigene Kurven werden einmal auf _LUT_SIZE Stützstellen
+# abgetastet; pro Frame kostet das Easing dann eine Index-Rechnung plus lineare
+# Interpolation (bzw. np.interp für ganze Bone-Batches).
+
+_LUT_SIZE = 512
+_LUT_LAST = _LUT_SIZE - 1
+_GRID = np.linspace(0.0, 1.0, _LUT_SIZE)
+
+class EasingLUT:
+    __slots__ = ("values", "array")
+
+    def __init__(self, values):
+        self.array = np.asarray(values, dtype=np.float64)
+        # Python-Liste: Einzelwerte ohne NumPy-Skalar-Overhead
+        self.values = self.array.tolist()
+
+    def sample(self, t):
+        if t <= 0.0:
+            return self.values[0]
+        x = t * _LUT_LAST
+        i = int(x)
+        if i >= _LUT_LAST:
+            return self.values[_LUT_LAST]
+        a = self.values[i]
+        return a + (self.values[i + 1] - a) * (x - i)
+
+    def sample_array(self, t):
+        return np.interp(t, _GRID, self.array)
+
+def _lut_from(fn):
+    return EasingLUT([fn(i / _LUT_LAST) for i in range(_LUT_SIZE)])
+
+
+# -----------------------------
+# presets (easings.net)
+# -----------------------------
+_C1 = 1.70158
+_C2 = _C1 * 1.525
+_C3 = _C1 + 1.0
+_C4 = (2.0 * math.pi) / 3.0
+_C5 = (2.0 * math.pi) / 4.5
+
+def _back_in(t):
+    return _C3 * t * t * t - _C1 * t * t
+
+def _back_out(t):
+    u = t - 1.0
+    return 1.0 + _C3 * u * u * u + _C1 * u * u
+
+def _back_in_out(t):
+    if t < 0.5:
+        u = 2.0 * t
+        return (u * u * ((_C2 + 1.0) * u - _C2)) / 2.0
+    u = 2.0 * t - 2.0
+    return (u * u * ((_C2 + 1.0) * u + _C2) + 2.0) / 2.0
+
+def _elastic_in(t):
+    if t <= 0.0 or t >= 1.0:
+        return t
+    return -(2.0 ** (10.0 * t - 10.0)) * math.sin((10.0 * t - 10.75) * _C4)
+
+def _elastic_out(t):
+    if t <= 0.0 or t >= 1.0:
+        return t
+    return 2.0 ** (-10.0 * t) * math.sin((10.0 * t - 0.75) * _C4) + 1.0
+
+def _elastic_in_out(t):
+    if t <= 0.0 or t >= 1.0:
+        return t
+    if t < 0.5:
+        return -(2.0 ** (20.0 * t - 10.0) * math.sin((20.0 * t - 11.125) * _C5)) / 2.0
+    return (2.0 ** (-20.0 * t + 10.0) * math.sin((20.0 * t - 11.125) * _C5)) / 2.0 + 1.0
+
+def _bounce_out(t):
+    n1, d1 = 7.5625, 2.75
+    if t < 1.0 / d1:
+        return n1 * t * t
+    if t < 2.0 / d1:
+        t -= 1.5 / d1
+        return n1 * t * t + 0.75
+    if t < 2.5 / d1:
+        t -= 2.25 / d1
+        return n1 * t * t + 0.9375
+    t -= 2.625 / d1
+    return n1 * t * t + 0.984375
+
+def _bounce_in(t):
+    return 1.0 - _bounce_out(1.0 - t)
+
+def _bounce_in_out(t):
+    if t < 0.5:
+        return (1.0 - _bounce_out(1.0 - 2.0 * t)) / 2.0
+    return (1.0 + _bounce_out(2.0 * t - 1.0)) / 2.0
+
+_PRESETS = {
+    "BACK_IN": _back_in,
+    "BACK_OUT": _back_out,
+    "BACK_IN_OUT": _back_in_out,
+    "ELASTIC_IN": _elastic_in,
+    "ELASTIC_OUT": _elastic_out,
+    "ELASTIC_IN_OUT": _elastic_in_out,
+    "BOUNCE_IN": _bounce_in,
+    "BOUNCE_OUT": _bounce_out,
+    "BOUNCE_IN_OUT": _bounce_in_out,
+}
+
+# easing -> EasingLUT (für alle Nodes geteilt)
+_PRESET_LUTS = {}
+
+def _preset_lut(easing):
+    lut = _PRESET_LUTS.get(easing)
+    if lut is None:
+        lut = _PRESET_LUTS[easing] = _lut_from(_PRESETS[easing])
+    return lut
+
+# Polynome wie bisher direkt gerechnet (billiger als jede Tabelle)
+def _smoothstep(t):
+    return t * t * (3.0 - 2.0 * t)
+
+def _ease_in(t):
+    return t * t
+
+def _ease_out(t):
+    u = 1.0 - t
+    return 1.0 - (u * u)
+
+_POLYNOMIALS = {
+    "AUTO": _smoothstep,
+    "EASE_IN_OUT": _smoothstep,
+    "EASE_IN": _ease_in,
+    "EASE_OUT": _ease_out,
+}
+
+
+# -----------------------------
+# bezier handles
+# -----------------------------
+def _bezier_lut(x1, y1, x2, y2):
+    """cubic-bezier(x1, y1, x2, y2) von (0, 0) nach (1, 1) als y über x."""
+    u = np.linspace(0.0, 1.0, _LUT_SIZE * 4)
+    v = 1.0 - u
+    xs = 3.0 * v * v * u * x1 + 3.0 * v * u * u * x2 + u * u * u
+    ys = 3.0 * v * v * u * y1 + 3.0 * v * u * u * y2 + u * u * u
+    # x muss für np.interp monoton sein (Handles außerhalb [0, 1] in x)
+    xs = np.maximum.accumulate(np.clip(xs, 0.0, 1.0))
+    return EasingLUT(np.interp(_GRID, xs, ys))
+
+
+# -----------------------------
+# custom curve
+# -----------------------------
+# Blender-Nodes können keine CurveMapping besitzen: jede Kurve liegt als Float-Curve-Node
+# in einer versteckten Node Group, der AnimGraph-Node merkt sich dessen Namen. Die Group hat
+# sonst keine Nutzer und braucht den Fake User, um gespeichert zu werden; beim Speichern
+# werden unbenutzte Kurven entfernt, ohne Custom-Curve-Nodes die ganze Group.
+
+_CURVE_GROUP = ".AnimGraph Easing Curves"
+
+def _curve_node(name, create=False):
+    group = bpy.data.node_groups.get(_CURVE_GROUP)
+    if group is None:
+        if not create:
+            return None
+        group = bpy.data.node_groups.new(_CURVE_GROUP, "ShaderNodeTree")
+        group.use_fake_user = True
+    node = group.nodes.get(name) if name else None
+    if node is None and create:
+        node = group.nodes.new("ShaderNodeFloatCurve")
+    return node
+
+def _curve_fingerprint(curve_node):
+    curve = curve_node.mapping.curves[0]
+    return tuple((p.location[0], p.location[1], p.handle_type) for p in curve.points)
+
+def _curve_lut(curve_node):
+    if curve_node is None:
+        return _lut_from(lambda t: t)
+    mapping = curve_node.mapping
+    mapping.initialize()
+    curve = mapping.curves[0]
+    return _lut_from(lambda t: mapping.evaluate(curve, t))
+
+# Kurven-Edits lösen kein Update am AnimGraph-Node aus. Erkannt werden sie über den
+# Fingerprint der Kurvenpunkte: bei Depsgraph-Updates der Kurven-Group und vor jeder
+# Auswertung mit der Kurven-LUT (auch für nie gezeichnete Nodes, Hintergrund-Render).
+# Gemeldet wird per Timer (nicht aus Handler/Auswertung heraus Tree-Updates auslösen).
+# node pointer -> Fingerprint der Kurve, aus der die LUT stammt
+_CURVE_FINGERPRINTS = {}
+# (tree name, node name) der seit dem letzten Timer geänderten Kurven
+_CURVE_EDITED = set()
+
+_MISSING = object()
+
+def _on_curve_timer():
+    edited = list(_CURVE_EDITED)
+    _CURVE_EDITED.clear()
+    for tree_name, node_name in edited:
+        tree = bpy.data.node_groups.get(tree_name)
+        node = tree.nodes.get(node_name) if tree else None
+        if node is not None:
+            try:
+                tree_hash.node_changed(node)
+            except Exception:
+                pass
+    return None
+
+def _iter_curve_nodes():
+    for tree in bpy.data.node_groups:
+        if getattr(tree, "bl_idname", "") != "AnimNodeTree":
+            continue
+        for node in tree.nodes:
+            if getattr(node, "easing", None) == "CURVE":
+                yield node
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph=None):
+    if depsgraph is None or bpy.data.node_groups.get(_CURVE_GROUP) is None:
+        return
+    for update in depsgraph.updates:
+        if getattr(update.id, "name", "") == _CURVE_GROUP:
+            break
+    else:
+        return
+    for node in _iter_curve_nodes():
+        try:
+            node.sync_curve()
+        except Exception:
+            pass
+
+@persistent
+def _on_save_pre(*_args):
+    group = bpy.data.node_groups.get(_CURVE_GROUP)
+    if group is None:
+        return
+    used = {node.easing_curve for node in _iter_curve_nodes()}
+    if not used:
+        bpy.data.node_groups.remove(group)
+        return
+    for node in [n for n in group.nodes if n.name not in used]:
+        group.nodes.remove(node)
+
+
+# --------------------------------------------------------------------
+# node mixin
+# --------------------------------------------------------------------
+
+# node pointer -> (easing, EasingLUT); Properties-Updates und Kurven-Edits verwerfen den Eintrag
+_NODE_LUTS = {}
+
+EASING_ITEMS = [
+    ("AUTO", "Auto", "Default (Ease In/Out-ish)"),
+    ("EASE_IN", "Ease In", "Slow start, then faster"),
+    ("EASE_OUT", "Ease Out", "Fast start, then slower"),
+    ("EASE_IN_OUT", "Ease In/Out", "Slow start & end"),
+    None,
+    ("BACK_IN", "Back In", "Pull back, then accelerate"),
+    ("BACK_OUT", "Back Out", "Overshoot, then settle"),
+    ("BACK_IN_OUT", "Back In/Out", "Pull back and overshoot"),
+    ("ELASTIC_IN", "Elastic In", "Spring wind-up"),
+    ("ELASTIC_OUT", "Elastic Out", "Spring settle"),
+    ("ELASTIC_IN_OUT", "Elastic In/Out", "Spring at both ends"),
+    ("BOUNCE_IN", "Bounce In", "Bounces at the start"),
+    ("BOUNCE_OUT", "Bounce Out", "Bounces at the end"),
+    ("BOUNCE_IN_OUT", "Bounce In/Out", "Bounces at both ends"),
+    None,
+    ("CUBIC_BEZIER", "Bezier Handles", "Cubic Bezier with two handles (x1, y1, x2, y2)"),
+    ("CURVE", "Custom Curve", "Curve widget"),
+]
+
+def _on_easing_update(self, context):
+    _NODE_LUTS.pop(self.as_pointer(), None)
+    if getattr(self, "easing", "") == "CURVE":
+        try:
+            curve_node = _curve_node(self.easing_curve, create=True)
+            if curve_node is not None and self.easing_curve != curve_node.name:
+                self.easing_curve = curve_node.name
+        except Exception:
+            pass
+    try:
+        tree_hash.node_changed(self)
+    except Exception:
+        pass
+
+
+class EasingMixin:
+    """interpolation/easing-Properties plus Auswertung über Polynome bzw. LUTs."""
+
+    interpolation: EnumProperty(
+        name="Interpolation",
+        items=[
+            ("CONSTANT", "Constant", "Jump at end"),
+            ("LINEAR", "Linear", "Linear transition"),
+            ("BEZIER", "Bezier", "Smooth (with easing)"),
+        ],
+        default="BEZIER",
+        update=_on_easing_update,
+    )
+
+    easing: EnumProperty(
+        name="Easing",
+        items=EASING_ITEMS,
+        default="AUTO",
+        update=_on_easing_update,
+    )
+
+    easing_handles: FloatVectorProperty(
+        name="Handles",
+        description="x1, y1, x2, y2 der Bezier-Handles",
+        size=4,
+        default=(0.42, 0.0, 0.58, 1.0),
+        soft_min=-1.0,
+        soft_max=2.0,
+        update=_on_easing_update,
+    )
+
+    easing_curve: StringProperty(options={"HIDDEN"})
+
+    def draw_easing(self, layout):
+        col = layout.column(align=True)
+        col.prop(self, "interpolation")
+        col.prop(self, "easing")
+
+        easing = self.easing
+        if easing == "CUBIC_BEZIER":
+            layout.prop(self, "easing_handles", text="")
+        elif easing == "CURVE":
+            curve_node = _curve_node(self.easing_curve)
+            if curve_node is None:
+                layout.label(text="Curve missing", icon="ERROR")
+                return
+            layout.template_curve_mapping(curve_node, "mapping")
+
+    def sync_curve(self):
+        """Kurve seit dem Bau der LUT geändert: LUT verwerfen, Änderung melden. True bei Änderung."""
+        ptr = self.as_pointer()
+        curve_node = _curve_node(self.easing_curve)
+        try:
+            fingerprint = None if curve_node is None else _curve_fingerprint(curve_node)
+        except Exception:
+            return False
+        previous = _CURVE_FINGERPRINTS.get(ptr, _MISSING)
+        _CURVE_FINGERPRINTS[ptr] = fingerprint
+        if previous is _MISSING or previous == fingerprint:
+            return False
+        _NODE_LUTS.pop(ptr, None)
+        _CURVE_EDITED.add((self.id_data.name, self.name))
+        if not bpy.app.timers.is_registered(_on_curve_timer):
+            bpy.app.timers.register(_on_curve_timer, first_interval=0.0)
+        return True
+
+    def hash_token(self):
+        """Zusatz für den Inhalts-Hash (tree_hash): Punkte der eigenen Kurve."""
+        if self.easing != "CURVE":
+            return ""
+        curve_node = _curve_node(self.easing_curve)
+        return repr(None if curve_node is None else _curve_fingerprint(curve_node))
+
+    def _easing_lut(self, easing):
+        if easing == "CURVE":
+            self.sync_curve()
+        entry = _NODE_LUTS.get(self.as_pointer())
+        if entry is not None and entry[0] == easing:
+            return entry[1]
+
+        if easing in _PRESETS:
+            lut = _preset_lut(easing)
+        elif easing == "CUBIC_BEZIER":
+            lut = _bezier_lut(*self.easing_handles)
+        else:
+            lut = _curve_lut(_curve_node(self.easing_curve))
+        _NODE_LUTS[self.as_pointer()] = (easing, lut)
+        return lut
+
+    def interp_factor(self, t):
+        """t in [0..1] -> Faktor nach interpolation/easing."""
+        interpolation = self.interpolation
+        if interpolation == "CONSTANT":
+            return 1.0 if t >= 1.0 else 0.0
+        if interpolation == "LINEAR":
+            return t
+        easing = self.easing
+        poly = _POLYNOMIALS.get(easing)
+        if poly is not None:
+            return poly(t)
+        return self._easing_lut(easing).sample(t)
+
+    def interp_factors(self, t):
+        """interp_factor für ein NumPy-Array von t (Bone-Batches)."""
+        interpolation = self.interpolation
+        if interpolation == "CONSTANT":
+            return (t >= 1.0).astype(np.float64)
+        if interpolation == "LINEAR":
+            return t
+        easing = self.easing
+        poly = _POLYNOMIALS.get(easing)
+        if poly is not None:
+            return poly(t)
+        return self._easing_lut(easing).sample_array(t)
@@ -4,7 +4,8 @@ import bpy
 from collections import Counter
 from types import SimpleNamespace
 
-from .Mixin import AnimGraphNodeMixin
+from .Mixin import AnimGraphNodeMixin, _socket_bone_value
+from ..Core import eval_plan
 
 _SOCKET_SYNC_GUARDS = set()
 _ENSURE_IO_GUARDS = set()
@@ -70,51 +71,38 @@ class AnimNodeGroup(bpy.types.NodeCustomGroup, AnimGraphNodeMixin):
         if not sub or getattr(sub, "bl_idname", None) != "AnimNodeTree":
             return
 
-        stack = getattr(ctx, "eval_stack", None)
-        if stack is None:
-            stack = set()
-            ctx.eval_stack = stack
-
-        frame_key = self._frame_key(tree, scene)
-
-        # Guard against recursive group re-entry across nested sub-contexts.
-        group_guard = ("GROUP_EVAL", self.as_pointer(), frame_key)
-        if group_guard in stack:
+        # Rekursive Group-Verschachtelung ist zur Plan-Zeit erkannt (eval_plan).
+        if self.as_pointer() in eval_plan.get_plan(tree).recursive_groups:
             return
-        stack.add(group_guard)
 
-        try:
-            # Evaluate group contents in an isolated runtime scope so multiple
-            # instances of the same subtree do not share per-frame cache/values.
-            sub_ctx = _make_sub_context(ctx)
-
-            _push_group_inputs_to_subtree(
-                group_node=self,
-                parent_tree=tree,
-                subtree=sub,
-                scene=scene,
-                parent_ctx=ctx,
-                sub_ctx=sub_ctx,
-            )
+        # Evaluate group contents in an isolated runtime scope so multiple
+        # instances of the same subtree do not share per-frame cache/values.
+        # Group-Inputs werden beim Lesen über den Scope im Parent aufgelöst (keine RNA-Writes).
+        sub_ctx = _make_sub_context(ctx, (self, tree, ctx))
 
-            # Tick side-effect transform nodes explicitly, like top-level tree eval.
-            _evaluate_subtree_terminal_nodes(sub, scene, sub_ctx)
+        # Tick side-effect transform nodes explicitly, like top-level tree eval.
+        _evaluate_subtree_terminal_nodes(sub, scene, sub_ctx)
 
-            _pull_group_outputs_from_subtree(
-                group_node=self,
-                subtree=sub,
-                scene=scene,
-                parent_ctx=ctx,
-                sub_ctx=sub_ctx,
-            )
-        finally:
-            stack.discard(group_guard)
+        _pull_group_outputs_from_subtree(
+            group_node=self,
+            subtree=sub,
+            scene=scene,
+            parent_ctx=ctx,
+            sub_ctx=sub_ctx,
+        )
 
 
 def _evaluate_subtree_terminal_nodes(subtree, scene, sub_ctx):
+    plan = eval_plan.get_plan(subtree)
     for node in getattr(subtree, "nodes", []):
         bl_idname = getattr(node, "bl_idname", "")
-        if bl_idname not in {"DefineBoneTransformNode", "DefineBonePropertyNode", "AnimNodeGroup"}:
+        if bl_idname not in {
+            "DefineBoneTransformNode", "DefineBoneSetTransformNode", "DefineBoneSetNoiseNode", "DefineBoneSetSpringNode",
+            "DefineBonePropertyNode", "AnimNodeGroup",
+        }:
+            continue
+        # Reine Groups werden nur ausgewertet, wenn ein Consumer ihre Outputs liest.
+        if bl_idname == "AnimNodeGroup" and not plan.ticks_group(node.as_pointer()):
             continue
 
         if hasattr(node, "eval_upstream"):
@@ -231,7 +219,7 @@ def _sync_node_sockets(node_sockets, iface_sockets):
             pass
 
 
-def _make_sub_context(parent_ctx):
+def _make_sub_context(parent_ctx, group_scope):
     pose_cache = getattr(parent_ctx, "pose_cache", None)
     if pose_cache is None:
         pose_cache = {}
@@ -240,24 +228,15 @@ def _make_sub_context(parent_ctx):
     if touched_armatures is None:
         touched_armatures = set()
 
-    eval_stack = getattr(parent_ctx, "eval_stack", None)
-    if eval_stack is None:
-        eval_stack = set()
-
     return SimpleNamespace(
         eval_cache=set(),
         pose_cache=pose_cache,
         touched_armatures=touched_armatures,
         values={},
-        # Shared stack keeps recursion guards effective across nested groups.
-        eval_stack=eval_stack,
+        group_scope=group_scope,
     )
 
 
-def _group_input_nodes(tree):
-    return [n for n in getattr(tree, "nodes", []) if getattr(n, "type", "") == "GROUP_INPUT"]
-
-
 def _active_group_output_node(tree):
     outputs = [n for n in getattr(tree, "nodes", []) if getattr(n, "type", "") == "GROUP_OUTPUT"]
     if not outputs:
@@ -277,63 +256,33 @@ def _read_bone_socket_value(tree, sock, scene, ctx):
         return (None, "")
 
     if getattr(sock, "is_linked", False) and sock.links:
-        from_sock = sock.links[0].from_socket
-        from_node = getattr(from_sock, "node", None)
+        from_node = getattr(sock.links[0].from_socket, "node", None)
         if from_node is not None and hasattr(from_node, "eval_upstream"):
             try:
                 from_node.eval_upstream(tree, scene, ctx)
             except Exception:
                 pass
-        return (
-            getattr(from_sock, "armature_obj", None),
-            getattr(from_sock, "bone_name", "") or "",
-        )
 
-    return (
-        getattr(sock, "armature_obj", None),
-        getattr(sock, "bone_name", "") or "",
-    )
+    # Group-Inputs des Subtrees über den Scope der Instanz
+    return _socket_bone_value(sock, ctx)
 
 
 def _write_bone_socket_value(sock, arm_obj, bone_name):
+    # Nur bei Änderung schreiben: jede Zuweisung löst ein Tree-Update aus.
     if sock is None:
         return
     try:
-        sock.armature_obj = arm_obj
+        if sock.armature_obj != arm_obj:
+            sock.armature_obj = arm_obj
     except Exception:
         pass
     try:
-        sock.bone_name = bone_name or ""
+        if (sock.bone_name or "") != (bone_name or ""):
+            sock.bone_name = bone_name or ""
     except Exception:
         pass
 
 
-def _push_group_inputs_to_subtree(group_node, parent_tree, subtree, scene, parent_ctx, sub_ctx):
-    input_nodes = _group_input_nodes(subtree)
-    if not input_nodes:
-        return
-
-    for group_input in input_nodes:
-        for idx, sub_out in enumerate(getattr(group_input, "outputs", [])):
-            parent_in = group_node.inputs[idx] if idx < len(group_node.inputs) else None
-            if parent_in is None:
-                continue
-
-            if _is_bone_socket(parent_in) or _is_bone_socket(sub_out):
-                arm_obj, bone_name = _read_bone_socket_value(parent_tree, parent_in, scene, parent_ctx)
-                _write_bone_socket_value(sub_out, arm_obj, bone_name)
-                sub_ctx.values[(group_input.as_pointer(), sub_out.name)] = (arm_obj, bone_name)
-                continue
-
-            value = group_node.eval_socket(parent_tree, parent_in, scene, parent_ctx)
-            if hasattr(sub_out, "default_value"):
-                try:
-                    sub_out.default_value = value
-                except Exception:
-                    pass
-            sub_ctx.values[(group_input.as_pointer(), sub_out.name)] = value
-
-
 def _pull_group_outputs_from_subtree(group_node, subtree, scene, parent_ctx, sub_ctx):
     group_output = _active_group_output_node(subtree)
     if group_output is None:
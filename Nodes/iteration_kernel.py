@@ -0,0 +1,423 @@
+# animation_graph/Nodes/iteration_kernel.py
+
+from mathutils import Vector, Matrix
+
+from ..Core import eval_plan
+from .mathematik.calculators import int_math, float_math, vector_math, matrix_math
+
+
+# Repeat-Zonen, deren Body nur aus Math-Nodes besteht, laufen als kompilierter Kernel:
+# pro Iteration werden die Rechenkerne direkt aufgerufen, ohne eval_cache, Slot-Lookups
+# und RNA-Writes. Ist der Body affin im State (und unabhängig vom Index), wird die
+# Abbildung per Quadrieren potenziert: O(log n) statt n Iterationen.
+
+# bl_idname -> [(Input, Kategorie, Fallback)]
+_KERNEL_INPUTS = {
+    "IntMath": [("A", "INT", 0), ("B", "INT", 0)],
+    "FloatMath": [("A", "FLOAT", 0.0), ("B", "FLOAT", 0.0)],
+    "VectorMath": [("A", "VECTOR", (0.0, 0.0, 0.0)), ("B", "VECTOR", (0.0, 0.0, 0.0)), ("Scale", "FLOAT", 1.0)],
+    "MatrixMath": [("A", "MATRIX", None), ("B", "MATRIX", None), ("Scale", "FLOAT", 1.0), ("Exponent", "INT", 1)],
+}
+
+_COERCE = {
+    "INT": eval_plan.coerce_int,
+    "FLOAT": eval_plan.coerce_float,
+    "VECTOR": eval_plan.coerce_vector,
+    "MATRIX": eval_plan.coerce_matrix,
+}
+
+# Referenzen auf Werte im Kernel
+_STATE, _INDEX, _OP, _INV = 0, 1, 2, 3
+
+_MISSING = object()
+
+
+class _Op:
+    __slots__ = ("bl_idname", "operation", "inputs")
+
+    def __init__(self, node, inputs):
+        self.bl_idname = node.bl_idname
+        self.operation = getattr(node, "operation", "")
+        # [(ref, slot, kind, fallback)]
+        self.inputs = inputs
+
+
+class LoopKernel:
+    __slots__ = ("ops", "result", "invariants", "uses_index")
+
+    def __init__(self, ops, result, invariants, uses_index):
+        self.ops = ops
+        # ref des Value-Inputs am Repeat-Output
+        self.result = result
+        # [(Node, Slot)] schleifeninvarianter Inputs (vor dem Loop gelesen)
+        self.invariants = invariants
+        self.uses_index = uses_index
+
+
+def _fallback(kind, fallback):
+    return Matrix.Identity(4) if kind == "MATRIX" and fallback is None else fallback
+
+def _typed(slot, kind, v, fallback):
+    # wie AnimGraphNodeMixin.socket_int/float/vector/matrix
+    if slot.kind == kind and slot.convert is not None:
+        return slot.convert(v, fallback)
+    return _COERCE[kind](v, fallback)
+
+
+# --------------------------------------------------------------------
+# compile
+# --------------------------------------------------------------------
+
+def compile_kernel(plan, zone, output):
+    """LoopKernel für zone, None wenn der Body nicht nur aus Math-Nodes besteht."""
+    body = set(zone.body)
+    input_ptr = zone.input_node.as_pointer()
+    output_ptr = output.as_pointer()
+
+    value = plan.slot(output_ptr, "Value")
+    if value is None or value.cut:
+        return None
+
+    nodes = {}
+    for node in output.id_data.nodes:
+        node_ptr = node.as_pointer()
+        if node_ptr not in body:
+            continue
+        if node.bl_idname not in _KERNEL_INPUTS:
+            return None
+        # Body-Werte dürfen nur im Loop gelesen werden (der Kernel schreibt keine Sockets)
+        for sock in node.outputs:
+            for link in sock.links:
+                to_ptr = link.to_node.as_pointer()
+                if to_ptr not in body and not (to_ptr == output_ptr and link.to_socket.name == "Value"):
+                    return None
+        nodes[node_ptr] = node
+
+    order = {}
+    ops = []
+    invariants = []
+    uses_index = False
+
+    def ref_for(slot):
+        nonlocal uses_index
+        if slot.folded:
+            return (_INV, len(invariants)), (None, slot)
+        if slot.from_node is None:
+            return (_INV, len(invariants)), (None, slot)
+        if slot.cut:
+            return None, None
+        from_ptr = slot.from_key[0]
+        if from_ptr == input_ptr:
+            if slot.from_socket.name == "Index":
+                uses_index = True
+                return (_INDEX,), None
+            return (_STATE,), None
+        if from_ptr in nodes:
+            return (_OP, visit(nodes[from_ptr]), slot.from_socket.name), None
+        return (_INV, len(invariants)), (slot.from_node, slot)
+
+    def visit(node):
+        node_ptr = node.as_pointer()
+        idx = order.get(node_ptr)
+        if idx is not None:
+            if idx < 0:
+                raise ValueError("cycle")
+            return idx
+        order[node_ptr] = -1
+
+        inputs = []
+        for name, kind, fallback in _KERNEL_INPUTS[node.bl_idname]:
+            slot = plan.slot(node_ptr, name)
+            if slot is None:
+                raise ValueError(name)
+            ref, inv = ref_for(slot)
+            if ref is None:
+                raise ValueError(name)
+            if inv is not None:
+                invariants.append(inv)
+            inputs.append((ref, slot, kind, fallback))
+
+        idx = order[node_ptr] = len(ops)
+        ops.append(_Op(node, inputs))
+        return idx
+
+    try:
+        result, inv = ref_for(value)
+        if result is None:
+            return None
+        if inv is not None:
+            invariants.append(inv)
+    except (ValueError, RecursionError):
+        return None
+    return LoopKernel(ops, (result, value), invariants, uses_index)
+
+
+# --------------------------------------------------------------------
+# iterate
+# --------------------------------------------------------------------
+
+def read_invariants(kernel, output, tree, scene, ctx):
+    out = []
+    for node, slot in kernel.invariants:
+        if node is None:
+            out.append(slot.literal if slot.folded else getattr(slot.socket, "default_value", None))
+        else:
+            out.append(output.eval_slot(tree, slot, scene, ctx))
+    return out
+
+def _stale_outputs(kernel):
+    # Outputs, die eine Operation nicht beschreibt, behalten ihren letzten Socket-Wert
+    out = {}
+    refs = [(ref, slot) for op in kernel.ops for ref, slot, _kind, _fallback in op.inputs]
+    refs.append(kernel.result)
+    for ref, slot in refs:
+        if ref[0] == _OP:
+            out[(ref[1], ref[2])] = getattr(slot.from_socket, "default_value", None)
+    return out
+
+def _run_op(op, args):
+    bl_idname = op.bl_idname
+    if bl_idname == "IntMath":
+        r, rem = int_math(op.operation, args[0], args[1])
+        return {"Result": int(r), "Remainder": int(rem)}
+    if bl_idname == "FloatMath":
+        return {"Result": float(float_math(op.operation, args[0], args[1]))}
+    if bl_idname == "VectorMath":
+        vec, flt = vector_math(op.operation, args[0], args[1], args[2])
+        out = {}
+        if vec is not None: out["Vector"] = vec
+        if flt is not None: out["Float"] = flt
+        return out
+    return {"Result": matrix_math(op.operation, args[0], args[1], args[2], args[3])}
+
+def _value(ref, state, index, results, invariants, stale):
+    tag = ref[0]
+    if tag == _STATE:
+        return state
+    if tag == _INDEX:
+        return index
+    if tag == _INV:
+        return invariants[ref[1]]
+    v = results[ref[1]].get(ref[2], _MISSING)
+    return stale.get((ref[1], ref[2])) if v is _MISSING else v
+
+def iterate(kernel, state, iterations, invariants, data_type):
+    """iterations Durchläufe des Kernels ab state (State-Typ data_type)."""
+    stale = _stale_outputs(kernel)
+    result_ref, value_slot = kernel.result
+    fallback = _fallback(data_type, None)
+
+    def read_state(v, prev):
+        return _typed(value_slot, data_type, v, prev if prev is not None else fallback)
+
+    for i in range(iterations):
+        results = []
+        for op in kernel.ops:
+            args = [
+                _typed(slot, kind, _value(ref, state, i, results, invariants, stale), _fallback(kind, fallback))
+                for ref, slot, kind, fallback in op.inputs
+            ]
+            results.append(_run_op(op, args))
+        state = read_state(_value(result_ref, state, i, results, invariants, stale), state)
+    return state
+
+
+# --------------------------------------------------------------------
+# closed form
+# --------------------------------------------------------------------
+# Symbolische Auswertung mit dem State als Unbekannter x. Zulässig sind Operationen,
+# die x affin lassen; alles andere bricht ab (-> iterate).
+
+class _NotAffine(Exception):
+    pass
+
+class _Affine:
+    """x -> a * x + b (Skalar) bzw. komponentenweise (Vektor)."""
+
+    __slots__ = ("kind", "a", "b")
+
+    def __init__(self, kind, a, b):
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    def _mul(self, u, v):
+        if self.kind == "VECTOR":
+            return Vector((u[0] * v[0], u[1] * v[1], u[2] * v[2]))
+        return u * v
+
+    def compose(self, g):
+        """self ∘ g"""
+        return _Affine(self.kind, self._mul(self.a, g.a), self._mul(self.a, g.b) + self.b)
+
+    def apply(self, x):
+        return self._mul(self.a, x) + self.b
+
+class _MatAffine:
+    """X -> k * (L @ X @ R)"""
+
+    __slots__ = ("kind", "k", "L", "R")
+
+    def __init__(self, k, L, R):
+        self.kind = "MATRIX"
+        self.k = k
+        self.L = L
+        self.R = R
+
+    def compose(self, g):
+        return _MatAffine(self.k * g.k, self.L @ g.L, g.R @ self.R)
+
+    def apply(self, x):
+        return (self.L @ x @ self.R) * self.k
+
+def _identity_map(kind):
+    if kind == "MATRIX":
+        return _MatAffine(1.0, Matrix.Identity(4), Matrix.Identity(4))
+    if kind == "VECTOR":
+        return _Affine(kind, Vector((1.0, 1.0, 1.0)), Vector((0.0, 0.0, 0.0)))
+    if kind == "INT":
+        return _Affine(kind, 1, 0)
+    return _Affine(kind, 1.0, 0.0)
+
+def _symbolic(v):
+    return isinstance(v, (_Affine, _MatAffine))
+
+def _const_map(kind, c):
+    # konstanter Ausdruck als (Null-)Abbildung: x -> c
+    if kind == "VECTOR":
+        return _Affine(kind, Vector((0.0, 0.0, 0.0)), Vector(c))
+    if kind == "INT":
+        return _Affine(kind, 0, c)
+    return _Affine(kind, 0.0, c)
+
+def _scalar_step(kind, op, a, b):
+    sa, sb = _symbolic(a), _symbolic(b)
+    if op == "ADD":
+        if sa and sb: return _Affine(kind, a.a + b.a, a.b + b.b)
+        if sa: return _Affine(kind, a.a, a.b + b)
+        return _Affine(kind, b.a, a + b.b)
+    if op == "SUBTRACT":
+        if sa and sb: return _Affine(kind, a.a - b.a, a.b - b.b)
+        if sa: return _Affine(kind, a.a, a.b - b)
+        return _Affine(kind, -b.a, a - b.b)
+    if op == "MULTIPLY" and not (sa and sb):
+        f, c = (a, b) if sa else (b, a)
+        return _Affine(kind, f.a * c, f.b * c)
+    if op == "DIVIDE" and sa and not sb and kind == "FLOAT":
+        if b == 0.0:
+            return 0.0
+        return _Affine(kind, a.a / b, a.b / b)
+    raise _NotAffine(op)
+
+def _vector_step(op, A, B, s):
+    sa, sb = _symbolic(A), _symbolic(B)
+    if _symbolic(s):
+        raise _NotAffine(op)
+    if op in {"ADD", "SUBTRACT"}:
+        sign = 1.0 if op == "ADD" else -1.0
+        fa = A if sa else _const_map("VECTOR", A)
+        fb = B if sb else _const_map("VECTOR", B)
+        return _Affine("VECTOR", fa.a + fb.a * sign, fa.b + fb.b * sign)
+    if op == "MULTIPLY" and not (sa and sb):
+        f, c = (A, B) if sa else (B, A)
+        return _Affine("VECTOR", f._mul(f.a, c), f._mul(f.b, c))
+    if op == "SCALE" and sa:
+        return _Affine("VECTOR", A.a * float(s), A.b * float(s))
+    raise _NotAffine(op)
+
+def _matrix_step(op, A, B, s, exp):
+    sa, sb = _symbolic(A), _symbolic(B)
+    if _symbolic(s) or _symbolic(exp):
+        raise _NotAffine(op)
+    if op == "MULTIPLY" and not (sa and sb):
+        if sa:
+            return _MatAffine(A.k, A.L, A.R @ B)
+        return _MatAffine(B.k, A @ B.L, B.R)
+    if op == "SCALE" and sa:
+        return _MatAffine(A.k * float(s), A.L, A.R)
+    raise _NotAffine(op)
+
+def _symbolic_typed(slot, kind, v, fallback):
+    if _symbolic(v):
+        if v.kind != kind:
+            raise _NotAffine(kind)
+        return v
+    return _typed(slot, kind, v, fallback)
+
+def _symbolic_op(op, args):
+    if not any(_symbolic(a) for a in args):
+        return _run_op(op, args)
+
+    bl_idname = op.bl_idname
+    if bl_idname == "IntMath":
+        # Remainder ist nur bei MODULOS gesetzt, das nicht affin ist
+        return {"Result": _scalar_step("INT", op.operation, args[0], args[1]), "Remainder": 0}
+    if bl_idname == "FloatMath":
+        return {"Result": _scalar_step("FLOAT", op.operation, args[0], args[1])}
+    if bl_idname == "VectorMath":
+        return {"Vector": _vector_step(op.operation, args[0], args[1], args[2])}
+    return {"Result": _matrix_step(op.operation, args[0], args[1], args[2], args[3])}
+
+def body_map(kernel, data_type, invariants):
+    """
+    ("MAP", f) mit dem Body als affiner Abbildung des States, ("CONST", v) wenn das Ergebnis
+    nicht vom State abhängt, None wenn nicht affin (oder Index-abhängig).
+    """
+    if kernel.uses_index:
+        return None
+    stale = _stale_outputs(kernel)
+    x = _identity_map(data_type)
+    try:
+        results = []
+        for op in kernel.ops:
+            args = [
+                _symbolic_typed(slot, kind, _value(ref, x, 0, results, invariants, stale), _fallback(kind, fallback))
+                for ref, slot, kind, fallback in op.inputs
+            ]
+            results.append(_symbolic_op(op, args))
+        result_ref, _value_slot = kernel.result
+        f = _value(result_ref, x, 0, results, invariants, stale)
+        if not _symbolic(f):
+            return ("CONST", f)
+        if f.kind != data_type:
+            return None
+        return ("MAP", f)
+    except (_NotAffine, TypeError, ValueError, ZeroDivisionError):
+        return None
+
+def power(f, n, data_type):
+    """f ∘ f ∘ ... (n mal) per Quadrieren."""
+    result = _identity_map(data_type)
+    base = f
+    while n:
+        if n & 1:
+            result = base.compose(result)
+        n >>= 1
+        if n:
+            base = base.compose(base)
+    return result
+
+
+# --------------------------------------------------------------------
+# entry
+# --------------------------------------------------------------------
+
+def run(kernel, state, iterations, invariants, data_type):
+    """(State nach iterations Durchläufen, "CLOSED_FORM" | "KERNEL")."""
+    if iterations <= 0:
+        return state, "KERNEL"
+
+    form = body_map(kernel, data_type, invariants)
+    if form is None:
+        return iterate(kernel, state, iterations, invariants, data_type), "KERNEL"
+
+    _result_ref, value_slot = kernel.result
+    tag, f = form
+    try:
+        if tag == "CONST":
+            v = f
+        else:
+            v = power(f, iterations, data_type).apply(state)
+        return _typed(value_slot, data_type, v, state), "CLOSED_FORM"
+    except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+        return iterate(kernel, state, iterations, invariants, data_type), "KERNEL"
@@ -1,22 +1,106 @@
 # animation_graph/Nodes/iteration_nodes.py
 
+import time
+
 import bpy
+from bpy.app.handlers import persistent, load_post
+from bpy.props import EnumProperty, IntProperty
+from mathutils import Matrix
 
-from .Mixin import AnimGraphNodeMixin
+from .Mixin import AnimGraphNodeMixin, retype_socket
+from . import iteration_kernel
+from ..Core import eval_plan, tree_hash
 
 
 _MISSING = object()
 
-# TODO 
+# Repeat-Output pointer -> (Modus, Iterationen, gekappt, Sekunden) der letzten Auswertung
+_LOOP_STATS = {}
+
+_MODE_LABELS = {
+    "NODES": "Nodes",
+    "KERNEL": "Kernel",
+    "CLOSED_FORM": "Closed form",
+}
+
+# data_type -> (Socket-Typ, Getter am Mixin, Fallback)
+_STATE_TYPES = {
+    "INT": ("NodeSocketInt", "socket_int", 0),
+    "FLOAT": ("NodeSocketFloat", "socket_float", 0.0),
+    "VECTOR": ("NodeSocketVector", "socket_vector", (0.0, 0.0, 0.0)),
+    "MATRIX": ("NodeSocketMatrix", "socket_matrix", None),
+}
+
+_DATA_TYPE_ITEMS = [
+    ("INT", "Integer", ""),
+    ("FLOAT", "Float", ""),
+    ("VECTOR", "Vector", ""),
+    ("MATRIX", "Matrix", ""),
+]
 
 def register():
     for c in _CLASSES: bpy.utils.register_class(c)
+    if _on_load_post not in load_post: load_post.append(_on_load_post)
 
 def unregister():
+    if _on_load_post in load_post: load_post.remove(_on_load_post)
+    _LOOP_STATS.clear()
     for c in reversed(_CLASSES): bpy.utils.unregister_class(c)
 
+@persistent
+def _on_load_post(*_args):
+    _LOOP_STATS.clear()
+
+
+def _on_data_type_update(self, context):
+    # State-Sockets beider Zone-Nodes auf den neuen Typ umstellen
+    for node in (self, self._partner()):
+        if node is None:
+            continue
+        if node.data_type != self.data_type:
+            node.data_type = self.data_type   # ruft diesen Callback für node erneut auf
+            continue
+        node._sync_state_sockets()
+    try:
+        tree_hash.node_changed(self)
+    except Exception: pass
+
+def _on_node_prop_update(self, context):
+    try:
+        tree_hash.node_changed(self)
+    except Exception: pass
+
+def _read_state(node, tree, name, scene, ctx, data_type, fallback=_MISSING):
+    _sock_type, getter, default = _STATE_TYPES.get(data_type, _STATE_TYPES["INT"])
+    if fallback is _MISSING:
+        fallback = Matrix.Identity(4) if data_type == "MATRIX" else default
+    return getattr(node, getter)(tree, name, scene, ctx, fallback)
+
+def _write_state(sock, value):
+    if not sock:
+        return
+    try:
+        sock.default_value = value
+    except Exception:
+        pass
+
 
-class AnimNodeRepeatInput(bpy.types.Node, AnimGraphNodeMixin):
+class _RepeatZoneNode:
+    data_type: EnumProperty(
+        name="Type",
+        items=_DATA_TYPE_ITEMS,
+        default="INT",
+        update=_on_data_type_update,
+    )
+
+    def draw_buttons(self, context, layout):
+        layout.prop(self, "data_type", text="")
+
+    def _state_socket_type(self):
+        return _STATE_TYPES.get(self.data_type, _STATE_TYPES["INT"])[0]
+
+
+class AnimNodeRepeatInput(_RepeatZoneNode, bpy.types.Node, AnimGraphNodeMixin):
     bl_idname = "AnimNodeRepeatInput"
     bl_label = "Repeat Input"
     bl_icon = "DRIVER"
@@ -33,33 +117,41 @@ class AnimNodeRepeatInput(bpy.types.Node, AnimGraphNodeMixin):
         self.outputs.new("NodeSocketInt", "Value")
         self.outputs.new("NodeSocketInt", "Index")
 
-    def evaluate(self, tree, scene, ctx):
-        value = self.socket_int(tree, "Initial", scene, ctx, 0)
+    def _partner(self):
+        tree = self.id_data
+        for node in getattr(tree, "nodes", []):
+            if getattr(node, "bl_idname", "") == "AnimNodeRepeatOutput" and node._repeat_input_node() == self:
+                return node
+        return None
 
-        out_value = self.outputs.get("Value")
-        out_index = self.outputs.get("Index")
+    def _sync_state_sockets(self):
+        socket_type = self._state_socket_type()
+        retype_socket(self.inputs, "Initial", socket_type, 0)
+        retype_socket(self.outputs, "Value", socket_type, 0)
 
-        if out_value:
-            try:
-                out_value.default_value = int(value)
-            except Exception:
-                pass
+    def evaluate(self, tree, scene, ctx):
+        value = _read_state(self, tree, "Initial", scene, ctx, self.data_type)
 
-        if out_index:
-            try:
-                out_index.default_value = 0
-            except Exception:
-                pass
+        _write_state(self.outputs.get("Value"), value)
+        _write_state(self.outputs.get("Index"), 0)
 
-        self.set_output_value(ctx, "Value", int(value))
+        self.set_output_value(ctx, "Value", value)
         self.set_output_value(ctx, "Index", 0)
 
 
-class AnimNodeRepeatOutput(bpy.types.Node, AnimGraphNodeMixin):
+class AnimNodeRepeatOutput(_RepeatZoneNode, bpy.types.Node, AnimGraphNodeMixin):
     bl_idname = "AnimNodeRepeatOutput"
     bl_label = "Repeat Output"
     bl_icon = "DRIVER"
 
+    max_iterations: IntProperty(
+        name="Max Iterations",
+        description="Obergrenze für Iterations pro Auswertung (0 = unbegrenzt)",
+        default=10000,
+        min=0,
+        update=_on_node_prop_update,
+    )
+
     @classmethod
     def poll(cls, ntree):
         return getattr(ntree, "bl_idname", None) == "AnimNodeTree"
@@ -86,39 +178,86 @@ class AnimNodeRepeatOutput(bpy.types.Node, AnimGraphNodeMixin):
             return None
         return node
 
+    def _partner(self):
+        return self._repeat_input_node()
+
+    def draw_buttons(self, context, layout):
+        col = layout.column(align=True)
+        col.prop(self, "data_type", text="")
+        col.prop(self, "max_iterations")
+
+        stats = _LOOP_STATS.get(self.as_pointer())
+        if stats is not None:
+            mode, iterations, capped, seconds = stats
+            text = f"{_MODE_LABELS.get(mode, mode)}: {iterations} it, {seconds * 1000.0:.3f} ms"
+            layout.label(text=text + (" (capped)" if capped else ""), icon="TIME")
+
+    def _sync_state_sockets(self):
+        socket_type = self._state_socket_type()
+        retype_socket(self.inputs, "Value", socket_type, 2)
+        retype_socket(self.outputs, "Value", socket_type, 0)
+
     def evaluate(self, tree, scene, ctx):
         iterations = max(0, self.socket_int(tree, "Iterations", scene, ctx, 1))
-
-        repeat_input = self._repeat_input_node()
-        if repeat_input is None:
-            value = self.socket_int(tree, "Value", scene, ctx, 0)
-            out = self.outputs.get("Value")
-            if out:
-                try:
-                    out.default_value = int(value)
-                except Exception:
-                    pass
-            self.set_output_value(ctx, "Value", int(value))
+        cap = int(self.max_iterations)
+        capped = bool(cap and iterations > cap)
+        if capped:
+            iterations = cap
+        data_type = self.data_type
+
+        plan = eval_plan.get_plan(tree)
+        zone = plan.repeat_zones.get(self.as_pointer())
+        if zone is None:
+            value = _read_state(self, tree, "Value", scene, ctx, data_type)
+            _write_state(self.outputs.get("Value"), value)
+            self.set_output_value(ctx, "Value", value)
             return
 
-        state = repeat_input.socket_int(tree, "Initial", scene, ctx, 0)
-
+        repeat_input = zone.input_node
         repeat_ptr = repeat_input.as_pointer()
         repeat_value_key = (repeat_ptr, "Value")
         repeat_index_key = (repeat_ptr, "Index")
 
+        # Repeat-Input einmal auswerten (Initial, Index 0); im Loop nur noch ctx.values überschreiben
+        repeat_input.eval_upstream(tree, scene, ctx)
         prev_repeat_value = ctx.values.get(repeat_value_key, _MISSING)
         prev_repeat_index = ctx.values.get(repeat_index_key, _MISSING)
+        state = prev_repeat_value
+        if state is _MISSING:
+            state = _read_state(repeat_input, tree, "Initial", scene, ctx, data_type)
+
+        if zone.kernel is False:
+            try:
+                zone.kernel = iteration_kernel.compile_kernel(plan, zone, self)
+            except Exception:
+                zone.kernel = None
+
+        t0 = time.perf_counter()
+        if zone.kernel is not None:
+            # Nur Math-Nodes im Body: kompiliert (bzw. geschlossen) statt über die Nodes
+            invariants = iteration_kernel.read_invariants(zone.kernel, self, tree, scene, ctx)
+            state, mode = iteration_kernel.run(zone.kernel, state, iterations, invariants, data_type)
+            self._finish(ctx, state, (mode, iterations, capped, time.perf_counter() - t0))
+            return
+
+        frame_key = self._frame_key(tree, scene)
+        body_keys = [(ptr, frame_key) for ptr in zone.body]
 
         try:
+            if iterations:
+                # Schleifeninvariante Inputs vor dem Loop auswerten; sie bleiben im eval_cache.
+                for node in zone.hoisted:
+                    if hasattr(node, "eval_upstream"):
+                        node.eval_upstream(tree, scene, ctx)
+
             for i in range(iterations):
-                # Recompute loop body each pass.
-                ctx.eval_cache.clear()
+                # Nur den Loop-Body neu auswerten, nicht alle bisher ausgewerteten Nodes.
+                ctx.eval_cache.difference_update(body_keys)
 
-                ctx.values[repeat_value_key] = int(state)
-                ctx.values[repeat_index_key] = int(i)
+                ctx.values[repeat_value_key] = state
+                ctx.values[repeat_index_key] = i
 
-                state = _to_int(self.socket_int(tree, "Value", scene, ctx, state), state)
+                state = _read_state(self, tree, "Value", scene, ctx, data_type, state)
         finally:
             if prev_repeat_value is _MISSING:
                 ctx.values.pop(repeat_value_key, None)
@@ -130,23 +269,12 @@ class AnimNodeRepeatOutput(bpy.types.Node, AnimGraphNodeMixin):
             else:
                 ctx.values[repeat_index_key] = prev_repeat_index
 
-        out = self.outputs.get("Value")
-        if out:
-            try:
-                out.default_value = int(state)
-            except Exception:
-                pass
-
-        self.set_output_value(ctx, "Value", int(state))
+        self._finish(ctx, state, ("NODES", iterations, capped, time.perf_counter() - t0))
 
-def _to_int(value, fallback=0):
-    try:
-        return int(value)
-    except Exception:
-        try:
-            return int(float(value))
-        except Exception:
-            return int(fallback)
+    def _finish(self, ctx, state, stats):
+        _LOOP_STATS[self.as_pointer()] = stats
+        _write_state(self.outputs.get("Value"), state)
+        self.set_output_value(ctx, "Value", state)
 
 
 _CLASSES = [
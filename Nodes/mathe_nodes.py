@@ -1,11 +1,12 @@
 # animation_graph/Nodes/mathe_nodes.py
 
-from .mathematik import constants, calculators, adapters
+from .mathematik import constants, calculators, adapters, expression
 
 _MODULE = [
     constants,
     calculators,
     adapters,
+    expression,
 ]
 
 def register():
@@ -5,6 +5,7 @@ from bpy.types import Node
 from mathutils import Vector, Matrix, Euler
 
 from ..Mixin import AnimGraphNodeMixin
+from . import fusion
 
 def register():
     for c in _ADAPTERS: bpy.utils.register_class(c)
@@ -12,6 +13,37 @@ def register():
 def unregister():
     for c in reversed(_ADAPTERS): bpy.utils.unregister_class(c)
 
+# --------------------------------------------------------------------
+# Rechenkerne (auch von fusionierten Math-Ketten benutzt)
+# --------------------------------------------------------------------
+
+def combine_xyz(x, y, z):
+    return (float(x), float(y), float(z))
+
+def separate_xyz(v):
+    return float(v.x), float(v.y), float(v.z)
+
+def compose_matrix(t, r, s):
+    try:
+        e = Euler((r.x, r.y, r.z), "XYZ")
+        return Matrix.LocRotScale(t, e.to_quaternion(), s)
+    except Exception:
+        return Matrix.Identity(4)
+
+def decompose_matrix(m):
+    """(Translation, Rotation, Scale) als Tupel; None ohne Matrix."""
+    if m is None:
+        return None
+    try:
+        loc, rot_q, scale = m.decompose()
+        rot_e = rot_q.to_euler("XYZ")
+    except Exception:
+        loc = Vector((0.0, 0.0, 0.0))
+        rot_e = Euler((0.0, 0.0, 0.0), "XYZ")
+        scale = Vector((1.0, 1.0, 1.0))
+    return (loc.x, loc.y, loc.z), (rot_e.x, rot_e.y, rot_e.z), (scale.x, scale.y, scale.z)
+
+
 class CombineXYZ(Node, AnimGraphNodeMixin):
     bl_idname = "CombineXYZ"
     bl_label = "Combine XYZ"
@@ -24,11 +56,13 @@ class CombineXYZ(Node, AnimGraphNodeMixin):
         self.outputs.new("NodeSocketVectorXYZ", "Vector")
 
     def evaluate(self, tree, scene, ctx):
+        if fusion.evaluate_chain(self, tree, scene, ctx):
+            return
         x = self.socket_float(tree, "X", scene, ctx, 0.0)
         y = self.socket_float(tree, "Y", scene, ctx, 0.0)
         z = self.socket_float(tree, "Z", scene, ctx, 0.0)
         out = self.outputs.get("Vector")
-        if out: out.default_value = (float(x), float(y), float(z))
+        if out: out.default_value = combine_xyz(x, y, z)
 
 class SeparateXYZ(Node, AnimGraphNodeMixin):
     bl_idname = "SeparateXYZ"
@@ -42,13 +76,16 @@ class SeparateXYZ(Node, AnimGraphNodeMixin):
         self.outputs.new("NodeSocketFloat", "Z")
 
     def evaluate(self, tree, scene, ctx):
+        if fusion.evaluate_chain(self, tree, scene, ctx):
+            return
         v = self.socket_vector(tree, "Vector", scene, ctx, (0.0, 0.0, 0.0))
+        x, y, z = separate_xyz(v)
         ox = self.outputs.get("X")
         oy = self.outputs.get("Y")
         oz = self.outputs.get("Z")
-        if ox: ox.default_value = float(v.x)
-        if oy: oy.default_value = float(v.y)
-        if oz: oz.default_value = float(v.z)
+        if ox: ox.default_value = x
+        if oy: oy.default_value = y
+        if oz: oz.default_value = z
 
 class ComposeMatrix(Node, AnimGraphNodeMixin):
     bl_idname = "ComposeMatrix"
@@ -62,19 +99,15 @@ class ComposeMatrix(Node, AnimGraphNodeMixin):
         self.outputs.new("NodeSocketMatrix", "Matrix")
 
     def evaluate(self, tree, scene, ctx):
+        if fusion.evaluate_chain(self, tree, scene, ctx):
+            return
         t = self.socket_vector(tree, "Translation", scene, ctx, (0.0, 0.0, 0.0))
         r = self.socket_vector(tree, "Rotation", scene, ctx, (0.0, 0.0, 0.0))
         s = self.socket_vector(tree, "Scale", scene, ctx, (1.0, 1.0, 1.0))
 
-        try:
-            e = Euler((r.x, r.y, r.z), "XYZ")
-            m = Matrix.LocRotScale(t, e.to_quaternion(), s)
-        except Exception:
-            m = Matrix.Identity(4)
-
         out = self.outputs.get("Matrix")
         if out:
-            out.default_value = m
+            out.default_value = compose_matrix(t, r, s)
 
 class DecomposeMatrix(Node, AnimGraphNodeMixin):
     bl_idname = "DecomposeMatrix"
@@ -88,25 +121,20 @@ class DecomposeMatrix(Node, AnimGraphNodeMixin):
         self.outputs.new("NodeSocketVectorXYZ", "Scale")
 
     def evaluate(self, tree, scene, ctx):
-        m = self.socket_matrix(tree, "Matrix", scene, ctx, None)
-        if m is None:
+        if fusion.evaluate_chain(self, tree, scene, ctx):
             return
-
-        try:
-            loc, rot_q, scale = m.decompose()
-            rot_e = rot_q.to_euler("XYZ")
-        except Exception:
-            loc = Vector((0.0, 0.0, 0.0))
-            rot_e = Euler((0.0, 0.0, 0.0), "XYZ")
-            scale = Vector((1.0, 1.0, 1.0))
+        parts = decompose_matrix(self.socket_matrix(tree, "Matrix", scene, ctx, None))
+        if parts is None:
+            return
+        loc, rot_e, scale = parts
 
         ot = self.outputs.get("Translation")
         orot = self.outputs.get("Rotation")
         os = self.outputs.get("Scale")
 
-        if ot: ot.default_value = (loc.x, loc.y, loc.z)
-        if orot: orot.default_value = (rot_e.x, rot_e.y, rot_e.z)
-        if os: os.default_value = (scale.x, scale.y, scale.z)
+        if ot: ot.default_value = loc
+        if orot: orot.default_value = rot_e
+        if os: os.default_value = scale
 
 _ADAPTERS = [
     CombineXYZ,
@@ -7,6 +7,8 @@ from mathutils import Vector, Matrix, Euler
 from bpy.props import EnumProperty
 
 from ..Mixin import AnimGraphNodeMixin
+from . import fusion
+from ...Core import tree_hash
 
 def register():
     for c in _CALCULATORS: bpy.utils.register_class(c)
@@ -14,6 +16,12 @@ def register():
 def unregister():
     for c in reversed(_CALCULATORS): bpy.utils.unregister_class(c)
 
+def _on_operation_update(self, context):
+    # Operation ändert das Ergebnis -> Tree-Update (Plan/Caches invalidieren)
+    try:
+        tree_hash.node_changed(self)
+    except Exception: pass
+
 basic_operators = {
     ("ADD", "Add", ""),
     ("SUBTRACT", "Subtract", ""),
@@ -49,6 +57,116 @@ matrix_operators = basic_operators | {
 }
 
 
+# --------------------------------------------------------------------
+# Rechenkerne (auch von kompilierten Repeat-Zonen benutzt)
+# --------------------------------------------------------------------
+
+def int_math(op, a, b):
+    """(Result, Remainder) der Int-Operation op."""
+    try:
+        rem = 0
+        if op == "ADD":
+            r = a + b
+        elif op == "SUBTRACT":
+            r = a - b
+        elif op == "MULTIPLY":
+            r = a * b
+        elif op in {"MODULOS", "DIVIDE"}:
+            if b != 0:
+                r, rem = divmod(a, b)
+            else:
+                r, rem = 0, 0
+        elif op == "POWER":
+            r = int(a ** b)
+        elif op == "MINIMUM":
+            r = min(a, b)
+        elif op == "MAXIMUM":
+            r = max(a, b)
+        else:
+            r = 0
+    except Exception:
+        r = 0
+        rem = 0
+    return r, rem
+
+def float_math(op, a, b):
+    try:
+        if op == "ADD":
+            r = a + b
+        elif op == "SUBTRACT":
+            r = a - b
+        elif op == "MULTIPLY":
+            r = a * b
+        elif op == "DIVIDE":
+            r = a / b if b != 0.0 else 0.0
+        elif op == "POWER":
+            r = a ** b
+        elif op == "FLOOR":
+            r = math.floor(a)
+        elif op == "CEIL":
+            r = math.ceil(a)
+        elif op == "MINIMUM":
+            r = min(a, b)
+        elif op == "MAXIMUM":
+            r = max(a, b)
+        else:
+            r = 0.0
+    except Exception:
+        r = 0.0
+    return r
+
+def vector_math(op, A, B, s):
+    """(Vector, Float) der Operation op; None für den Output, den op nicht beschreibt."""
+    try:
+        if op == "ADD":
+            return A + B, None
+        if op == "SUBTRACT":
+            return A - B, None
+        if op == "MULTIPLY":
+            return Vector((A.x * B.x, A.y * B.y, A.z * B.z)), None
+        if op == "DOT":
+            return None, float(A.dot(B))
+        if op == "CROSS":
+            return A.cross(B), None
+        if op == "SCALE":
+            return A * float(s), None
+        if op == "LENGTH":
+            return None, float(A.length)
+        if op == "NORMALIZE":
+            return (A.normalized() if A.length > 0.0 else Vector((0.0, 0.0, 0.0))), None
+        if op == "DISTANCE":
+            return None, float((A - B).length)
+    except Exception:
+        pass
+    return None, None
+
+def matrix_math(op, A, B, s, exp):
+    try:
+        if op == "ADD":
+            return A + B
+        if op == "SUBTRACT":
+            return A - B
+        if op == "MULTIPLY":
+            # Matrix-Multiplikation (wie dein altes A @ B, nur robust eingebettet)
+            return A @ B
+        if op == "POWER":
+            r = Matrix.Identity(4)
+            if exp > 0:
+                for _ in range(int(exp)):
+                    r = r @ A
+            elif exp < 0:
+                inv = A.inverted()
+                for _ in range(abs(int(exp))):
+                    r = r @ inv
+            return r
+        if op == "SCALE":
+            # Skaliert alle Komponenten der Matrix
+            return A * float(s)
+        return Matrix.Identity(4)
+    except Exception:
+        return Matrix.Identity(4)
+
+
 class IntMath(Node, AnimGraphNodeMixin):
     bl_idname = "IntMath"
     bl_label = "Math (Int)"
@@ -58,6 +176,7 @@ class IntMath(Node, AnimGraphNodeMixin):
         name="Operation",
         items=int_operators,
         default="ADD",
+        update=_on_operation_update,
     )
 
     def init(self, context):
@@ -75,34 +194,11 @@ class IntMath(Node, AnimGraphNodeMixin):
         layout.prop(self, "operation", text="")
 
     def evaluate(self, tree, scene, ctx):
+        if fusion.evaluate_chain(self, tree, scene, ctx):
+            return
         a = self.socket_int(tree, "A", scene, ctx, 0)
         b = self.socket_int(tree, "B", scene, ctx, 0)
-        op = getattr(self, "operation", "ADD")
-
-        try:
-            rem = 0
-            if op == "ADD":
-                r = a + b
-            elif op == "SUBTRACT":
-                r = a - b
-            elif op == "MULTIPLY":
-                r = a * b
-            elif op in {"MODULOS", "DIVIDE"}:
-                if b != 0:
-                    r, rem = divmod(a, b)
-                else:
-                    r, rem = 0, 0
-            elif op == "POWER":
-                r = int(a ** b)
-            elif op == "MINIMUM":
-                r = min(a, b)
-            elif op == "MAXIMUM":
-                r = max(a, b)
-            else:
-                r = 0
-        except Exception:
-            r = 0
-            rem = 0
+        r, rem = int_math(getattr(self, "operation", "ADD"), a, b)
 
         out_div = self.outputs.get("Result")
         if out_div:
@@ -123,6 +219,7 @@ class FloatMath(Node, AnimGraphNodeMixin):
         name="Operation",
         items=float_operators,
         default="ADD",
+        update=_on_operation_update,
     )
 
     def init(self, context):
@@ -139,33 +236,11 @@ class FloatMath(Node, AnimGraphNodeMixin):
         layout.prop(self, "operation", text="")
 
     def evaluate(self, tree, scene, ctx):
+        if fusion.evaluate_chain(self, tree, scene, ctx):
+            return
         a = self.socket_float(tree, "A", scene, ctx, 0.0)
         b = self.socket_float(tree, "B", scene, ctx, 0.0)
-        op = getattr(self, "operation", "ADD")
-
-        try:
-            if op == "ADD":
-                r = a + b
-            elif op == "SUBTRACT":
-                r = a - b
-            elif op == "MULTIPLY":
-                r = a * b
-            elif op == "DIVIDE":
-                r = a / b if b != 0.0 else 0.0
-            elif op == "POWER":
-                r = a ** b
-            elif op == "FLOOR":
-                r = math.floor(a)
-            elif op == "CEIL":
-                r = math.ceil(a)
-            elif op == "MINIMUM":
-                r = min(a, b)
-            elif op == "MAXIMUM":
-                r = max(a, b)
-            else:
-                r = 0.0
-        except Exception:
-            r = 0.0
+        r = float_math(getattr(self, "operation", "ADD"), a, b)
 
         out = self.outputs.get("Result")
         if out: out.default_value = float(r)
@@ -179,6 +254,7 @@ class VectorMath(Node, AnimGraphNodeMixin):
         name="Operation",
         items=vector_operators,
         default="ADD",
+        update=_on_operation_update,
     )
 
     def init(self, context):
@@ -192,33 +268,19 @@ class VectorMath(Node, AnimGraphNodeMixin):
         layout.prop(self, "operation", text="")
 
     def evaluate(self, tree, scene, ctx):
+        if fusion.evaluate_chain(self, tree, scene, ctx):
+            return
         A = self.socket_vector(tree, "A", scene, ctx, (0.0, 0.0, 0.0))
         B = self.socket_vector(tree, "B", scene, ctx, (0.0, 0.0, 0.0))
         s = self.socket_float(tree, "Scale", scene, ctx, 1.0)
-        op = getattr(self, "operation", "ADD")
+        vec, flt = vector_math(getattr(self, "operation", "ADD"), A, B, s)
 
         out_v = self.outputs.get("Vector")
         out_f = self.outputs.get("Float")
 
         try:
-            if op == "ADD":
-                if out_v: out_v.default_value = (A + B)
-            elif op == "SUBTRACT":
-                if out_v: out_v.default_value = (A - B)
-            elif op == "MULTIPLY":
-                if out_v: out_v.default_value = Vector((A.x * B.x, A.y * B.y, A.z * B.z))
-            elif op == "DOT":
-                if out_f: out_f.default_value = float(A.dot(B))
-            elif op == "CROSS":
-                if out_v: out_v.default_value = A.cross(B)
-            elif op == "SCALE":
-                if out_v: out_v.default_value = (A * float(s))
-            elif op == "LENGTH":
-                if out_f: out_f.default_value = float(A.length)
-            elif op == "NORMALIZE":
-                if out_v: out_v.default_value = (A.normalized() if A.length > 0.0 else Vector((0.0, 0.0, 0.0)))
-            elif op == "DISTANCE":
-                if out_f: out_f.default_value = float((A - B).length)
+            if vec is not None and out_v: out_v.default_value = vec
+            if flt is not None and out_f: out_f.default_value = flt
         except Exception: pass
 
 class MatrixMath(Node, AnimGraphNodeMixin):
@@ -230,6 +292,7 @@ class MatrixMath(Node, AnimGraphNodeMixin):
         name="Operation",
         items=matrix_operators,
         default="MULTIPLY",
+        update=_on_operation_update,
     )
 
     def init(self, context):
@@ -252,43 +315,20 @@ class MatrixMath(Node, AnimGraphNodeMixin):
         layout.prop(self, "operation", text="")
 
     def evaluate(self, tree, scene, ctx):
+        if fusion.evaluate_chain(self, tree, scene, ctx):
+            return
         # Fallbacks: Identity für Matrizen, 1.0 fürs Skalieren
         A = self.socket_matrix(tree, "A", scene, ctx, Matrix.Identity(4))
         B = self.socket_matrix(tree, "B", scene, ctx, Matrix.Identity(4))
         s = self.socket_float(tree, "Scale", scene, ctx, 1.0)
         exp = self.socket_int(tree, "Exponent", scene, ctx, 1)
-        op = getattr(self, "operation", "MULTIPLY")
 
         out = self.outputs.get("Result")
         if not out:
             return
 
+        r = matrix_math(getattr(self, "operation", "MULTIPLY"), A, B, s, exp)
         try:
-            if op == "ADD":
-                r = A + B
-            elif op == "SUBTRACT":
-                r = A - B
-            elif op == "MULTIPLY":
-                # Matrix-Multiplikation (wie dein altes A @ B, nur robust eingebettet)
-                r = A @ B
-            elif op == "POWER":
-                if exp == 0:
-                    r = Matrix.Identity(4)
-                elif exp > 0:
-                    r = Matrix.Identity(4)
-                    for _ in range(int(exp)):
-                        r = r @ A
-                else:
-                    r = Matrix.Identity(4)
-                    inv = A.inverted()
-                    for _ in range(abs(int(exp))):
-                        r = r @ inv
-            elif op == "SCALE":
-                # Skaliert alle Komponenten der Matrix
-                r = A * float(s)
-            else:
-                r = Matrix.Identity(4)
-
             out.default_value = r
         except Exception:
             # Wenn Blender/Inputs mal wieder “kreativ” sind
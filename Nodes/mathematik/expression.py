@@ -0,0 +1,357 @@
+# animation_graph/Nodes/mathematik/expression.py
+
+import ast
+import math
+
+import bpy
+from bpy.types import Node, PropertyGroup
+from bpy.app.handlers import persistent, load_post
+from bpy.props import CollectionProperty, EnumProperty, StringProperty
+from mathutils import Vector, Matrix
+
+from ..Mixin import AnimGraphNodeMixin, retype_socket
+from ...Core import tree_hash
+
+
+def register():
+    for c in _CLASSES: bpy.utils.register_class(c)
+    if _on_load_post not in load_post: load_post.append(_on_load_post)
+
+def unregister():
+    if _on_load_post in load_post: load_post.remove(_on_load_post)
+    _COMPILED.clear()
+    for c in reversed(_CLASSES): bpy.utils.unregister_class(c)
+
+@persistent
+def _on_load_post(*_args):
+    _COMPILED.clear()
+
+
+# --------------------------------------------------------------------
+# Formel -> Funktion
+# --------------------------------------------------------------------
+# Die Formel wird einmal geparst, gegen eine Whitelist geprüft und zu einer einzigen
+# Python-Funktion (frame, *Variablen) kompiliert. Freie Namen werden zu Input-Sockets.
+# Kompiliert wird nur bei neuem Text (Cache über den Formeltext).
+
+# Formeltext -> _Compiled
+_COMPILED = {}
+_COMPILED_MAX = 512
+
+def _clamp(x, lo=0.0, hi=1.0):
+    return lo if x < lo else hi if x > hi else x
+
+def _lerp(a, b, t):
+    return a + (b - a) * t
+
+def _smoothstep(e0, e1, x):
+    if e1 == e0:
+        return 0.0 if x < e0 else 1.0
+    t = _clamp((x - e0) / (e1 - e0))
+    return t * t * (3.0 - 2.0 * t)
+
+def _vec(x, y=None, z=None):
+    if y is None:
+        return Vector((x, x, x))
+    return Vector((x, y, 0.0 if z is None else z))
+
+def _normalize(v):
+    return v.normalized() if v.length > 0.0 else Vector((0.0, 0.0, 0.0))
+
+def _fract(x):
+    return x - math.floor(x)
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+def _pow(a, b):
+    # Ganzzahlige Potenzen über float: kein unbegrenztes int-Wachstum (9 ** 9 ** 9)
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return float(a) ** float(b)
+    return a ** b
+
+_FUNCTIONS = {
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan, "atan2": math.atan2,
+    "sqrt": math.sqrt, "exp": math.exp, "log": math.log,
+    "floor": math.floor, "ceil": math.ceil, "abs": abs, "min": min, "max": max,
+    "radians": math.radians, "degrees": math.degrees,
+    "clamp": _clamp, "lerp": _lerp, "mix": _lerp, "smoothstep": _smoothstep,
+    "fract": _fract, "sign": _sign,
+    "vec": _vec, "length": lambda v: v.length, "normalize": _normalize,
+    "dot": lambda a, b: a.dot(b), "cross": lambda a, b: a.cross(b),
+    "identity": lambda: Matrix.Identity(4),
+}
+
+_CONSTANTS = {"pi": math.pi, "tau": math.tau, "e": math.e}
+
+_RESERVED = set(_FUNCTIONS) | set(_CONSTANTS) | {"frame"}
+
+_ATTRIBUTES = {"x", "y", "z", "w", "length"}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.Name, ast.Load, ast.Constant, ast.Attribute, ast.Subscript,
+    ast.unaryop, ast.boolop, ast.cmpop,
+    # Arithmetik einzeln: Shifts/Bit-Operatoren (1 << 10 ** 10) würden unbegrenzt rechnen
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+)
+
+class _Compiled:
+    __slots__ = ("fn", "names", "uses_frame", "error")
+
+    def __init__(self, fn, names, uses_frame, error=""):
+        self.fn = fn
+        # Freie Variablen in Reihenfolge des Auftretens (= Input-Sockets)
+        self.names = names
+        self.uses_frame = uses_frame
+        self.error = error
+
+class _PowToCall(ast.NodeTransformer):
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return ast.copy_location(
+                ast.Call(func=ast.Name(id="_pow", ctx=ast.Load()), args=[node.left, node.right], keywords=[]),
+                node,
+            )
+        return node
+
+def _validate(tree):
+    """Freie Namen der Formel; ValueError bei nicht erlaubten Konstrukten."""
+    names = []
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"'{type(node).__name__}' not allowed")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float, bool):
+            raise ValueError("only numeric constants allowed")
+        if isinstance(node, ast.Attribute) and node.attr not in _ATTRIBUTES:
+            raise ValueError(f"attribute '.{node.attr}' not allowed")
+        if isinstance(node, ast.Subscript) and not (
+            isinstance(node.slice, ast.Constant) and type(node.slice.value) is int
+        ):
+            raise ValueError("only constant integer indices allowed")
+        if isinstance(node, ast.Call):
+            if not (isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS) or node.keywords:
+                raise ValueError("only built-in functions can be called")
+        if isinstance(node, ast.Name):
+            if node.id.startswith("_"):
+                raise ValueError(f"name '{node.id}' not allowed")
+            if node.id not in _RESERVED and node.id not in names:
+                names.append(node.id)
+    return names
+
+def _compile(text):
+    try:
+        tree = ast.parse(text.strip() or "0", mode="eval")
+        names = _validate(tree)
+    except (SyntaxError, ValueError) as ex:
+        return _Compiled(None, (), False, str(getattr(ex, "msg", None) or ex))
+
+    uses_frame = any(isinstance(n, ast.Name) and n.id == "frame" for n in ast.walk(tree))
+    body = _PowToCall().visit(tree).body
+    args = ast.arguments(
+        posonlyargs=[],
+        args=[ast.arg(arg=name) for name in ("frame", *names)],
+        kwonlyargs=[], kw_defaults=[], defaults=[],
+    )
+    fn_ast = ast.fix_missing_locations(ast.Expression(body=ast.Lambda(args=args, body=body)))
+    env = {"__builtins__": {}, "_pow": _pow, **_FUNCTIONS, **_CONSTANTS}
+    try:
+        fn = eval(compile(fn_ast, "<expression>", "eval"), env)
+    except Exception as ex:
+        return _Compiled(None, (), False, str(ex))
+    return _Compiled(fn, tuple(names), uses_frame)
+
+def compiled_expression(text):
+    compiled = _COMPILED.get(text)
+    if compiled is None:
+        if len(_COMPILED) >= _COMPILED_MAX:
+            _COMPILED.clear()
+        compiled = _COMPILED[text] = _compile(text)
+    return compiled
+
+
+# --------------------------------------------------------------------
+# node
+# --------------------------------------------------------------------
+
+# data_type -> (Socket-Typ, Getter am Mixin)
+_VALUE_TYPES = {
+    "FLOAT": ("NodeSocketFloat", "socket_float"),
+    "INT": ("NodeSocketInt", "socket_int"),
+    "VECTOR": ("NodeSocketVector", "socket_vector"),
+    "MATRIX": ("NodeSocketMatrix", "socket_matrix"),
+}
+
+_DATA_TYPE_ITEMS = [
+    ("FLOAT", "Float", ""),
+    ("INT", "Integer", ""),
+    ("VECTOR", "Vector", ""),
+    ("MATRIX", "Matrix", ""),
+]
+
+def _owner_node(item):
+    # 'nodes["Expression"].variables[0]' -> Node
+    path = item.path_from_id()
+    return item.id_data.path_resolve(path.rsplit(".variables[", 1)[0])
+
+def _on_expression_update(self, context):
+    self._sync_variables()
+    try:
+        tree_hash.node_changed(self)
+    except Exception: pass
+
+def _on_data_type_update(self, context):
+    self._sync_result_socket()
+    try:
+        tree_hash.node_changed(self)
+    except Exception: pass
+
+def _on_variable_type_update(self, context):
+    try:
+        node = _owner_node(self)
+    except Exception:
+        return
+    node._sync_variables()
+    try:
+        tree_hash.node_changed(node)
+    except Exception: pass
+
+def _coerce_result(value, data_type):
+    if data_type == "FLOAT":
+        return float(value)
+    if data_type == "INT":
+        return int(value)
+    if data_type == "VECTOR":
+        if isinstance(value, (int, float)):
+            return Vector((value, value, value))
+        return Vector(value).to_3d()
+    if isinstance(value, Matrix):
+        return value.to_4x4()
+    return Matrix(value)
+
+def _fallback_result(data_type):
+    if data_type == "VECTOR":
+        return Vector((0.0, 0.0, 0.0))
+    if data_type == "MATRIX":
+        return Matrix.Identity(4)
+    return 0 if data_type == "INT" else 0.0
+
+
+class AnimGraphExpressionVariable(PropertyGroup):
+    data_type: EnumProperty(
+        name="Type",
+        items=_DATA_TYPE_ITEMS,
+        default="FLOAT",
+        update=_on_variable_type_update,
+    )
+
+
+class ExpressionNode(Node, AnimGraphNodeMixin):
+    """Formel über benannte Inputs, einmal zu einer Funktion kompiliert (ersetzt Math-Ketten)."""
+    bl_idname = "ExpressionNode"
+    bl_label = "Expression"
+    bl_icon = "EXPR"
+
+    expression: StringProperty(
+        name="Expression",
+        description="Formel über Inputs, frame, pi/tau/e und Funktionen wie sin, lerp, clamp, vec, dot",
+        default="a * b",
+        update=_on_expression_update,
+    )
+
+    data_type: EnumProperty(
+        name="Type",
+        items=_DATA_TYPE_ITEMS,
+        default="FLOAT",
+        update=_on_data_type_update,
+    )
+
+    variables: CollectionProperty(type=AnimGraphExpressionVariable)
+
+    def init(self, context):
+        self.outputs.new("NodeSocketFloat", "Result")
+        self._sync_variables()
+
+    def draw_buttons(self, context, layout):
+        layout.prop(self, "expression", text="")
+        layout.prop(self, "data_type", text="")
+
+        compiled = compiled_expression(self.expression)
+        if compiled.error:
+            layout.label(text=compiled.error, icon="ERROR")
+
+        if len(self.variables):
+            col = layout.column(align=True)
+            for var in self.variables:
+                row = col.row(align=True)
+                row.label(text=var.name)
+                row.prop(var, "data_type", text="")
+
+    def _sync_result_socket(self):
+        retype_socket(self.outputs, "Result", _VALUE_TYPES[self.data_type][0], 0)
+
+    def _sync_variables(self):
+        """Variablen/Input-Sockets an die freien Namen der Formel anpassen (Typen bleiben erhalten)."""
+        compiled = compiled_expression(self.expression)
+        if compiled.error:
+            # Halbfertige Formel: Sockets (und ihre Links) nicht verwerfen
+            return
+        names = compiled.names
+
+        types = {var.name: var.data_type for var in self.variables}
+        if [var.name for var in self.variables] != list(names):
+            self.variables.clear()
+            for name in names:
+                var = self.variables.add()
+                var.name = name
+                var.data_type = types.get(name, "FLOAT")
+
+        for sock in [s for s in self.inputs if s.name not in names]:
+            self.inputs.remove(sock)
+        for index, var in enumerate(self.variables):
+            retype_socket(self.inputs, var.name, _VALUE_TYPES[var.data_type][0], index)
+
+    def is_pure(self):
+        """Ohne frame liefert die Formel bei konstanten Inputs jeden Frame dasselbe (Constant Folding)."""
+        compiled = compiled_expression(self.expression)
+        return compiled.fn is not None and not compiled.uses_frame
+
+    def _read_variable(self, tree, name, scene, ctx):
+        slot = self._input_slot(tree, name)
+        kind = slot.kind if slot is not None else "FLOAT"
+        if kind == "INT":
+            return self.socket_int(tree, name, scene, ctx, 0)
+        if kind == "MATRIX":
+            return self.socket_matrix(tree, name, scene, ctx, Matrix.Identity(4))
+        if kind == "VECTOR":
+            return self.socket_vector(tree, name, scene, ctx, (0.0, 0.0, 0.0))
+        return self.socket_float(tree, name, scene, ctx, 0.0)
+
+    def evaluate(self, tree, scene, ctx):
+        data_type = self.data_type
+        compiled = compiled_expression(self.expression)
+
+        result = None
+        if compiled.fn is not None:
+            frame = float(getattr(scene, "frame_current_final", 0.0)) if scene is not None else 0.0
+            args = [self._read_variable(tree, name, scene, ctx) for name in compiled.names]
+            try:
+                result = _coerce_result(compiled.fn(frame, *args), data_type)
+            except Exception:
+                result = None
+        if result is None:
+            result = _fallback_result(data_type)
+
+        out = self.outputs.get("Result")
+        if out:
+            try: out.default_value = result
+            except Exception: pass
+        self.set_output_value(ctx, "Result", result)
+
+
+_CLASSES = [
+    AnimGraphExpressionVariable,
+    ExpressionNode,
+]
@@ -0,0 +1,206 @@
+# animation_graph/Nodes/mathematik/fusion.py
+
+from mathutils import Matrix
+
+from . import calculators, adapters
+from ...Core import eval_plan
+
+
+# Fusionierte Math-Ketten (eval_plan.FusedChain): die Kette wird einmal zu einer Python-
+# Funktion generiert, die die Rechenkerne der Nodes direkt aufruft. Zwischenwerte bleiben
+# lokale Variablen; gelesen werden nur die Inputs von außerhalb der Kette, geschrieben
+# nur die Outputs des Root-Nodes.
+
+_IDENTITY = object()
+
+# bl_idname -> [(Input, Kategorie, Fallback)]
+_INPUTS = {
+    "IntMath": [("A", "INT", 0), ("B", "INT", 0)],
+    "FloatMath": [("A", "FLOAT", 0.0), ("B", "FLOAT", 0.0)],
+    "VectorMath": [("A", "VECTOR", (0.0, 0.0, 0.0)), ("B", "VECTOR", (0.0, 0.0, 0.0)), ("Scale", "FLOAT", 1.0)],
+    "MatrixMath": [("A", "MATRIX", _IDENTITY), ("B", "MATRIX", _IDENTITY), ("Scale", "FLOAT", 1.0), ("Exponent", "INT", 1)],
+    "CombineXYZ": [("X", "FLOAT", 0.0), ("Y", "FLOAT", 0.0), ("Z", "FLOAT", 0.0)],
+    "SeparateXYZ": [("Vector", "VECTOR", (0.0, 0.0, 0.0))],
+    "ComposeMatrix": [
+        ("Translation", "VECTOR", (0.0, 0.0, 0.0)),
+        ("Rotation", "VECTOR", (0.0, 0.0, 0.0)),
+        ("Scale", "VECTOR", (1.0, 1.0, 1.0)),
+    ],
+    "DecomposeMatrix": [("Matrix", "MATRIX", None)],
+}
+
+_COERCE = {
+    "INT": eval_plan.coerce_int,
+    "FLOAT": eval_plan.coerce_float,
+    "VECTOR": eval_plan.coerce_vector,
+    "MATRIX": eval_plan.coerce_matrix,
+}
+
+_MISSING = object()
+
+
+class FusedKernel:
+    __slots__ = ("fn", "leaves", "outputs")
+
+    def __init__(self, fn, leaves, outputs):
+        self.fn = fn
+        # [(Node, Slot, Kategorie, Fallback)] der Inputs von außerhalb der Kette
+        self.leaves = leaves
+        # [(Name, Socket)] der Root-Outputs, in der Reihenfolge der Rückgabe von fn
+        self.outputs = outputs
+
+
+def _fallback(fallback):
+    return Matrix.Identity(4) if fallback is _IDENTITY else fallback
+
+def _typed(slot, kind, v, fallback):
+    # wie AnimGraphNodeMixin.socket_int/float/vector/matrix
+    fallback = _fallback(fallback)
+    if slot.kind == kind and slot.convert is not None:
+        return slot.convert(v, fallback)
+    return _COERCE[kind](v, fallback)
+
+
+# --------------------------------------------------------------------
+# code generation
+# --------------------------------------------------------------------
+# Pro Node: Zeilen plus {Output-Name: (Variable, kann None sein)}. Outputs, die eine
+# Operation nicht beschreibt (None), behalten wie bisher ihren letzten Socket-Wert.
+
+def _emit(node, i, args):
+    op = repr(getattr(node, "operation", ""))
+    p = f"n{i}"
+    bl_idname = node.bl_idname
+    if bl_idname == "IntMath":
+        return [f"{p}_r, {p}_rem = int_math({op}, {args[0]}, {args[1]})"], {
+            "Result": (f"int({p}_r)", False),
+            "Remainder": (f"int({p}_rem)", False),
+        }
+    if bl_idname == "FloatMath":
+        return [f"{p}_Result = float(float_math({op}, {args[0]}, {args[1]}))"], {"Result": (f"{p}_Result", False)}
+    if bl_idname == "VectorMath":
+        return [f"{p}_Vector, {p}_Float = vector_math({op}, {args[0]}, {args[1]}, {args[2]})"], {
+            "Vector": (f"{p}_Vector", True),
+            "Float": (f"{p}_Float", True),
+        }
+    if bl_idname == "MatrixMath":
+        return [f"{p}_Result = matrix_math({op}, {', '.join(args)})"], {"Result": (f"{p}_Result", False)}
+    if bl_idname == "CombineXYZ":
+        return [f"{p}_Vector = combine_xyz({', '.join(args)})"], {"Vector": (f"{p}_Vector", False)}
+    if bl_idname == "SeparateXYZ":
+        return [f"{p}_X, {p}_Y, {p}_Z = separate_xyz({args[0]})"], {
+            "X": (f"{p}_X", False),
+            "Y": (f"{p}_Y", False),
+            "Z": (f"{p}_Z", False),
+        }
+    if bl_idname == "ComposeMatrix":
+        return [f"{p}_Matrix = compose_matrix({', '.join(args)})"], {"Matrix": (f"{p}_Matrix", False)}
+    # DecomposeMatrix
+    return [
+        f"{p}_parts = decompose_matrix({args[0]})",
+        f"{p}_Translation, {p}_Rotation, {p}_Scale = {p}_parts if {p}_parts is not None else (None, None, None)",
+    ], {
+        "Translation": (f"{p}_Translation", True),
+        "Rotation": (f"{p}_Rotation", True),
+        "Scale": (f"{p}_Scale", True),
+    }
+
+def compile_chain(plan, chain):
+    """FusedKernel für chain, None wenn ein Node nicht fusioniert werden kann."""
+    members = {node.as_pointer(): i for i, node in enumerate(chain.members)}
+    lines = []
+    outputs_by_node = []
+    leaves = []
+    consts = []      # (Slot, Kategorie, Fallback) interner Reads
+    stale = []       # Sockets, deren letzter Wert für nicht beschriebene Outputs gilt
+
+    for i, node in enumerate(chain.members):
+        spec = _INPUTS.get(node.bl_idname)
+        if spec is None:
+            return None
+        node_ptr = node.as_pointer()
+        args = []
+        for name, kind, fallback in spec:
+            slot = plan.slot(node_ptr, name)
+            if slot is None:
+                return None
+            src = members.get(slot.from_key[0]) if slot.from_node is not None and not slot.folded else None
+            if src is None:
+                args.append(f"L[{len(leaves)}]")
+                leaves.append((node, slot, kind, fallback))
+                continue
+
+            var, may_be_none = outputs_by_node[src].get(slot.from_socket.name, (None, False))
+            if var is None:
+                return None
+            if may_be_none:
+                var = f"({var} if {var} is not None else G({len(stale)}))"
+                stale.append(slot.from_socket)
+            args.append(f"T(C[{len(consts)}], {kind!r}, {var}, F[{len(consts)}])")
+            consts.append((slot, kind, fallback))
+
+        node_lines, outs = _emit(node, i, args)
+        lines.extend(node_lines)
+        outputs_by_node.append(outs)
+
+    root = chain.root
+    root_outs = outputs_by_node[-1]
+    outputs = [(sock.name, sock) for sock in root.outputs if sock.name in root_outs]
+    lines.append("return (" + "".join(f"{root_outs[name][0]}, " for name, _sock in outputs) + ")")
+
+    source = "def fused(L):\n" + "".join(f"    {line}\n" for line in lines)
+    env = {
+        "int_math": calculators.int_math,
+        "float_math": calculators.float_math,
+        "vector_math": calculators.vector_math,
+        "matrix_math": calculators.matrix_math,
+        "combine_xyz": adapters.combine_xyz,
+        "separate_xyz": adapters.separate_xyz,
+        "compose_matrix": adapters.compose_matrix,
+        "decompose_matrix": adapters.decompose_matrix,
+        "T": _typed,
+        "C": [slot for slot, _kind, _fallback in consts],
+        "F": [fallback for _slot, _kind, fallback in consts],
+        "G": lambda k: getattr(stale[k], "default_value", None),
+    }
+    exec(compile(source, f"<fused {root.name}>", "exec"), env)
+    return FusedKernel(env["fused"], leaves, outputs)
+
+
+# --------------------------------------------------------------------
+# evaluate
+# --------------------------------------------------------------------
+
+def evaluate_chain(node, tree, scene, ctx):
+    """Ist node Root einer fusionierten Kette: ganze Kette rechnen, Outputs schreiben, True."""
+    try:
+        plan = eval_plan.get_plan(tree)
+    except Exception:
+        return False
+    chain = plan.fused_chains.get(node.as_pointer())
+    if chain is None:
+        return False
+
+    kernel = chain.kernel
+    if kernel is False:
+        try:
+            kernel = compile_chain(plan, chain)
+        except Exception:
+            kernel = None
+        chain.kernel = kernel
+    if kernel is None:
+        return False
+
+    args = []
+    for owner, slot, kind, fallback in kernel.leaves:
+        args.append(_typed(slot, kind, owner.eval_slot(tree, slot, scene, ctx), fallback))
+
+    for (name, sock), v in zip(kernel.outputs, kernel.fn(args)):
+        if v is None:
+            continue
+        try:
+            sock.default_value = v
+        except Exception:
+            pass
+        node.set_output_value(ctx, name, v)
+    return True
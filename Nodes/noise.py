@@ -0,0 +1,87 @@
+# animation_graph/Nodes/noise.py
+
+import numpy as np
+
+
+# Glatte 1D-Gradient-Noise (Perlin) über die Zeit, eine Zeile pro Bone und Kanal.
+# Der Wert hängt nur von (Seed, Zeile, Frame) ab: kein Zustand zwischen Frames, beliebige
+# Frames in beliebiger Reihenfolge (Scrubbing, paralleles Baken) liefern dasselbe.
+
+_TABLE_SIZE = 256
+
+# Feste Tabellen (fester Seed), damit Ergebnisse zwischen Sessions gleich bleiben
+_rng = np.random.default_rng(0x5EED)
+_GRADIENTS = _rng.uniform(-1.0, 1.0, _TABLE_SIZE)
+# doppelt, damit PERM[PERM[i] + k] ohne zweites Modulo auskommt
+_PERM = np.tile(_rng.permutation(_TABLE_SIZE), 2)
+del _rng
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+# (seed, Zeilen) -> (Permutations-Offsets, Phasen)
+_ROW_KEYS = {}
+_ROW_KEYS_MAX = 64
+
+
+def _mix32(h):
+    # Integer-Hash (lowbias32), vektorisiert
+    h ^= h >> np.uint64(16)
+    h = (h * np.uint64(0x7FEB352D)) & _MASK32
+    h ^= h >> np.uint64(15)
+    h = (h * np.uint64(0x846CA68B)) & _MASK32
+    h ^= h >> np.uint64(16)
+    return h
+
+def row_keys(seed, rows):
+    """
+    Pro Zeile ein Permutations-Offset und eine Phase. Zeile i bekommt unabhängig von der
+    Gesamtzahl immer dieselben Werte (Bones am Ende des Sets ändern die vorderen nicht).
+    """
+    key = (int(seed), int(rows))
+    cached = _ROW_KEYS.get(key)
+    if cached is not None:
+        return cached
+
+    idx = np.arange(rows, dtype=np.uint64)
+    s = ((int(seed) & 0xFFFFFFFF) * 0x9E3779B1) & 0xFFFFFFFF
+    h = (np.uint64(s) + idx * np.uint64(0x85EBCA77)) & _MASK32
+    h = _mix32(_mix32(h))
+    offsets = (h & np.uint64(_TABLE_SIZE - 1)).astype(np.int64)
+    phases = (h >> np.uint64(8)).astype(np.float64) * (_TABLE_SIZE / float(1 << 24))
+
+    if len(_ROW_KEYS) >= _ROW_KEYS_MAX:
+        _ROW_KEYS.clear()
+    cached = _ROW_KEYS[key] = (offsets, phases)
+    return cached
+
+def _gradient_noise(x, offsets):
+    """Perlin-Noise in [-1, 1] an den Stellen x, Zeile für Zeile mit eigenem Offset."""
+    i0 = np.floor(x)
+    t = x - i0
+    i0 = i0.astype(np.int64) & (_TABLE_SIZE - 1)
+    i1 = (i0 + 1) & (_TABLE_SIZE - 1)
+    g0 = _GRADIENTS[_PERM[_PERM[i0] + offsets]]
+    g1 = _GRADIENTS[_PERM[_PERM[i1] + offsets]]
+    a = g0 * t
+    b = g1 * (t - 1.0)
+    u = t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+    # 1D-Perlin liegt in [-0.5, 0.5]
+    return 2.0 * (a + (b - a) * u)
+
+def fbm(time, speed, octaves, offsets, phases):
+    """
+    Summe von octaves Noise-Lagen (doppelte Frequenz, halbe Amplitude) zur Zeit time,
+    normiert auf [-1, 1]. Ergebnis: ein Wert pro Zeile.
+    """
+    octaves = max(1, int(octaves))
+    x = phases + float(time) * float(speed)
+    total = np.zeros_like(x)
+    amp = 1.0
+    norm = 0.0
+    for o in range(octaves):
+        # jede Oktave mit eigener Permutation, sonst korrelieren die Lagen
+        total += amp * _gradient_noise(x, (offsets + 37 * o) & (_TABLE_SIZE - 1))
+        norm += amp
+        amp *= 0.5
+        x = x * 2.0
+    return total / norm
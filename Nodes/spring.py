@@ -0,0 +1,172 @@
+# animation_graph/Nodes/spring.py
+
+import math
+
+import numpy as np
+
+
+# Verlet-Feder-Kette für Bone Sets: ein Partikel pro Bone-Tail, alle Bones eines Sets als
+# (N, 3)-Arrays. Feste Zeitschritte (Substeps pro Frame). Der laufende Zustand liegt im
+# pose_cache; Ziele jedes ausgewerteten Frames und alle Checkpoint-Intervall Frames der
+# Zustand liegen im Checkpoint-Speicher des Playback-Caches. Übersprungene Frames werden mit
+# ihren eigenen Zielen nachsimuliert; ohne solchen exakten Weg startet der Frame in Ruhelage.
+
+# Jacobi-Iterationen der Längen-Constraints pro Substep
+_ITERATIONS = 4
+# Mehr Frames auf einmal werden nicht nachsimuliert (Sprung -> Ruhelage)
+_MAX_CATCHUP = 120
+_MAX_CHECKPOINTS = 256
+_MAX_TARGETS = 4096
+
+
+class SpringParams:
+    __slots__ = ("stiffness", "damping", "gravity", "substeps", "interval", "dt", "key")
+
+    def __init__(self, stiffness, damping, gravity, substeps, interval, dt, start, revision=None):
+        self.stiffness = float(stiffness)
+        self.damping = max(0.0, float(damping))
+        self.gravity = np.array(gravity[:3], dtype=np.float64)
+        self.substeps = max(1, int(substeps))
+        self.interval = max(1, int(interval))
+        self.dt = float(dt)
+        # Änderung -> Checkpoints ungültig (revision: Tree-Inhalt/Action-Inputs, die die Ziele bestimmen)
+        self.key = (self.stiffness, self.damping, tuple(self.gravity.tolist()),
+                    self.substeps, self.interval, self.dt, int(start), revision)
+
+
+class SpringSim:
+    """Zustand nach Frame frame: Positionen, Positionen einen Substep davor, Ziele des Frames."""
+
+    __slots__ = ("frame", "pos", "prev", "head", "tail", "exact")
+
+    def __init__(self, frame, pos, prev, head, tail, exact):
+        self.frame = frame
+        self.pos = pos
+        self.prev = prev
+        self.head = head
+        self.tail = tail
+        # nur aus Einzel-Frame-Schritten mit den Zielen jedes Frames ab Start entstanden (taugt als Checkpoint)
+        self.exact = exact
+
+    @classmethod
+    def at_rest(cls, frame, head, tail, exact):
+        return cls(frame, tail.copy(), tail.copy(), head, tail, exact)
+
+    def copy(self):
+        return SpringSim(self.frame, self.pos.copy(), self.prev.copy(), self.head, self.tail, self.exact)
+
+
+def anchors(pos, head, tail, parents):
+    """Aufhängepunkte: animierter Head, verschoben um die Auslenkung des Parent-Tails (Parent im Set)."""
+    has_parent = (parents >= 0)[:, None]
+    return head + np.where(has_parent, pos[parents] - tail[parents], 0.0)
+
+def _step_frame(sim, head, tail, parents, params):
+    n_sub = params.substeps
+    h = params.dt / n_sub
+    keep = math.exp(-params.damping * h)
+    head0, tail0 = sim.head, sim.tail
+    pos, prev = sim.pos, sim.prev
+
+    for s in range(n_sub):
+        # Ziele über den Frame interpolieren
+        f = (s + 1) / n_sub
+        th = head0 + (head - head0) * f
+        tt = tail0 + (tail - tail0) * f
+
+        vel = (pos - prev) * keep
+        prev = pos
+        acc = params.gravity + params.stiffness * (tt - pos)
+        pos = pos + vel + acc * (h * h)
+
+        lengths = np.linalg.norm(tt - th, axis=1)
+        for _ in range(_ITERATIONS):
+            anchor = anchors(pos, th, tt, parents)
+            d = pos - anchor
+            dist = np.linalg.norm(d, axis=1)
+            ok = (dist > 1e-9)[:, None]
+            pos = np.where(ok, anchor + d * (lengths / np.maximum(dist, 1e-9))[:, None], anchor + (tt - th))
+
+    sim.pos, sim.prev = pos, prev
+    sim.head, sim.tail = head, tail
+    sim.frame += 1
+
+def _store_checkpoint(checkpoints, sim):
+    if len(checkpoints) >= _MAX_CHECKPOINTS:
+        checkpoints.pop(next(iter(checkpoints)))
+    checkpoints[sim.frame] = sim.copy()
+
+def _record_targets(store, frame, head, tail):
+    """
+    Ziele des Frames merken. Weichen sie von früher gemerkten ab (Upstream-Edit), gilt der
+    Speicher nicht mehr; dann True.
+    """
+    targets = store["targets"]
+    known = targets.get(frame)
+    stale = False
+    if known is not None:
+        if np.allclose(known[0], head, rtol=0.0, atol=1e-9) and np.allclose(known[1], tail, rtol=0.0, atol=1e-9):
+            return False
+        targets.clear()
+        store["checkpoints"].clear()
+        stale = True
+    elif len(targets) >= _MAX_TARGETS:
+        targets.pop(next(iter(targets)))
+    targets[frame] = (head, tail)
+    return stale
+
+def _exact_base(sim, store, frame, start, head, tail):
+    """Spätester exakter Zustand <= frame, von dem aus alle Zwischenziele bekannt sind; sonst None."""
+    checkpoints = store["checkpoints"]
+    targets = store["targets"]
+
+    base = sim if sim is not None and sim.exact and sim.frame <= frame else None
+    best = max((k for k in checkpoints if k <= frame), default=None)
+    if best is not None and (base is None or best > base.frame):
+        base = checkpoints[best].copy()
+    if base is None and frame >= start:
+        at_start = (head, tail) if frame == start else targets.get(start)
+        if at_start is not None:
+            base = SpringSim.at_rest(start, at_start[0], at_start[1], exact=True)
+    if base is None or frame - base.frame > _MAX_CATCHUP:
+        return None
+    for f in range(base.frame + 1, frame):
+        if f not in targets:
+            return None
+    return base
+
+def advance(state, store, frame, start, head, tail, parents, params, record=True):
+    """
+    Simulation bis frame vorziehen und die Tail-Positionen zurückgeben.
+    state: {"sim": SpringSim|None} (laufender Zustand, pose_cache)
+    store: {"key", "targets": {frame: (head, tail)}, "checkpoints": {frame: SpringSim}} (Playback-Cache)
+    record: Ziele und Checkpoints dieses Laufs in store ablegen (nicht beim Prefetch)
+    """
+    if store.get("key") != params.key:
+        store.clear()
+        store.update(key=params.key, targets={}, checkpoints={})
+
+    sim = state["sim"]
+    if record and _record_targets(store, frame, head, tail) and sim is not None:
+        sim.exact = False
+
+    base = _exact_base(sim, store, frame, start, head, tail)
+    if base is not None:
+        # exakt: Zwischenframes mit ihren eigenen Zielen nachsimulieren
+        targets = store["targets"]
+        sim = base
+        while sim.frame < frame:
+            f = sim.frame + 1
+            f_head, f_tail = (head, tail) if f == frame else targets[f]
+            _step_frame(sim, f_head, f_tail, parents, params)
+            if record and (sim.frame - start) % params.interval == 0:
+                _store_checkpoint(store["checkpoints"], sim)
+    elif sim is not None and sim.frame == frame - 1:
+        # Fortsetzung eines nicht exakten Laufs
+        _step_frame(sim, head, tail, parents, params)
+    elif sim is None or sim.frame != frame:
+        # Sprung ohne bekannte Zwischenziele: Ruhelage statt Näherung mit den Zielen dieses Frames
+        sim = SpringSim.at_rest(frame, head, tail, exact=False)
+
+    state["sim"] = sim
+    return sim.pos
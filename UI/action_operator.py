@@ -1,7 +1,7 @@
 # animation_graph/UI/action_panel.py
 
 import bpy
-from ..Core import node_tree
+from ..Core import node_tree, sockets
 
 
 def register():
@@ -113,7 +113,10 @@ class ANIMGRAPH_PT_action_binding(bpy.types.Panel):
                 row = col.row(align=True)
                 arm_obj = slot.bone_armature_obj
                 row.enabled = bool(arm_obj and arm_obj.type == "ARMATURE" and arm_obj.data)
-                row.prop(slot, "bone_name", text="Bone")
+                if sockets.bone_count(arm_obj) >= sockets.BONE_SEARCH_MIN:
+                    row.prop(slot, "bone_search", text="Bone", icon="BONE_DATA")
+                else:
+                    row.prop(slot, "bone_name", text="Bone")
                 continue
 
             if kind == "MATRIX":
@@ -0,0 +1,84 @@
+# animation_graph/UI/cache_panel.py
+
+import bpy
+from ..Core import playback_cache, disk_cache
+
+
+def register():
+    for c in _CLASSES: bpy.utils.register_class(c)
+
+def unregister():
+    for c in reversed(_CLASSES): bpy.utils.unregister_class(c)
+
+
+class ANIMGRAPH_OT_clear_playback_cache(bpy.types.Operator):
+    bl_idname = "animgraph.clear_playback_cache"
+    bl_label = "Clear Playback Cache"
+    bl_description = "Drop all cached AnimGraph poses"
+
+    def execute(self, context):
+        playback_cache.clear()
+        return {'FINISHED'}
+
+
+class ANIMGRAPH_OT_write_disk_cache(bpy.types.Operator):
+    bl_idname = "animgraph.write_disk_cache"
+    bl_label = "Write Disk Cache"
+    bl_description = "Write the poses recorded so far to the disk cache directory"
+
+    def execute(self, context):
+        error = disk_cache.flush_all()
+        if error:
+            self.report({'WARNING'}, f"Disk cache write failed: {error}")
+        return {'FINISHED'}
+
+
+class ANIMGRAPH_PT_playback_cache(bpy.types.Panel):
+    bl_label = "AnimationNodes Cache"
+    bl_space_type = "DOPESHEET_EDITOR"
+    bl_region_type = "UI"
+    bl_category = "Action"
+
+    @classmethod
+    def poll(cls, context):
+        return playback_cache.settings(getattr(context, "scene", None)) is not None
+
+    def draw(self, context):
+        layout = self.layout
+        settings = playback_cache.settings(context.scene)
+
+        layout.prop(settings, "use_cache")
+        col = layout.column()
+        col.enabled = settings.use_cache
+        col.prop(settings, "budget_mb")
+
+        frames, size = playback_cache.stats()
+        col.label(text=f"{frames} Frames, {size / (1024 * 1024):.1f} MB")
+        col.operator("animgraph.clear_playback_cache", icon="TRASH")
+
+        col.separator()
+        col.prop(settings, "use_prefetch")
+        sub = col.column()
+        sub.enabled = settings.use_prefetch
+        sub.prop(settings, "prefetch_frames")
+        error = playback_cache.prefetch_error()
+        if error:
+            sub.label(text=f"Prefetch stopped: {error}", icon="ERROR")
+
+        col.separator()
+        col.prop(settings, "use_disk_cache")
+        sub = col.column()
+        sub.enabled = settings.use_disk_cache
+        sub.prop(settings, "disk_dir")
+        if disk_cache.cache_root(context.scene) is None:
+            sub.label(text="Save the .blend file to use a relative directory", icon="ERROR")
+        sub.operator("animgraph.write_disk_cache", icon="FILE_TICK")
+        error = disk_cache.last_write_error()
+        if error:
+            sub.label(text=f"Write failed: {error}", icon="ERROR")
+
+_CLASSES = [
+    ANIMGRAPH_OT_clear_playback_cache,
+    ANIMGRAPH_OT_write_disk_cache,
+    ANIMGRAPH_PT_playback_cache,
+]
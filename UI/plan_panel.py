@@ -0,0 +1,48 @@
+# animation_graph/UI/plan_panel.py
+
+import bpy
+from ..Core import eval_plan
+
+
+def register():
+    for c in _CLASSES: bpy.utils.register_class(c)
+
+def unregister():
+    for c in reversed(_CLASSES): bpy.utils.unregister_class(c)
+
+
+class ANIMGRAPH_PT_plan(bpy.types.Panel):
+    bl_label = "Evaluation Plan"
+    bl_space_type = "NODE_EDITOR"
+    bl_region_type = "UI"
+    bl_category = "AnimGraph"
+
+    @classmethod
+    def poll(cls, context):
+        tree = getattr(getattr(context, "space_data", None), "edit_tree", None)
+        return getattr(tree, "bl_idname", "") == "AnimNodeTree"
+
+    def draw(self, context):
+        layout = self.layout
+        tree = context.space_data.edit_tree
+        plan = eval_plan.cached_plan(tree)
+        if plan is None:
+            layout.label(text="Not evaluated yet", icon="INFO")
+            return
+
+        if plan.cycle_nodes:
+            # Nodes sind zusätzlich rot eingefärbt; der Link, der den Zyklus schließt, liest default_value
+            box = layout.box()
+            box.label(text="Cycle detected", icon="ERROR")
+            sub = box.column(align=True)
+            for name in sorted(plan.cycle_nodes):
+                sub.label(text=name, icon="NODE")
+
+        col = layout.column(align=True)
+        col.label(text=f"{plan.folded_nodes} constant nodes folded")
+        col.label(text=f"{plan.dead_nodes} unused nodes eliminated")
+        col.label(text=f"{plan.fused_nodes} math nodes fused into {len(plan.fused_chains)} chains")
+
+_CLASSES = [
+    ANIMGRAPH_PT_plan,
+]
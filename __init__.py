@@ -11,10 +11,10 @@ bl_info = {
 import importlib
 import bpy
 
-from .Core import node_tree, action_editor
+from .Core import node_tree, action_editor, dependency_index, tree_hash, eval_plan, segment_index, pose_buffer, playback_cache, disk_cache, sync_scheduler
 from . import animgraph_eval, animgraph_nodes, animgraph_ui
 
-_modules = (node_tree, action_editor, animgraph_nodes, animgraph_ui, animgraph_eval)
+_modules = (dependency_index, tree_hash, eval_plan, segment_index, pose_buffer, playback_cache, disk_cache, sync_scheduler, node_tree, action_editor, animgraph_nodes, animgraph_ui, animgraph_eval)
 
 def register():
     for m in _modules: importlib.reload(m).register()
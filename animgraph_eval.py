@@ -1,8 +1,11 @@
 # animation_graph/animgraph_eval.py
 
+import time
+
 import bpy
 from bpy.app.handlers import persistent, frame_change_post, depsgraph_update_post
 from .Core.helper_methoden import build_action_input_value_map, sync_action_inputs, sync_tree_from_action_timekeys, sync_action_timekeys_from_tree
+from .Core import eval_plan, segment_index, pose_buffer, playback_cache, disk_cache, tree_hash
 
 
 _RUNNING = False
@@ -24,7 +27,7 @@ class AnimGraphEvalContext:
     """
     Shared context passed into node.evaluate(...)
     """
-    __slots__ = ("eval_cache", "pose_cache", "touched_armatures", "values", "eval_stack")
+    __slots__ = ("eval_cache", "pose_cache", "touched_armatures", "values", "group_scope")
 
     def __init__(self, eval_cache, pose_cache):
         self.eval_cache = eval_cache
@@ -34,8 +37,8 @@ class AnimGraphEvalContext:
         # per-frame runtime channel (Outputs der Nodes)
         self.values = {}
 
-        # recursion / cycle guard for eval_socket()
-        self.eval_stack = set()
+        # Top-Level: keine umgebende Group-Instanz
+        self.group_scope = None
 
 
 # --------------------------------------------------------------------
@@ -50,7 +53,9 @@ def register():
 def unregister():
     if _on_frame_change in frame_change_post: frame_change_post.remove(_on_frame_change)
     if _on_depsgraph_update in depsgraph_update_post: depsgraph_update_post.remove(_on_depsgraph_update)
+    if bpy.app.timers.is_registered(_on_prefetch_timer): bpy.app.timers.unregister(_on_prefetch_timer)
 
+    _reset_prefetch()
     _POSE_CACHE.clear()
     _EVAL_CACHE.clear()
 
@@ -95,6 +100,18 @@ def _find_nodes(tree, bl_idname):
     return [n for n in getattr(tree, "nodes", []) if getattr(n, "bl_idname", "") == bl_idname]
 
 
+def _socket_value_equals(current, value):
+    try:
+        if current == value:
+            return True
+    except Exception:
+        pass
+    try:
+        return tuple(current) == tuple(value)
+    except Exception:
+        return False
+
+
 def _apply_action_inputs_to_group_inputs(tree, action, ctx=None):
     if action is None:
         return
@@ -115,12 +132,15 @@ def _apply_action_inputs_to_group_inputs(tree, action, ctx=None):
             if getattr(out_sock, "bl_idname", "") == "NodeSocketBone":
                 arm_ob = value[0] if isinstance(value, tuple) and len(value) > 0 else None
                 bone_name = value[1] if isinstance(value, tuple) and len(value) > 1 else ""
+                # Nur bei Änderung schreiben: jede Zuweisung löst ein Tree-Update aus.
                 try:
-                    out_sock.armature_obj = arm_ob
+                    if out_sock.armature_obj != arm_ob:
+                        out_sock.armature_obj = arm_ob
                 except Exception:
                     pass
                 try:
-                    out_sock.bone_name = bone_name or ""
+                    if (out_sock.bone_name or "") != (bone_name or ""):
+                        out_sock.bone_name = bone_name or ""
                 except Exception:
                     pass
                 continue
@@ -128,7 +148,8 @@ def _apply_action_inputs_to_group_inputs(tree, action, ctx=None):
             # Keep socket UI in sync when possible.
             if hasattr(out_sock, "default_value"):
                 try:
-                    out_sock.default_value = value
+                    if not _socket_value_equals(out_sock.default_value, value):
+                        out_sock.default_value = value
                 except Exception:
                     pass
 
@@ -136,6 +157,18 @@ def _apply_action_inputs_to_group_inputs(tree, action, ctx=None):
                 ctx.values[(node.as_pointer(), out_sock.name)] = value
 
 
+def _tick_node(n, tree, scene, ctx):
+    # Preferred path: mixin provides eval_upstream (handles caching)
+    if hasattr(n, "eval_upstream"):
+        n.eval_upstream(tree, scene, ctx)
+        return
+
+    # Fallback: call evaluate directly if present
+    fn = getattr(n, "evaluate", None)
+    if callable(fn):
+        fn(tree, scene, ctx)
+
+
 def _evaluate_tree(tree, action, scene, ctx):
     """
     Kick off evaluation. We tick transform nodes and group nodes.
@@ -143,35 +176,70 @@ def _evaluate_tree(tree, action, scene, ctx):
     """
     _apply_action_inputs_to_group_inputs(tree, action, ctx)
 
-    for n in _find_nodes(tree, "DefineBoneTransformNode"):
-        # Preferred path: mixin provides eval_upstream (handles caching)
-        if hasattr(n, "eval_upstream"):
-            n.eval_upstream(tree, scene, ctx)
-            continue
-
-        # Fallback: call evaluate directly if present
-        fn = getattr(n, "evaluate", None)
-        if callable(fn):
-            fn(tree, scene, ctx)
+    # Zeitindex: nur Segmente, die diesen Frame aktiv sind, die Haltepose pro Bone
+    # und solche, deren Zustand aufgeräumt werden muss.
+    index = segment_index.get_index(tree, action, scene)
+    if index is not None:
+        segments = index.segments_for_frame(int(scene.frame_current))
+        segment_index.seed_skipped_dependencies(segments, tree, scene, ctx)
+        segment_nodes = [seg.node for seg in segments]
+        group_nodes = index.groups_for_frame(int(scene.frame_current))
+    else:
+        segment_nodes = (
+            _find_nodes(tree, "DefineBoneTransformNode")
+            + _find_nodes(tree, "DefineBoneSetTransformNode")
+            + _find_nodes(tree, "DefineBoneSetNoiseNode")
+            + _find_nodes(tree, "DefineBoneSetSpringNode")
+            + _find_nodes(tree, "DefineBonePropertyNode")
+        )
+        plan = eval_plan.get_plan(tree)
+        group_nodes = [n for n in _find_nodes(tree, "AnimNodeGroup") if plan.ticks_group(n.as_pointer())]
+
+    for n in segment_nodes:
+        _tick_node(n, tree, scene, ctx)
+
+    # Group nodes with side-effect transform/property nodes tick per frame; pure groups are pulled.
+    for n in group_nodes:
+        _tick_node(n, tree, scene, ctx)
 
-    for n in _find_nodes(tree, "DefineBonePropertyNode"):
-        if hasattr(n, "eval_upstream"):
-            n.eval_upstream(tree, scene, ctx)
-            continue
-
-        fn = getattr(n, "evaluate", None)
-        if callable(fn):
-            fn(tree, scene, ctx)
-
-    # Group nodes can contain side-effect transform nodes and must also tick per frame.
-    for n in _find_nodes(tree, "AnimNodeGroup"):
-        if hasattr(n, "eval_upstream"):
-            n.eval_upstream(tree, scene, ctx)
-            continue
 
-        fn = getattr(n, "evaluate", None)
-        if callable(fn):
-            fn(tree, scene, ctx)
+# --------------------------------------------------------------------
+# node state
+# --------------------------------------------------------------------
+# Zustandsbehaftete Nodes (Startposen, Federn, Noise-Basis) und der Live-Zustand des
+# Segment-Index. Cache-Einträge tragen eine Kopie davon, damit ein Treffer den Zustand
+# genauso weiterschiebt wie eine Auswertung des Frames.
+
+def _copy_state(value):
+    """Node-Zustand kopieren: Container, Arrays und mathutils-Werte tief, Blender-Daten als Referenz."""
+    if isinstance(value, bpy.types.bpy_struct):
+        return value
+    if isinstance(value, dict):
+        return {k: _copy_state(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_state(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_copy_state(v) for v in value)
+    copy = getattr(value, "copy", None)
+    if callable(copy):
+        try:
+            return copy()
+        except Exception:
+            pass
+    return value
+
+def _node_state(pose_cache):
+    return (_copy_state(pose_cache), segment_index.snapshot_live())
+
+def _restore_node_state(state):
+    """Zustand eines Cache-Treffers übernehmen; ohne gespeicherten Zustand (Disk-Cache) verwerfen."""
+    _POSE_CACHE.clear()
+    if state is None:
+        segment_index.restore_live({})
+        return
+    pose_cache, live = state
+    _POSE_CACHE.update(_copy_state(pose_cache))
+    segment_index.restore_live(live)
 
 
 # --------------------------------------------------------------------
@@ -185,29 +253,54 @@ def _on_frame_change(scene, depsgraph=None):
         return
 
     _RUNNING = True
+    eval_plan.begin_evaluation()
     try:
         # Per-frame cache reset
         _EVAL_CACHE.clear()
+        pose_buffer.begin_frame()
+
+        # for tree in _iter_animtrees():
+        trees = list(_iter_active_action_trees(scene))
+
+        # Opt-in playback cache: repeat visits of a frame write the stored pose directly.
+        cache_key = playback_cache.frame_key(scene, trees) if playback_cache.enabled(scene) else None
+        cached = playback_cache.lookup(cache_key) if cache_key is not None else None
+        # Zweite Stufe: gemappte Posen auf Platte (andere Sessions/Farm-Nodes)
+        use_disk = cache_key is not None and disk_cache.enabled(scene)
+        if cached is None and use_disk:
+            cached = disk_cache.lookup(scene, trees)
+            if cached is not None:
+                playback_cache.insert(cache_key, cached, scene)
+        if cached is not None:
+            for arm_ob in playback_cache.apply(cached):
+                pose_buffer.tag_armature(arm_ob)
+            _restore_node_state(cached.state)
+            _schedule_prefetch(scene)
+            return
 
         ctx = AnimGraphEvalContext(_EVAL_CACHE, _POSE_CACHE)
 
-        # for tree in _iter_animtrees():
-        for tree, action in _iter_active_action_trees(scene):
+        for tree, action in trees:
             _evaluate_tree(tree, action, scene, ctx)
 
-        # Update once per armature, not per node
+        if cache_key is not None:
+            stored = playback_cache.store_current_frame(cache_key, scene, _node_state(_POSE_CACHE))
+            if use_disk:
+                disk_cache.record(scene, trees, stored)
+
+        # Update once per armature, not per node (only armatures whose pose actually changed)
         for arm_ob in ctx.touched_armatures:
-            try:
-                arm_ob.update_tag(refresh={"DATA"})
-            except Exception:
-                pass
+            pose_buffer.tag_armature(arm_ob)
+
+        _schedule_prefetch(scene)
 
     finally:
+        eval_plan.end_evaluation()
         _RUNNING = False
     # try:
     #     _EVAL_CACHE.clear()
 
-    #     # ctx.values und ctx.eval_stack werden im __init__ neu angelegt
+    #     # ctx.values wird im __init__ neu angelegt
     #     ctx = AnimGraphEvalContext(_EVAL_CACHE, _POSE_CACHE)
 
     #     for tree in _iter_animtrees():
@@ -224,6 +317,198 @@ def _on_frame_change(scene, depsgraph=None):
 
 
 
+# --------------------------------------------------------------------
+# prefetch
+# --------------------------------------------------------------------
+# Während der Wiedergabe wertet ein Timer in kurzen Zeitscheiben die Frames vor dem
+# Playhead aus und legt sie im Playback-Cache ab; der Frame-Handler wendet dann nur an.
+# bpy ist nicht threadsicher, daher Zeitscheiben auf dem Main-Thread statt Worker-Thread.
+
+# Sekunden Auswertung pro Timer-Aufruf (mindestens ein Frame)
+_PREFETCH_SLICE = 0.004
+_PREFETCH_INTERVAL = 0.01
+
+# (scene pointer, Tree-Hashes): Prefetch nicht exakt möglich (Property-Nodes, FCurve-Bones)
+_PREFETCH_BLOCKED = set()
+
+# Eigener Node-Zustand des Prefetch: (block key, nächster Frame, pose_cache, Segment-Live-Zustand).
+# Der echte Zustand (_POSE_CACHE, Segment-Index) bleibt auf dem Frame des Playheads.
+_PREFETCH_RUN = None
+
+
+class _SceneAtFrame:
+    """Scene-Proxy mit überschriebenem Frame; alles andere kommt von der echten Scene."""
+
+    __slots__ = ("_scene", "frame_current", "frame_current_final", "frame_subframe")
+
+    def __init__(self, scene, frame):
+        self._scene = scene
+        self.frame_current = frame
+        self.frame_current_final = float(frame)
+        self.frame_subframe = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._scene, name)
+
+
+def _is_playing():
+    wm = getattr(bpy.context, "window_manager", None)
+    for win in getattr(wm, "windows", ()):
+        screen = getattr(win, "screen", None)
+        if screen is not None and screen.is_animation_playing:
+            return True
+    return False
+
+def _schedule_prefetch(scene):
+    if not playback_cache.prefetch_enabled(scene):
+        return
+    if not bpy.app.timers.is_registered(_on_prefetch_timer):
+        bpy.app.timers.register(_on_prefetch_timer, first_interval=_PREFETCH_INTERVAL)
+
+def _on_prefetch_timer():
+    scene = getattr(bpy.context, "scene", None)
+    if scene is None or _RUNNING or not playback_cache.prefetch_enabled(scene) or not _is_playing():
+        return None
+    try:
+        more = _prefetch_step(scene)
+    except Exception as ex:
+        # Prefetch stoppt; der Fehler steht im Cache-Panel
+        playback_cache.note_prefetch_error(str(ex))
+        return None
+    playback_cache.note_prefetch_error(None)
+    return _PREFETCH_INTERVAL if more else None
+
+def _reset_prefetch():
+    global _PREFETCH_RUN
+    _PREFETCH_BLOCKED.clear()
+    _PREFETCH_RUN = None
+
+def _iter_tree_nodes(tree, seen=None):
+    seen = set() if seen is None else seen
+    if tree is None or tree.as_pointer() in seen:
+        return
+    seen.add(tree.as_pointer())
+    for node in tree.nodes:
+        yield node
+        if getattr(node, "bl_idname", "") == "AnimNodeGroup":
+            yield from _iter_tree_nodes(getattr(node, "node_tree", None), seen)
+
+def _prefetch_safe(trees):
+    # Property-Nodes schreiben außerhalb der Pose-Kanäle (nicht zurücksetzbar, nicht cachebar).
+    for tree, _action in trees:
+        for node in _iter_tree_nodes(tree):
+            if getattr(node, "bl_idname", "") == "DefineBonePropertyNode":
+                return False
+    # FCurve-Werte zukünftiger Frames stehen vor der echten Frame-Auswertung nicht in den Bones.
+    for arm_ob, _names, _modes, _rows in pose_buffer.frame_writes():
+        if pose_buffer.has_animated_bones(arm_ob):
+            return False
+    return True
+
+def _prefetch_step(scene):
+    """Nächste nicht gecachte Frames vor dem Playhead auswerten. True, wenn noch Frames fehlen."""
+    global _RUNNING, _PREFETCH_RUN
+
+    trees = list(_iter_active_action_trees(scene))
+    if not trees:
+        return False
+    block_key = (scene.as_pointer(), tuple(tree_hash.content_hash(tree) for tree, _action in trees))
+    if block_key in _PREFETCH_BLOCKED:
+        return False
+    if not _prefetch_safe(trees):
+        _PREFETCH_BLOCKED.add(block_key)
+        return False
+
+    frame = int(scene.frame_current)
+    last = min(frame + int(playback_cache.settings(scene).prefetch_frames), int(scene.frame_end))
+    f = frame + 1
+    while f <= last and playback_cache.contains(playback_cache.frame_key(_SceneAtFrame(scene, f), trees)):
+        f += 1
+    if f > last:
+        return False
+
+    # Start- und Read-Posen lesen die Bones: Pose von f - 1 herstellen (f - 1 == frame liegt schon an).
+    prev = None
+    if f - 1 > frame:
+        prev = playback_cache.lookup(playback_cache.frame_key(_SceneAtFrame(scene, f - 1), trees))
+
+    # Fortsetzen, wo der letzte Prefetch aufgehört hat; sonst vom Zustand nach f - 1 abzweigen
+    # (Cache-Eintrag, ersatzweise der Zustand des Playheads).
+    run = _PREFETCH_RUN
+    _PREFETCH_RUN = None
+    if run is not None and run[0] == block_key and run[1] == f:
+        pose_cache, run_live = run[2], run[3]
+    elif prev is not None and prev.state is not None:
+        pose_cache, run_live = _copy_state(prev.state[0]), prev.state[1]
+    else:
+        pose_cache, run_live = _copy_state(_POSE_CACHE), segment_index.snapshot_live()
+
+    deadline = time.perf_counter() + _PREFETCH_SLICE
+    stored = []
+    complete = True
+
+    _RUNNING = True
+    eval_plan.begin_evaluation()
+    pose_buffer.begin_capture()
+    live = segment_index.snapshot_live()
+    segment_index.restore_live(run_live)
+    try:
+        if prev is not None:
+            playback_cache.apply(prev)
+
+        while f <= last:
+            frame_scene = _SceneAtFrame(scene, f)
+            key = playback_cache.frame_key(frame_scene, trees)
+            pose_buffer.begin_frame()
+            ctx = AnimGraphEvalContext(set(), pose_cache)
+            for tree, action in trees:
+                _evaluate_tree(tree, action, frame_scene, ctx)
+
+            entry = playback_cache.store_current_frame(key, frame_scene, _node_state(pose_cache))
+            if entry is None:
+                complete = False
+                break
+            stored.append((key, frame_scene, entry))
+            f += 1
+            if time.perf_counter() >= deadline:
+                break
+    finally:
+        run_live = segment_index.snapshot_live()
+        segment_index.restore_live(live)
+        exact = pose_buffer.end_capture()
+        eval_plan.end_evaluation()
+        _RUNNING = False
+
+    if not (exact and complete):
+        playback_cache.discard([key for key, _frame_scene, _entry in stored])
+        _PREFETCH_BLOCKED.add(block_key)
+        return False
+
+    _PREFETCH_RUN = (block_key, f, pose_cache, run_live)
+
+    if disk_cache.enabled(scene):
+        for _key, frame_scene, entry in stored:
+            disk_cache.record(frame_scene, trees, entry)
+    return f <= last
+
+
+def _invalidate_animated_plans(depsgraph):
+    # Keyframes auf Node-Werten ändern die Action des Trees, nicht den Tree: gefaltete Werte neu bestimmen
+    actions = set()
+    for update in getattr(depsgraph, "updates", ()):
+        id_data = getattr(update.id, "original", None) or update.id
+        if isinstance(id_data, bpy.types.Action):
+            actions.add(id_data.as_pointer())
+    if not actions:
+        return
+    for tree in bpy.data.node_groups:
+        if getattr(tree, "bl_idname", "") != "AnimNodeTree":
+            continue
+        ad = getattr(tree, "animation_data", None)
+        action = getattr(ad, "action", None) if ad is not None else None
+        if action is not None and action.as_pointer() in actions:
+            eval_plan.invalidate(tree)
+
 @persistent
 def _on_depsgraph_update(scene, depsgraph=None):
     global _DEPSGRAPH_SYNC_RUNNING
@@ -232,6 +517,19 @@ def _on_depsgraph_update(scene, depsgraph=None):
     _DEPSGRAPH_SYNC_RUNNING = True
 
     try:
+        # Edits that did not come from our own tags invalidate the previous-frame pose buffer.
+        try:
+            if pose_buffer.note_depsgraph_updates(depsgraph):
+                playback_cache.clear()
+                disk_cache.invalidate()
+                _reset_prefetch()
+        except Exception:
+            pass
+        try:
+            _invalidate_animated_plans(depsgraph)
+        except Exception:
+            pass
+
         # Keep your UI tweak
         scr = bpy.context.screen
         if scr:
@@ -2,7 +2,7 @@
 
 import bpy
 from nodeitems_utils import NodeCategory, NodeItem, register_node_categories, unregister_node_categories
-from .Nodes import bone_nodes, mathe_nodes, iteration_nodes, bone_transform_nodes
+from .Nodes import bone_nodes, mathe_nodes, iteration_nodes, bone_transform_nodes, easing
 from .Nodes.group_node import AnimNodeGroup
 
 
@@ -13,6 +13,7 @@ _MODULES = [
     mathe_nodes,
     bone_nodes,
     iteration_nodes,
+    easing,
     bone_transform_nodes,
 ]
 
@@ -40,6 +41,9 @@ _NODE_CATEGORIES = [ # TODO Kontext Menü überarbeiten; Kompatibilität mit Nod
         items=[
             NodeItem("DefineBoneNode"),
             NodeItem("DefineBoneTransformNode"),
+            NodeItem("DefineBoneSetTransformNode"),
+            NodeItem("DefineBoneSetNoiseNode"),
+            NodeItem("DefineBoneSetSpringNode"),
             NodeItem("DefineBonePropertyNode"),
             NodeItem("ReadBoneTransformNode"),
             NodeItem("ReadBonePropertyNode"),
@@ -67,6 +71,7 @@ _NODE_CATEGORIES = [ # TODO Kontext Menü überarbeiten; Kompatibilität mit Nod
             NodeItem("FloatMath"),
             NodeItem("VectorMath"),
             NodeItem("MatrixMath"),
+            NodeItem("ExpressionNode"),
         ],
     ),
 
@@ -2,11 +2,13 @@
 import bpy
 
 from .Core.node_tree import AnimNodeTree
-from .UI import action_operator, group_operator
+from .UI import action_operator, cache_panel, group_operator, plan_panel
 
 _MODULES = [
     group_operator,
     action_operator,
+    cache_panel,
+    plan_panel,
 ]
 
 def register(): 